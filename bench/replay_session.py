@@ -0,0 +1,218 @@
+# bench/replay_session.py
+# =======================================================================
+#
+#        全功能控制器 - 会话回放 (把录制的帧重新送入检测/决策逻辑)
+#        用于离线复现现场问题、对比录制时与当前代码的决策差异、分析决策循环耗时
+#
+# =======================================================================
+#
+# 用法 (在仓库根目录执行):
+#     python -m bench.replay_session <会话目录或 zip>                  尽快回放并对比决策
+#     python -m bench.replay_session <会话> --speed 10                 按录制节奏的 10 倍速回放
+#     python -m bench.replay_session <会话> --timeline                 打印动作/滑动/决策变化时间线
+#     python -m bench.replay_session <会话> --all-frames               对每一帧都执行决策 (用于性能分析)
+#
+import argparse
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.hunter_priority import find_priority_match
+from utils.frame_change import FrameChangeGate
+from utils.matcher import TemplateMatcher
+from utils.recorder import SessionReader, describe_match
+
+SOURCES = ("hunter", "detector", "gate")
+
+Divergence = namedtuple("Divergence", ["t", "source", "seq", "field", "recorded", "replayed"])
+
+
+class _SourceState:
+    """单个决策来源 (狩猎器/P1检测器/启动门) 的回放状态，与录制时一样各自持有匹配器和变化门。"""
+
+    def __init__(self):
+        self.matcher = TemplateMatcher()
+        self.gate = FrameChangeGate()
+        self.last_result: Optional[Dict[str, Any]] = None
+        self.params: Optional[Dict[str, Any]] = None
+        self.decisions = 0
+        self.evaluated = 0
+        self.latencies: List[float] = []
+
+
+class ReplayReport:
+    def __init__(self, session: SessionReader):
+        self.session_duration = session.duration
+        self.events = len(session.events)
+        self.wall_time = 0.0
+        self.sources: Dict[str, _SourceState] = {}
+        self.divergences: List[Divergence] = []
+        self.missing_frames = 0
+        self.counts: Dict[str, int] = {}
+
+    def format(self, limit: int = 20) -> str:
+        speedup = self.session_duration / self.wall_time if self.wall_time > 0 else float("inf")
+        lines = [
+            f"会话时长 {self.session_duration:.1f}s，事件 {self.events} 个，"
+            f"回放耗时 {self.wall_time:.2f}s (约 {speedup:.0f} 倍速)",
+            "事件统计: " + ", ".join(f"{k}={v}" for k, v in sorted(self.counts.items())),
+        ]
+        for name, state in self.sources.items():
+            if not state.decisions:
+                continue
+            lat = np.array(state.latencies) if state.latencies else np.zeros(1)
+            lines.append(
+                f"[{name}] 决策 {state.decisions} 次，实际匹配 {state.evaluated} 次，"
+                f"匹配耗时 p50={np.percentile(lat, 50):.2f}ms p99={np.percentile(lat, 99):.2f}ms"
+            )
+        if self.missing_frames:
+            lines.append(f"缺失帧 {self.missing_frames} 个 (录制时被丢弃)，相关决策未回放")
+        if self.divergences:
+            lines.append(f"与录制结果不一致 {len(self.divergences)} 处:")
+            for d in self.divergences[:limit]:
+                lines.append(f"  +{d.t:8.2f}s [{d.source}] 帧 {d.seq} {d.field}: 录制={d.recorded} 回放={d.replayed}")
+            if len(self.divergences) > limit:
+                lines.append(f"  ... 另有 {len(self.divergences) - limit} 处")
+        else:
+            lines.append("回放决策与录制结果完全一致。")
+        return "\n".join(lines)
+
+
+def _pace(start_wall: float, start_t: float, t: float, speed: Optional[float]):
+    if speed:
+        delay = (t - start_t) / speed - (time.perf_counter() - start_wall)
+        if delay > 0:
+            time.sleep(delay)
+
+
+def replay(
+    session: SessionReader,
+    speed: Optional[float] = None,
+    sources: Sequence[str] = SOURCES,
+    all_frames: bool = False,
+    on_event: Optional[Callable[[float, Dict[str, Any], Optional[Dict[str, Any]]], None]] = None,
+) -> ReplayReport:
+    """
+    按时间顺序回放会话。每个 match 事件对应的帧重新经过变化门和优先级匹配，
+    结果与录制值比较；all_frames=True 时每一帧都执行一次决策 (只计时，不比较)。
+    on_event(相对时间, 事件, 回放结果) 可用于打印时间线。
+    """
+    report = ReplayReport(session)
+    templates: Dict[str, List[Tuple[str, str]]] = {}
+    # (窗口, 帧序号) -> (帧编号, 窗口区域)
+    frames: Dict[Tuple[str, int], Tuple[Optional[str], Any]] = {}
+    states = {name: _SourceState() for name in sources}
+    report.sources = states
+    if not session.events:
+        return report
+    start_t = session.events[0]["t"]
+    start_wall = time.perf_counter()
+
+    def decide(state: _SourceState, event: Dict[str, Any], image: np.ndarray, region) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        order = templates.get(event["templates"], [])
+        state.gate.threshold = event.get("change_threshold", 0) or 0
+        # 与录制时相同的变化门键：狩猎器用窗口位置，P1检测器用查询条件
+        key = tuple(region) if event["source"] == "hunter" else (event["templates"], event["conf"], event["pyramid"])
+        evaluated = event["source"] == "gate" or state.gate.should_evaluate(image, key)
+        if evaluated:
+            t0 = time.perf_counter()
+            hit = find_priority_match(state.matcher, image, order, event["conf"], region=region, pyramid=event["pyramid"])
+            state.latencies.append((time.perf_counter() - t0) * 1000.0)
+            state.last_result = describe_match(hit)
+            state.evaluated += 1
+        state.decisions += 1
+        return evaluated, state.last_result
+
+    for event in session.events:
+        kind = event["kind"]
+        report.counts[kind] = report.counts.get(kind, 0) + 1
+        _pace(start_wall, start_t, event["t"], speed)
+        replayed = None
+
+        if kind == "templates":
+            templates[event["id"]] = session.template_entries(event)
+        elif kind == "frame":
+            frames[(event["window"], event["seq"])] = (event["frame"], event["region"])
+            if all_frames and event["frame"]:
+                for name, state in states.items():
+                    if state.params is not None and state.params["window"] == event["window"]:
+                        image = session.frame(event["frame"])
+                        if image is not None:
+                            decide(state, state.params, image, event["region"])
+        elif kind == "match" and event["source"] in states:
+            state = states[event["source"]]
+            state.params = event
+            if all_frames:
+                continue  # 该帧已在 frame 事件中处理过
+            frame_id, region = frames.get((event["window"], event["seq"]), (None, None))
+            image = session.frame(frame_id)
+            if image is None:
+                report.missing_frames += 1
+                continue
+            evaluated, result = decide(state, event, image, region)
+            replayed = {"evaluated": evaluated, "result": result}
+            rel = event["t"] - start_t
+            found = event.get("found", event.get("result") is not None)
+            if evaluated != event["evaluated"]:
+                report.divergences.append(Divergence(rel, event["source"], event["seq"], "变化门", event["evaluated"], evaluated))
+            if (result is not None) != found:
+                report.divergences.append(Divergence(rel, event["source"], event["seq"], "命中", found, result is not None))
+            elif evaluated and event["evaluated"] and result != event.get("result"):
+                report.divergences.append(Divergence(rel, event["source"], event["seq"], "结果", event.get("result"), result))
+
+        if on_event is not None:
+            on_event(event["t"] - start_t, event, replayed)
+
+    report.wall_time = time.perf_counter() - start_wall
+    return report
+
+
+def _print_timeline(rel: float, event: Dict[str, Any], replayed: Optional[Dict[str, Any]]):
+    kind = event["kind"]
+    if kind == "action":
+        print(f"+{rel:8.2f}s [动作] {event['action']} {event['template']} -> {event['outcome']} {event.get('point') or ''}")
+    elif kind == "swipe":
+        print(f"+{rel:8.2f}s [滑动] 第 {event['count'] + 1} 次 {event['start_pct']} -> {event['end_pct']}")
+    elif kind == "swipe_result":
+        print(f"+{rel:8.2f}s [滑动] 完成 {event.get('result') or event.get('error')}")
+    elif kind == "window_region":
+        print(f"+{rel:8.2f}s [窗口] {event['window']} {event['region']}")
+    elif kind == "match" and replayed is not None and replayed["evaluated"]:
+        result = replayed["result"]
+        text = f"{result['template']} {result['box']}" if result else "无"
+        print(f"+{rel:8.2f}s [{event['source']}] 帧 {event['seq']} 回放命中: {text}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="回放录制的会话")
+    parser.add_argument("session", help="会话目录或打包的 zip")
+    parser.add_argument("--speed", type=float, default=None, help="相对录制节奏的倍速，不指定则尽快回放")
+    parser.add_argument("--sources", default=",".join(SOURCES), help="回放的决策来源，逗号分隔")
+    parser.add_argument("--all-frames", action="store_true", help="对每一帧都执行决策 (性能分析用，不比较结果)")
+    parser.add_argument("--timeline", action="store_true", help="打印事件时间线")
+    args = parser.parse_args(argv)
+
+    session = SessionReader(Path(args.session))
+    try:
+        report = replay(
+            session,
+            speed=args.speed,
+            sources=[s.strip() for s in args.sources.split(",") if s.strip()],
+            all_frames=args.all_frames,
+            on_event=_print_timeline if args.timeline else None,
+        )
+    finally:
+        session.close()
+    print(report.format())
+    return 1 if report.divergences else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
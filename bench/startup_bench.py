@@ -0,0 +1,190 @@
+# bench/startup_bench.py
+# =======================================================================
+#
+#        全功能控制器 - 启动耗时基准测试
+#        在全新的子进程中测量各入口模块的导入耗时、导入时加载了哪些重量级依赖，
+#        以及图形界面从进程启动到主窗口第一次绘制的耗时
+#
+# =======================================================================
+#
+# 用法 (在仓库根目录执行):
+#     python -m bench.startup_bench                                  测量默认入口模块 (每项 5 次取中位数)
+#     python -m bench.startup_bench --modules cli,utils.helpers      只测量指定模块
+#     python -m bench.startup_bench --first-paint                    同时测量图形界面首次绘制 (需要 PyQt6)
+#     python -m bench.startup_bench --json new.json --compare old.json
+#
+import argparse
+import importlib.util
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_MODULES = ("utils.helpers", "core.swipe_runner", "core.image_hunter", "cli", "ui.main_window")
+# 这些依赖应当在真正用到时才加载；出现在导入结果里说明某处又在模块级导入了它们
+HEAVY_MODULES = ("cv2", "mss", "numpy", "win32gui", "PyQt6", "asyncio")
+DEFAULT_TOLERANCE = 0.25  # 中位数允许变慢的比例
+TOP_IMPORTS = 5
+
+StartupResult = namedtuple(
+    "StartupResult", ["target", "ok", "import_ms", "process_ms", "heavy", "top_imports", "error"]
+)
+
+_CHILD_CODE = """
+import importlib, json, sys, time
+started = time.perf_counter()
+error = None
+try:
+    importlib.import_module({module!r})
+except Exception as e:
+    error = f"{{type(e).__name__}}: {{e}}"
+elapsed = (time.perf_counter() - started) * 1000.0
+print(json.dumps({{"import_ms": elapsed, "error": error, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def _top_imports(stderr: str, limit: int = TOP_IMPORTS) -> List[List]:
+    """解析 -X importtime 的输出，按顶层包汇总自身耗时，返回耗时最多的几项 [(包名, ms), ...]。"""
+    totals: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            package = match.group(4).split(".")[0]
+            totals[package] = totals.get(package, 0) + int(match.group(1))
+    ranked = sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:limit]
+    return [[name, us / 1000.0] for name, us in ranked]
+
+
+def measure_import(module: str, repeat: int) -> StartupResult:
+    """每次都启动新的解释器导入 module，返回中位数结果。"""
+    import_ms, process_ms = [], []
+    heavy: List[str] = []
+    top: List[List] = []
+    code = _CHILD_CODE.format(module=module, heavy=HEAVY_MODULES)
+    for i in range(repeat):
+        started = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=REPO_ROOT, capture_output=True, text=True, encoding="utf-8", errors="ignore",
+        )
+        process_ms.append((time.perf_counter() - started) * 1000.0)
+        try:
+            payload = json.loads(proc.stdout.strip().splitlines()[-1])
+        except (IndexError, ValueError):
+            return StartupResult(module, False, 0.0, process_ms[-1], [], [], proc.stderr.strip()[-300:])
+        if payload["error"]:
+            return StartupResult(module, False, 0.0, process_ms[-1], payload["heavy"], [], payload["error"])
+        import_ms.append(payload["import_ms"])
+        heavy = payload["heavy"]
+        if i == 0:
+            top = _top_imports(proc.stderr)
+    return StartupResult(module, True, statistics.median(import_ms), statistics.median(process_ms), heavy, top, None)
+
+
+def measure_first_paint(repeat: int, timeout: float = 60.0, offscreen: bool = False) -> StartupResult:
+    """启动 main.py (设置 CONTROLLER_STARTUP_PROBE)，窗口第一次绘制后程序会输出耗时并退出。"""
+    target = "main.py first-paint"
+    if importlib.util.find_spec("PyQt6") is None:
+        return StartupResult(target, False, 0.0, 0.0, [], [], "未安装 PyQt6")
+    env = dict(os.environ, CONTROLLER_STARTUP_PROBE="1")
+    if offscreen:
+        env["QT_QPA_PLATFORM"] = "offscreen"
+    paint_ms, process_ms = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        try:
+            proc = subprocess.run(
+                [sys.executable, "main.py"], cwd=REPO_ROOT, env=env, capture_output=True,
+                text=True, encoding="utf-8", errors="ignore", timeout=timeout,
+            )
+        except subprocess.TimeoutExpired:
+            return StartupResult(target, False, 0.0, timeout * 1000.0, [], [], f"{timeout:.0f} 秒内没有完成首次绘制")
+        process_ms.append((time.perf_counter() - started) * 1000.0)
+        match = re.search(r"STARTUP first_paint_ms=([\d.]+)", proc.stdout)
+        if match is None:
+            return StartupResult(target, False, 0.0, process_ms[-1], [], [], proc.stderr.strip()[-300:] or "没有输出首次绘制耗时")
+        paint_ms.append(float(match.group(1)))
+    return StartupResult(target, True, statistics.median(paint_ms), statistics.median(process_ms), [], [], None)
+
+
+def format_results(results: Sequence[StartupResult]) -> str:
+    header = f"{'target':<26}{'import_ms':>11}{'process_ms':>12}  heavy / top imports"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        if not r.ok:
+            lines.append(f"{r.target:<26}{'-':>11}{'-':>12}  失败: {r.error}")
+            continue
+        lines.append(f"{r.target:<26}{r.import_ms:>11.1f}{r.process_ms:>12.1f}  {','.join(r.heavy) or '-'}")
+        if r.top_imports:
+            top = ", ".join(f"{name} {ms:.1f}" for name, ms in r.top_imports)
+            lines.append(f"{'':<49}{top}")
+    return "\n".join(lines)
+
+
+def compare_results(
+    results: Sequence[StartupResult], baseline: Sequence[dict], tolerance: float = DEFAULT_TOLERANCE
+) -> List[str]:
+    """与基线 JSON 比较，返回退化描述 (为空表示没有退化)。"""
+    previous = {b["target"]: b for b in baseline}
+    regressions = []
+    for r in results:
+        b = previous.get(r.target)
+        if b is None or not r.ok or not b["ok"]:
+            continue
+        if b["import_ms"] > 0 and r.import_ms > b["import_ms"] * (1 + tolerance):
+            regressions.append(f"{r.target}: {b['import_ms']:.1f} -> {r.import_ms:.1f} ms")
+        added = sorted(set(r.heavy) - set(b["heavy"]))
+        if added:
+            regressions.append(f"{r.target}: 导入时新增加载 {', '.join(added)}")
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="启动耗时基准测试")
+    parser.add_argument("--modules", default=",".join(DEFAULT_MODULES), help="逗号分隔的入口模块")
+    parser.add_argument("--repeat", type=int, default=5, help="每项启动的次数 (取中位数)")
+    parser.add_argument("--first-paint", action="store_true", help="测量图形界面首次绘制耗时")
+    parser.add_argument("--offscreen", action="store_true", help="首次绘制测量使用 Qt 的 offscreen 平台 (无显示器时)")
+    parser.add_argument("--json", metavar="PATH", help="把结果保存为 JSON")
+    parser.add_argument("--compare", metavar="PATH", help="与之前保存的 JSON 结果比较，退化时返回 1")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="允许变慢的比例")
+    args = parser.parse_args(argv)
+
+    repeat = max(1, args.repeat)
+    results = [measure_import(m.strip(), repeat) for m in args.modules.split(",") if m.strip()]
+    if args.first_paint:
+        results.append(measure_first_paint(repeat, offscreen=args.offscreen))
+    print(format_results(results))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {"created_at": time.time(), "platform": sys.platform, "results": [r._asdict() for r in results]},
+                f,
+                indent=2,
+                ensure_ascii=False,
+            )
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_results(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"[退化] {line}")
+        if regressions:
+            return 1
+        print("[基准] 与基线相比没有退化。")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
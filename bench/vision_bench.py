@@ -0,0 +1,410 @@
+# bench/vision_bench.py
+# =======================================================================
+#
+#        全功能控制器 - 视觉热路径离线基准测试
+#        用录制的窗口帧和模板集比较各匹配策略的速度、内存和准确率，
+#        不需要显示器、Windows 或手机，可在任意机器上重复运行
+#
+# =======================================================================
+#
+# 数据集目录结构:
+#     <dataset>/frames/*.png          录制的窗口帧 (按文件名顺序视为连续画面)
+#     <dataset>/templates/a|b|c|d/    与狩猎器相同的分类文件夹 (也可以直接放 *.png，视为 a 类)
+#     <dataset>/expected.json         可选标注: {"0001.png": "目标模板.png", "0002.png": null}
+#                                     值为该帧应命中的最高优先级模板文件名，null 表示不应命中
+#
+# 用法 (在仓库根目录执行):
+#     python -m bench.vision_bench <dataset>
+#     python -m bench.vision_bench --synthetic /tmp/bench_ds          生成合成数据集后测试
+#     python -m bench.vision_bench <dataset> --json new.json --compare old.json
+#
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import namedtuple
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from core.hunter_priority import ACTION_FOLDERS, build_priority_order, find_priority_match
+from utils.matcher import TemplateMatcher
+from utils.template_cache import TEMPLATE_CACHE
+from utils.vision import find_images_in_frame, match_template
+
+BenchResult = namedtuple(
+    "BenchResult",
+    [
+        "strategy",
+        "scale",
+        "templates",
+        "frames",
+        "scans",
+        "scans_per_sec",
+        "matches_per_sec",  # 模板数 × 扫描次数 / 耗时，即等效的单模板匹配吞吐
+        "p50_ms",
+        "p99_ms",
+        "mem_kib",  # 单次扫描新分配内存峰值的平均值 (tracemalloc，含 NumPy 数组)
+        "mem_peak_kib",
+        "accuracy",  # 没有可评分的标注时为 None
+        "labelled",
+    ],
+)
+
+# 与基线相比视为退化的阈值
+DEFAULT_TOLERANCE = 0.15  # p50 延迟变慢超过 15%
+ACCURACY_TOLERANCE = 0.0  # 准确率不允许下降
+
+Order = List[Tuple[str, str]]
+# 扫描函数: (帧, 优先级顺序, 置信度) -> 命中的模板路径或 None
+ScanFn = Callable[[np.ndarray, Order, float], Optional[str]]
+
+
+# ---------- 匹配策略 ----------
+def _opencv_scan(pyramid: bool) -> ScanFn:
+    # 与 find_image_with_opencv 相同：每个模板单独调用 match_template (截图不计入)
+    def scan(frame: np.ndarray, order: Order, conf: float) -> Optional[str]:
+        for path, _ in order:
+            if match_template(frame, path, confidence=conf, pyramid=pyramid) is not None:
+                return path
+        return None
+
+    return scan
+
+
+def _batch_scan(frame: np.ndarray, order: Order, conf: float) -> Optional[str]:
+    boxes = find_images_in_frame(frame, [path for path, _ in order], confidence=conf)
+    for (path, _), box in zip(order, boxes):
+        if box is not None:
+            return path
+    return None
+
+
+def _hunter_scan(pyramid: bool) -> Callable[[], ScanFn]:
+    # 狩猎器的实际逻辑：局部搜索 + 线程池并行 + 优先级提前结束；每轮测试使用新的匹配器
+    def factory() -> ScanFn:
+        matcher = TemplateMatcher()
+
+        def scan(frame: np.ndarray, order: Order, conf: float) -> Optional[str]:
+            hit = find_priority_match(matcher, frame, order, conf, pyramid=pyramid)
+            return hit[1] if hit else None
+
+        return scan
+
+    return factory
+
+
+STRATEGIES: Dict[str, Callable[[], ScanFn]] = {
+    "opencv": lambda: _opencv_scan(False),
+    "opencv-pyramid": lambda: _opencv_scan(True),
+    "batch": lambda: _batch_scan,
+    "hunter": _hunter_scan(False),
+    "hunter-pyramid": _hunter_scan(True),
+}
+
+
+# ---------- 数据集 ----------
+def _read_image(path: Path) -> np.ndarray:
+    image = cv2.imread(str(path), cv2.IMREAD_UNCHANGED)
+    if image is None:
+        raise ValueError(f"无法读取图片: {path}")
+    return image
+
+
+def load_templates(folder: Path) -> Dict[str, List[str]]:
+    images_by_action: Dict[str, List[str]] = {action: [] for action in ACTION_FOLDERS.values()}
+    for folder_name, action_key in ACTION_FOLDERS.items():
+        sub = folder / folder_name
+        if sub.is_dir():
+            images_by_action[action_key] = sorted(str(p) for p in sub.glob("*.png"))
+    # 没有分类子文件夹时，根目录下的模板全部视为 a 类
+    images_by_action["a_click"] += sorted(str(p) for p in folder.glob("*.png"))
+    return images_by_action
+
+
+def load_dataset(root: Path) -> Tuple[List[Tuple[str, np.ndarray]], Order, Dict[str, Optional[str]]]:
+    frame_paths = sorted((root / "frames").glob("*.png"))
+    if not frame_paths:
+        raise ValueError(f"{root / 'frames'} 中没有帧图片")
+    frames = []
+    for path in frame_paths:
+        image = _read_image(path)
+        if image.ndim == 2:
+            image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+        elif image.shape[2] == 4:
+            image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+        frames.append((path.name, image))
+
+    order = build_priority_order(load_templates(root / "templates"))
+    if not order:
+        raise ValueError(f"{root / 'templates'} 中没有模板图片")
+
+    expected: Dict[str, Optional[str]] = {}
+    labels = root / "expected.json"
+    if labels.is_file():
+        with open(labels, "r", encoding="utf-8") as f:
+            expected = json.load(f)
+    return frames, order, expected
+
+
+def scale_dataset(
+    frames: List[Tuple[str, np.ndarray]], order: Order, scale: float, workdir: Path
+) -> Tuple[List[Tuple[str, np.ndarray]], Order]:
+    """模拟不同的窗口大小：帧和模板按同一比例缩放 (模板写入临时目录，文件名保持不变)。"""
+    if scale == 1.0:
+        return frames, order
+    interp = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+    scaled_frames = [
+        (name, cv2.resize(image, None, fx=scale, fy=scale, interpolation=interp))
+        for name, image in frames
+    ]
+    folder = workdir / f"scale_{scale:g}"
+    scaled_order = []
+    for index, (path, action_key) in enumerate(order):
+        target = folder / str(index) / Path(path).name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        template = _read_image(Path(path))
+        size = (max(1, round(template.shape[1] * scale)), max(1, round(template.shape[0] * scale)))
+        cv2.imwrite(str(target), cv2.resize(template, size, interpolation=interp))
+        scaled_order.append((str(target), action_key))
+    return scaled_frames, scaled_order
+
+
+def generate_synthetic(root: Path, frames: int = 20, templates: int = 12, size=(720, 1280), seed: int = 7):
+    """生成带标注的合成数据集：纹理背景上随机贴入 0~2 个模板。"""
+    rng = np.random.default_rng(seed)
+    width, height = size
+
+    def texture(w: int, h: int) -> np.ndarray:
+        noise = rng.integers(0, 256, (h // 4 + 1, w // 4 + 1, 3), dtype=np.uint8)
+        return cv2.resize(noise, (w, h), interpolation=cv2.INTER_CUBIC)
+
+    for sub in ("frames", "templates"):
+        shutil.rmtree(root / sub, ignore_errors=True)
+    (root / "frames").mkdir(parents=True)
+    patches = []
+    folders = list(ACTION_FOLDERS)
+    for i in range(templates):
+        w, h = (int(v) for v in rng.integers(40, 121, 2))
+        patch = texture(w, h)
+        folder = root / "templates" / folders[i % len(folders)]
+        folder.mkdir(parents=True, exist_ok=True)
+        name = f"t{i:02d}.png"
+        cv2.imwrite(str(folder / name), patch)
+        patches.append((name, patch))
+
+    order = build_priority_order(load_templates(root / "templates"))
+    rank = {Path(path).name: index for index, (path, _) in enumerate(order)}
+    expected = {}
+    for i in range(frames):
+        frame = texture(width, height)
+        placed = []
+        for index in rng.choice(len(patches), int(rng.integers(0, 3)), replace=False):
+            name, patch = patches[index]
+            x = int(rng.integers(0, width - patch.shape[1]))
+            y = int(rng.integers(0, height - patch.shape[0]))
+            frame[y:y + patch.shape[0], x:x + patch.shape[1]] = patch
+            placed.append(name)
+        frame_name = f"{i:04d}.png"
+        cv2.imwrite(str(root / "frames" / frame_name), frame)
+        expected[frame_name] = min(placed, key=rank.__getitem__) if placed else None
+    with open(root / "expected.json", "w", encoding="utf-8") as f:
+        json.dump(expected, f, indent=2, ensure_ascii=False)
+
+
+# ---------- 测试 ----------
+def run_case(
+    strategy: str,
+    frames: List[Tuple[str, np.ndarray]],
+    order: Order,
+    expected: Dict[str, Optional[str]],
+    confidence: float,
+    repeat: int,
+    scale: float,
+) -> BenchResult:
+    TEMPLATE_CACHE.invalidate()
+    scan = STRATEGIES[strategy]()
+    # 预热一轮 (模板解码、线程池启动) 不计入结果
+    for _, image in frames:
+        scan(image, order, confidence)
+
+    names = {Path(path).name for path, _ in order}
+    correct = labelled = 0
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for frame_name, image in frames:
+            t0 = time.perf_counter()
+            hit = scan(image, order, confidence)
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+            # 期望的模板不在本次测试的模板子集中时，该帧的正确答案未知，不计分
+            if frame_name in expected and (expected[frame_name] is None or expected[frame_name] in names):
+                labelled += 1
+                correct += (Path(hit).name if hit else None) == expected[frame_name]
+    elapsed = time.perf_counter() - started
+
+    # 内存单独跑一轮，避免 tracemalloc 的开销影响延迟数据
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _, image in frames:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            scan(image, order, confidence)
+            peaks.append((tracemalloc.get_traced_memory()[1] - base) / 1024.0)
+    finally:
+        tracemalloc.stop()
+
+    scans = len(latencies)
+    return BenchResult(
+        strategy=strategy,
+        scale=scale,
+        templates=len(order),
+        frames=len(frames),
+        scans=scans,
+        scans_per_sec=scans / elapsed,
+        matches_per_sec=scans * len(order) / elapsed,
+        p50_ms=float(np.percentile(latencies, 50)),
+        p99_ms=float(np.percentile(latencies, 99)),
+        mem_kib=float(np.mean(peaks)),
+        mem_peak_kib=float(np.max(peaks)),
+        accuracy=correct / labelled if labelled else None,
+        labelled=labelled // repeat,
+    )
+
+
+def run_suite(
+    root: Path,
+    strategies: Sequence[str],
+    template_counts: Sequence[Optional[int]],
+    scales: Sequence[float],
+    confidence: float,
+    repeat: int,
+    progress: Callable[[str], None] = print,
+) -> List[BenchResult]:
+    frames, order, expected = load_dataset(root)
+    results = []
+    with tempfile.TemporaryDirectory(prefix="vision_bench_") as tmp:
+        for scale in scales:
+            scaled_frames, scaled_order = scale_dataset(frames, order, scale, Path(tmp))
+            for count in template_counts:
+                subset = scaled_order[:count] if count else scaled_order
+                if count and count > len(scaled_order):
+                    continue
+                for strategy in strategies:
+                    progress(f"[基准] {strategy} 缩放={scale:g} 模板={len(subset)} ...")
+                    results.append(
+                        run_case(strategy, scaled_frames, subset, expected, confidence, repeat, scale)
+                    )
+    return results
+
+
+def format_results(results: Sequence[BenchResult]) -> str:
+    header = (
+        f"{'strategy':<16}{'scale':>6}{'tpl':>6}{'scans/s':>10}{'match/s':>10}"
+        f"{'p50ms':>9}{'p99ms':>9}{'KiB/scan':>10}{'acc':>8}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in results:
+        accuracy = f"{r.accuracy:.1%}" if r.accuracy is not None else "-"
+        lines.append(
+            f"{r.strategy:<16}{r.scale:>6g}{r.templates:>6}{r.scans_per_sec:>10.1f}{r.matches_per_sec:>10.1f}"
+            f"{r.p50_ms:>9.2f}{r.p99_ms:>9.2f}{r.mem_kib:>10.1f}{accuracy:>8}"
+        )
+    return "\n".join(lines)
+
+
+def compare_results(
+    results: Sequence[BenchResult], baseline: Sequence[dict], tolerance: float = DEFAULT_TOLERANCE
+) -> List[str]:
+    """与基线 JSON 比较，返回退化描述 (为空表示没有退化)。"""
+    previous = {(b["strategy"], b["scale"], b["templates"]): b for b in baseline}
+    regressions = []
+    for r in results:
+        b = previous.get((r.strategy, r.scale, r.templates))
+        if b is None:
+            continue
+        case = f"{r.strategy} 缩放={r.scale:g} 模板={r.templates}"
+        if b["p50_ms"] > 0 and r.p50_ms > b["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{case}: p50 {b['p50_ms']:.2f} -> {r.p50_ms:.2f} ms")
+        if (
+            r.accuracy is not None
+            and b.get("accuracy") is not None
+            and r.accuracy < b["accuracy"] - ACCURACY_TOLERANCE
+        ):
+            regressions.append(f"{case}: 准确率 {b['accuracy']:.1%} -> {r.accuracy:.1%}")
+    return regressions
+
+
+def _parse_counts(text: str) -> List[Optional[int]]:
+    return [None if part.strip() == "all" else int(part) for part in text.split(",")]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="视觉热路径离线基准测试")
+    parser.add_argument("dataset", nargs="?", help="数据集目录 (frames/、templates/、expected.json)")
+    parser.add_argument("--synthetic", metavar="DIR", help="在 DIR 生成合成数据集并以它为测试对象")
+    parser.add_argument("--strategies", default="opencv,batch,hunter", help=f"逗号分隔，可选: {','.join(STRATEGIES)}")
+    parser.add_argument("--template-counts", default="all", help="模板数量 (按优先级取前 N 个)，如 1,4,all")
+    parser.add_argument("--scales", default="1.0", help="窗口缩放比例，如 1.0,0.75,0.5")
+    parser.add_argument("--conf", type=float, default=0.8, help="匹配置信度")
+    parser.add_argument("--repeat", type=int, default=3, help="每组重复遍历帧的次数")
+    parser.add_argument("--json", metavar="PATH", help="把结果保存为 JSON")
+    parser.add_argument("--compare", metavar="PATH", help="与之前保存的 JSON 结果比较，退化时返回 1")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="p50 允许变慢的比例")
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        root = Path(args.synthetic)
+        generate_synthetic(root)
+    elif args.dataset:
+        root = Path(args.dataset)
+    else:
+        parser.error("需要指定数据集目录或 --synthetic")
+
+    strategies = [s.strip() for s in args.strategies.split(",") if s.strip()]
+    unknown = [s for s in strategies if s not in STRATEGIES]
+    if unknown:
+        parser.error(f"未知策略: {', '.join(unknown)}")
+
+    results = run_suite(
+        root,
+        strategies,
+        _parse_counts(args.template_counts),
+        [float(s) for s in args.scales.split(",")],
+        args.conf,
+        max(1, args.repeat),
+    )
+    print(format_results(results))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {"created_at": time.time(), "cpu_count": os.cpu_count(), "results": [r._asdict() for r in results]},
+                f,
+                indent=2,
+                ensure_ascii=False,
+            )
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_results(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"[退化] {line}")
+        if regressions:
+            return 1
+        print("[基准] 与基线相比没有退化。")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+# cli.py
+# =======================================================================
+#
+#        全功能控制器 - 命令行/后台入口 (不依赖 PyQt)
+#        读取 combined_profiles.json 中的配置方案，为指定设备运行滑动器和/或狩猎器
+#
+# =======================================================================
+#
+# 用法 (在仓库根目录执行):
+#     python cli.py --list-profiles                                   列出配置方案
+#     python cli.py --list-devices                                    列出已连接设备
+#     python cli.py --device 设备名或序列号 --swiper                   用默认方案运行滑动器
+#     python cli.py --device 序列号 --profile 方案名 --swiper --hunter --duration 3600
+#
+import argparse
+import signal
+import sys
+import time
+from typing import Any, Dict, Optional, Sequence
+
+from config import DEFAULT_PROFILE_NAME, DEVICE_MAP, ID_TO_NAME, IMAGE_FOLDER_SWIPER
+from core.adb_controller import AdbController
+from core.adb_shell import close_all_shell_sessions
+from core.device_info import DEVICE_INFO
+from core.device_watcher import DeviceWatcher
+from core.events import EventLoop
+from core.image_detector import ImageDetector
+from core.image_hunter import ImageHunter
+from core.input_backends import close_all_input_backends, release_device
+from core.profiles import complete_profile, load_profiles
+from core.swipe_controller import HumanSwipeController
+from core.swipe_runner import SwipeRunner
+from utils.helpers import find_adb, get_connected_devices
+from utils.log_store import LOG_STORE, RotatingJsonlSink, format_record
+from utils.metrics import METRICS, format_snapshot
+from utils.recorder import RECORDER
+from utils.task_pool import TASK_POOL
+
+
+def log(message: str):
+    """与图形界面相同：写入日志存储 (及滚动日志文件)，并输出到终端。"""
+    record = LOG_STORE.append(message)
+    print(format_record(record), flush=True)
+
+
+def resolve_device(device: str) -> str:
+    """设备名 (config.DEVICE_MAP 中的键) 转换为序列号；其余按序列号原样返回。"""
+    return DEVICE_MAP.get(device, device)
+
+
+class HeadlessSession:
+    """一台设备上的滑动器/狩猎器组合，信号全部投递到命令行事件循环中处理。"""
+
+    def __init__(self, loop: EventLoop, adb_path: str, serial: str, window_title: str, profile: Dict[str, Any]):
+        self.loop = loop
+        self.adb_path = adb_path
+        self.serial = serial
+        self.window_title = window_title
+        self.profile = profile
+
+        self.swipe_controller = HumanSwipeController(adb_path, serial)
+        self.click_controller = AdbController(adb_path)
+        self.detector = ImageDetector(IMAGE_FOLDER_SWIPER)
+        self.runner = SwipeRunner(self.swipe_controller, self.detector, loop)
+        self.hunter = ImageHunter(self.click_controller)
+        self.watcher = DeviceWatcher(adb_path)
+        self.workers = set()
+        self._online = True
+
+        for source in (self.runner, self.hunter, self.watcher):
+            source.log_message.connect(log)
+        self.runner.stopped.connect(loop.bind(lambda: self._on_worker_stopped("swiper")))
+        self.hunter.stopped.connect(loop.bind(lambda: self._on_worker_stopped("hunter")))
+        self.detector.interrupt_requested.connect(loop.bind(self.runner.interrupt_countdown))
+        self.watcher.device_added.connect(loop.bind(lambda dev, state: self._on_presence(dev, state == "device")))
+        self.watcher.device_state_changed.connect(loop.bind(lambda dev, state: self._on_presence(dev, state == "device")))
+        self.watcher.device_removed.connect(loop.bind(lambda dev: self._on_presence(dev, False)))
+
+    def start(self, swiper: bool, hunter: bool) -> bool:
+        """在事件循环线程中调用。返回 False 表示没有任何工作成功启动。"""
+        try:
+            DEVICE_INFO.get(self.adb_path, self.serial)
+        except Exception as e:
+            log(f"读取设备信息失败，使用默认分辨率: {e}")
+        self.click_controller.set_device(self.serial)
+        width, height = self.swipe_controller.update_device_size()
+        log(f"目标设备 {self.serial} ({width}x{height})，目标窗口 '{self.window_title}'")
+        self.watcher.start()
+        self.detector.start()
+
+        if swiper:
+            config = self.profile["swiper"]
+            self.detector.confidence = config.get("confidence", 0.8)
+            self.detector.pyramid = config.get("pyramid_enabled", False)
+            self.detector.change_gate.threshold = config.get("change_threshold", 8.0)
+            if config.get("detection_enabled", False):
+                self.detector.enable(self.window_title)
+                log(f"[滑动器] P1图像检测已启用 (可信度: {self.detector.confidence:.2f})")
+            self.workers.add("swiper")
+            self.runner.start(config, self.window_title)
+        if hunter:
+            self.hunter.start(self.profile["hunter"], self.window_title)
+            if self.hunter._thread is not None:
+                self.workers.add("hunter")
+        return bool(self.workers)
+
+    def stop(self):
+        self.runner.stop()
+        self.hunter.stop()
+        self.detector.stop()
+        self.watcher.stop()
+
+    def _on_worker_stopped(self, name: str):
+        self.workers.discard(name)
+        if not self.workers:
+            log("所有任务均已停止。")
+            self.loop.stop()
+
+    def _on_presence(self, dev: str, online: bool):
+        if dev != self.serial or online == self._online:
+            return
+        self._online = online
+        if online:
+            log(f"设备 {self.serial} 已重新连接，恢复运行。")
+        else:
+            # 与图形界面一致：连接已失效，重新连接后自动重建
+            TASK_POOL.submit("释放设备连接", release_device, dev)
+            log(f"设备 {self.serial} 已断开，滑动器/狩猎器暂停，等待重新连接...")
+        self.runner.set_device_online(online)
+        self.hunter.set_device_online(online)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="无界面运行滑动器/狩猎器")
+    parser.add_argument("--device", help="设备名 (config.DEVICE_MAP) 或 adb 序列号")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE_NAME, help="配置方案名称")
+    parser.add_argument("--swiper", action="store_true", help="运行滑动器 (P1)")
+    parser.add_argument("--hunter", action="store_true", help="运行狩猎器 (P2)")
+    parser.add_argument("--window", help="投屏窗口标题，默认与图形界面相同，取设备名")
+    parser.add_argument("--duration", type=float, default=None, help="运行指定秒数后退出")
+    parser.add_argument("--record", action="store_true", help="同时录制会话 (见 bench/replay_session.py)")
+    parser.add_argument("--no-log-file", action="store_true", help="不写滚动日志文件")
+    parser.add_argument("--list-profiles", action="store_true", help="列出配置方案后退出")
+    parser.add_argument("--list-devices", action="store_true", help="列出已连接设备后退出")
+    args = parser.parse_args(argv)
+
+    adb_path = find_adb() or "adb"
+    profiles = load_profiles()
+    if args.list_profiles:
+        for name in sorted(profiles):
+            print(name)
+        return 0
+    if args.list_devices:
+        for serial in get_connected_devices(adb_path):
+            print(f"{serial}\t{ID_TO_NAME.get(serial, '')}")
+        return 0
+    if not args.device:
+        parser.error("需要指定 --device")
+    if not (args.swiper or args.hunter):
+        parser.error("至少需要指定 --swiper 或 --hunter 之一")
+    if args.profile not in profiles:
+        parser.error(f"配置方案 '{args.profile}' 不存在，可用: {', '.join(sorted(profiles))}")
+
+    serial = resolve_device(args.device)
+    window_title = args.window or ID_TO_NAME.get(serial, args.device)
+    if not args.no_log_file and LOG_STORE.sink is None:
+        LOG_STORE.sink = RotatingJsonlSink()
+
+    loop = EventLoop()
+    session = HeadlessSession(loop, adb_path, serial, window_title, complete_profile(profiles[args.profile]))
+    exit_code = 0
+
+    def start():
+        nonlocal exit_code
+        if args.record:
+            log(f"开始录制会话: {RECORDER.start()}")
+        if not session.start(args.swiper, args.hunter):
+            exit_code = 1
+            loop.stop()
+        elif args.duration:
+            loop.call_later(args.duration, shutdown, "已到达运行时长")
+
+    def shutdown(reason: str):
+        log(f"正在退出 ({reason})...")
+        loop.stop()
+
+    # 信号处理函数在主线程 (即事件循环线程) 中执行，只投递退出请求
+    signal.signal(signal.SIGINT, lambda *_: loop.post(shutdown, "收到中断信号"))
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, lambda *_: loop.post(shutdown, "收到终止信号"))
+
+    started = time.monotonic()
+    loop.post(start)
+    try:
+        loop.run()
+    finally:
+        session.stop()
+        RECORDER.stop()
+        snapshot = METRICS.snapshot()
+        if snapshot["counters"] or snapshot["histograms"]:
+            print(format_snapshot(snapshot))
+        log(f"运行 {time.monotonic() - started:.0f} 秒后退出。")
+        TASK_POOL.shutdown()
+        LOG_STORE.close()
+        close_all_input_backends()
+        close_all_shell_sessions()
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -28,12 +28,20 @@ POSSIBLE_ADB_PATHS = [
 # 3. (V2) 统一的资源文件夹和配置文件
 BASE_CONFIG_FOLDER = Path(r"C:\lww1")
 CONFIG_FILE_COMBINED = BASE_CONFIG_FOLDER / "combined_profiles.json"
+DEVICE_INFO_FILE = BASE_CONFIG_FOLDER / "device_info.json"
+LOG_FOLDER = BASE_CONFIG_FOLDER / "logs"
+SESSION_FOLDER = BASE_CONFIG_FOLDER / "sessions"  # 录制的回放会话
 IMAGE_FOLDER_SWIPER = BASE_CONFIG_FOLDER
 IMAGE_FOLDER_HUNTER = BASE_CONFIG_FOLDER
 IMAGE_FOLDER_SWIPER_GATE = BASE_CONFIG_FOLDER / "e"
 DEFAULT_PROFILE_NAME = "默认用户"
 
-# 4. 隐藏 subprocess 窗口 (共享)
+# 4. ADB server 地址 (协议客户端直接连接，失败时退回启动 adb 进程)
+USE_NATIVE_ADB_CLIENT = True
+ADB_SERVER_HOST = "127.0.0.1"
+ADB_SERVER_PORT = int(os.environ.get("ANDROID_ADB_SERVER_PORT", "5037"))
+
+# 5. 隐藏 subprocess 窗口 (共享)
 if os.name == "nt":
     import subprocess
 
@@ -45,3 +53,39 @@ if os.name == "nt":
         si = None
 else:
     si = None
+
+# 6. 输入注入后端 (按设备选择)
+# "shell": 常驻 adb shell 中执行 input 命令 (默认，所有设备可用)
+# "server": 设备端常驻注入服务，通过 adb forward 的 socket 直接发送事件，
+#           服务源码在 server/ 下，用 python -m server.build 构建到 INJECT_SERVER_JAR；不可用时自动退回 "shell"
+# "sendevent": 直接向触摸屏 /dev/input/eventN 写原始事件 (需要 shell 用户对该节点有写权限)，
+#              首次使用时探测一次触摸屏参数并缓存；探测失败时自动退回 "shell"
+INJECT_SERVER_JAR = BASE_CONFIG_FOLDER / "swipe-inject-server.jar"
+DEFAULT_INPUT_BACKEND = "shell"
+INPUT_BACKEND_BY_DEVICE = {
+    # "mn85nrjbzlov4pjz": "server",
+}
+
+# 7. 运行指标 (计数器/延迟直方图，开销很低，默认开启)
+METRICS_ENABLED = True
+METRICS_PANEL_REFRESH_MS = 2000  # 性能统计面板刷新间隔
+
+# 8. 日志
+LOG_RING_SIZE = 5000  # 内存中保留的最近日志条数
+LOG_VIEW_MAX_BLOCKS = 2000  # 日志窗口最多显示的行数，超出后自动丢弃最早的行
+LOG_FLUSH_INTERVAL_MS = 200  # 日志窗口批量刷新间隔
+LOG_MAX_BYTES = 5 * 1024 * 1024  # 单个 JSONL 日志文件上限，超出后滚动
+LOG_BACKUP_COUNT = 5
+
+# 9. 窗口跟踪 (按标题找到窗口后缓存句柄和客户区位置，只在移动/缩放/最小化时重新读取)
+WINDOW_MISSING_RECHECK_S = 0.5  # 找不到窗口时，该时间内不再重复按标题查找
+WINDOW_GEOMETRY_RECHECK_S = 5.0  # 即使没有收到变化通知，也每隔该时间重新读取一次位置
+
+# 10. 模板匹配模式 (按模板设置："color" 彩色 / "gray" 灰度 / "edge" Canny 边缘图)
+# 设置方法：文件名加后缀 (如 "确认@gray.png"、"图标@edge.png")，
+#          或在 a/b/c/d/e 等模板文件夹中放置 MATCH_MODE_SIDECAR: {"确认.png": "gray", "*": "edge"}
+#          ("*" 为该文件夹的默认模式；文件名后缀优先于配置文件)
+MATCH_MODE_SIDECAR = "match_modes.json"
+EDGE_CANNY_LOW = 50
+EDGE_CANNY_HIGH = 150
+EDGE_DILATE = 3  # 边缘图膨胀核大小 (像素)，容忍 1 像素左右的错位；0 表示不膨胀
@@ -4,13 +4,13 @@
 #        全功能控制器 - 基础ADB控制器模块 (P2核心)
 #
 # =======================================================================
-import subprocess
 import random
-import re
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 
-from config import ID_TO_NAME, si
+from config import ID_TO_NAME
 from utils.helpers import run_adb
+from .device_info import DEVICE_INFO, display_size
+from .input_backends import InputBackend, get_input_backend
 
 
 class AdbController:
@@ -30,48 +30,45 @@ class AdbController:
         except Exception:
             return {}
 
-    def set_device(self, device_id: str):
+    def set_device(self, device_id: str, size: Optional[Tuple[int, int]] = None):
+        """切换目标设备；给出 size 时直接使用 (不查询设备信息，不会阻塞)。"""
         self.device_id = device_id
-        self._update_device_size()
+        if size is not None:
+            self.width, self.height = size
+        else:
+            self._update_device_size()
 
     def _base_cmd(self) -> List[str]:
         if not self.device_id:
             raise ValueError("未设置目标设备")
         return [self.adb, "-s", self.device_id]
 
+    def _input(self) -> InputBackend:
+        # 具体实现 (input 命令 / 注入服务) 按设备在 config.INPUT_BACKEND_BY_DEVICE 中选择
+        if not self.device_id:
+            raise ValueError("未设置目标设备")
+        return get_input_backend(self.adb, self.device_id)
+
     def _update_device_size(self):
         try:
-            out = subprocess.run(
-                self._base_cmd() + ["shell", "wm", "size"],
-                stdout=subprocess.PIPE,
-                text=True,
-                timeout=3.0,
-                startupinfo=si,
-            ).stdout.strip()
-            m = re.search(r"(\d+)\s*x\s*(\d+)", out)
-            if m:
-                self.width, self.height = int(m.group(1)), int(m.group(2))
+            # 分辨率来自按设备缓存的设备信息，切换设备时通常不需要再查询
+            self.width, self.height = display_size(DEVICE_INFO.get(self.adb, self.device_id))
+        except Exception:
+            pass
+
+    def sync_orientation(self, landscape: bool):
+        """截图窗口的横竖方向与缓存不一致时 (设备旋转) 刷新分辨率。"""
+        if not self.device_id:
+            return
+        try:
+            info = DEVICE_INFO.check_orientation(self.adb, self.device_id, landscape)
+            self.width, self.height = display_size(info)
         except Exception:
             pass
 
     def human_click_at_coords(self, phone_x: int, phone_y: int):
         duration = random.randint(40, 90)
-        cmd = self._base_cmd() + [
-            "shell",
-            "input",
-            "swipe",
-            str(phone_x),
-            str(phone_y),
-            str(phone_x),
-            str(phone_y),
-            str(duration),
-        ]
-        subprocess.run(
-            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, startupinfo=si
-        )
+        self._input().tap(phone_x, phone_y, duration)
 
     def human_click_back(self):
-        cmd = self._base_cmd() + ["shell", "input", "keyevent", "4"]
-        subprocess.run(
-            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, startupinfo=si
-        )
+        self._input().key(4)
@@ -0,0 +1,249 @@
+# core/adb_shell.py
+# =======================================================================
+#
+#        全功能控制器 - 常驻 ADB Shell 会话模块
+#        每台设备保持一个 `adb shell` 进程，命令通过 stdin 发送，避免每次点击都新建进程
+#
+# =======================================================================
+import itertools
+import queue
+import subprocess
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, Optional, Tuple
+
+from config import si
+from utils.metrics import METRICS
+
+# 命令队列上限：超过后 submit 会等待，避免设备卡死时无限堆积
+SHELL_QUEUE_SIZE = 64
+DEFAULT_COMMAND_TIMEOUT = 5.0
+
+
+class ShellCommandNotSent(RuntimeError):
+    """命令没有写入 shell (进程无法启动、队列已满或会话已关闭)，设备上肯定没有执行，可以换一种方式重试。"""
+
+
+class AdbShellSession:
+    """
+    单台设备的常驻 shell 会话。
+    每条命令后追加一行 `echo <标记> $?`，读到标记即认为命令完成，同时拿到退出码。
+    进程意外退出或命令超时时会被结束，下一条命令自动重新连接。
+    """
+
+    def __init__(self, adb_path: str, serial: str, queue_size: int = SHELL_QUEUE_SIZE):
+        self.adb = adb_path
+        self.serial = serial
+        self._queue: "queue.Queue[Optional[Tuple[str, float, Future]]]" = queue.Queue(
+            maxsize=queue_size
+        )
+        self._lines: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._proc: Optional[subprocess.Popen] = None
+        self._spawned = False
+        self._marker_ids = itertools.count(1)
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self.commands = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.reconnects = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_latency = 0.0
+        self._worker = threading.Thread(
+            target=self._work, daemon=True, name=f"AdbShell[{serial}]"
+        )
+        self._worker.start()
+
+    # ---------- 对外接口 ----------
+    def submit(self, command: str, timeout: float = DEFAULT_COMMAND_TIMEOUT) -> Future:
+        """把命令放入队列，返回 Future，结果为 (退出码, 输出)。"""
+        if self._closed:
+            raise ShellCommandNotSent("ADB shell 会话已关闭")
+        future: Future = Future()
+        try:
+            self._queue.put((command, timeout, future), timeout=timeout)
+        except queue.Full:
+            raise ShellCommandNotSent(f"ADB shell 命令队列已满: {command}")
+        return future
+
+    def run(
+        self, command: str, timeout: float = DEFAULT_COMMAND_TIMEOUT
+    ) -> Tuple[int, str]:
+        # 额外留出排队时间
+        return self.submit(command, timeout).result(timeout=timeout * 2 + 1.0)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        # 还在排队的命令不再执行 (调用方可能已经放弃等待)，以 ShellCommandNotSent 结束
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None and item[2].set_running_or_notify_cancel():
+                item[2].set_exception(ShellCommandNotSent("ADB shell 会话已关闭"))
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._kill()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            ok = self.commands - self.errors
+            return {
+                "serial": self.serial,
+                "commands": self.commands,
+                "errors": self.errors,
+                "timeouts": self.timeouts,
+                "reconnects": self.reconnects,
+                "queued": self._queue.qsize(),
+                "avg_ms": (self.total_latency / ok * 1000) if ok > 0 else 0.0,
+                "max_ms": self.max_latency * 1000,
+                "last_ms": self.last_latency * 1000,
+            }
+
+    # ---------- 内部实现 ----------
+    def _ensure_process(self):
+        if self._proc is not None and self._proc.poll() is None:
+            return
+        if self._spawned:
+            self.reconnects += 1
+        self._spawned = True
+        self._lines = queue.Queue()
+        self._proc = subprocess.Popen(
+            [self.adb, "-s", self.serial, "shell"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            startupinfo=si,
+            text=True,
+            encoding="utf-8",
+            errors="ignore",
+            bufsize=1,
+        )
+        threading.Thread(
+            target=self._read_output,
+            args=(self._proc, self._lines),
+            daemon=True,
+            name=f"AdbShellReader[{self.serial}]",
+        ).start()
+
+    @staticmethod
+    def _read_output(proc: subprocess.Popen, lines: "queue.Queue[Optional[str]]"):
+        try:
+            for line in proc.stdout:
+                lines.put(line)
+        except Exception:
+            pass
+        lines.put(None)  # 进程已退出
+
+    def _kill(self):
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            proc.kill()
+            proc.wait(timeout=1.0)
+        except Exception:
+            pass
+
+    def _execute(self, command: str, timeout: float) -> Tuple[int, str]:
+        try:
+            self._ensure_process()
+        except OSError as e:
+            raise ShellCommandNotSent(f"无法启动 adb shell: {e}")
+        marker = f"__ADB_SHELL_DONE_{next(self._marker_ids)}__"
+        self._proc.stdin.write(f"{command}\necho {marker} $?\n")
+        self._proc.stdin.flush()
+
+        output = []
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"命令超时 ({timeout:.1f}s): {command}")
+            try:
+                line = self._lines.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if line is None:
+                raise ConnectionError("adb shell 进程已退出")
+            pos = line.find(marker)
+            if pos < 0:
+                output.append(line)
+                continue
+            # 命令输出末尾没有换行时，标记会和输出在同一行
+            output.append(line[:pos])
+            try:
+                code = int(line[pos + len(marker) :].strip() or 0)
+            except ValueError:
+                code = -1
+            return code, "".join(output)
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            command, timeout, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            started = time.monotonic()
+            try:
+                result = self._execute(command, timeout)
+            except Exception as e:
+                # 超时或断开：结束当前进程，下一条命令会自动重连
+                self._kill()
+                with self._stats_lock:
+                    self.commands += 1
+                    self.errors += 1
+                    if isinstance(e, TimeoutError):
+                        self.timeouts += 1
+                METRICS.inc("adb_shell_errors", device=self.serial)
+                future.set_exception(e)
+                continue
+            latency = time.monotonic() - started
+            with self._stats_lock:
+                self.commands += 1
+                self.total_latency += latency
+                self.max_latency = max(self.max_latency, latency)
+                self.last_latency = latency
+            METRICS.observe("adb_shell_ms", latency * 1000.0, device=self.serial)
+            future.set_result(result)
+        self._kill()
+
+
+_sessions: Dict[Tuple[str, str], AdbShellSession] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_shell_session(adb_path: str, serial: str) -> AdbShellSession:
+    """返回 (并按需创建) 该设备共享的常驻 shell 会话。"""
+    key = (adb_path, serial)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None or session._closed:
+            session = AdbShellSession(adb_path, serial)
+            _sessions[key] = session
+        return session
+
+
+def close_shell_session(serial: str):
+    with _sessions_lock:
+        keys = [key for key in _sessions if key[1] == serial]
+        sessions = [_sessions.pop(key) for key in keys]
+    for session in sessions:
+        session.close()
+
+
+def close_all_shell_sessions():
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
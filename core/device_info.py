@@ -0,0 +1,184 @@
+# core/device_info.py
+# =======================================================================
+#
+#        全功能控制器 - 设备信息缓存模块
+#        按序列号缓存分辨率、密度、方向、系统版本和 motionevent 支持情况，
+#        一次 shell 往返取齐，持久化到 device_info.json，仅在旋转或重新连接后刷新
+#
+# =======================================================================
+import json
+import re
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+from config import BASE_CONFIG_FOLDER, DEVICE_INFO_FILE
+from utils.helpers import run_adb
+from .adb_shell import get_shell_session
+
+DEFAULT_SIZE = (1080, 2400)
+# 窗口方向与缓存不一致时，两次重新查询之间的最短间隔 (秒)，避免非常规窗口比例导致反复查询
+ORIENTATION_RECHECK_INTERVAL = 5.0
+
+DeviceInfo = namedtuple(
+    "DeviceInfo",
+    [
+        "serial",
+        "width",  # 自然方向 (竖屏) 下的物理分辨率
+        "height",
+        "density",
+        "rotation",  # 0/1/2/3 对应 0/90/180/270 度
+        "sdk",
+        "release",
+        "motionevent",  # `input touchscreen motionevent` 是否可用 (Android 10+)
+        "fetched_at",
+    ],
+)
+
+
+def display_size(info: DeviceInfo) -> Tuple[int, int]:
+    """当前方向下的屏幕尺寸 (input 命令使用的坐标系)。"""
+    if info.rotation in (1, 3):
+        return info.height, info.width
+    return info.width, info.height
+
+
+_SEP = "__DEVICE_INFO_SEP__"
+_PROBE_COMMAND = "; ".join(
+    [
+        "wm size",
+        f"echo {_SEP}",
+        "wm density",
+        f"echo {_SEP}",
+        "dumpsys input | grep -m1 -E 'SurfaceOrientation|orientation='",
+        f"echo {_SEP}",
+        "getprop ro.build.version.sdk",
+        "getprop ro.build.version.release",
+        f"echo {_SEP}",
+        "input 2>&1 | grep -c motionevent",
+    ]
+)
+
+
+def parse_device_info(serial: str, output: str) -> DeviceInfo:
+    parts = (output.split(_SEP) + [""] * 5)[:5]
+    size_out, density_out, rotation_out, version_out, motion_out = parts
+
+    m = re.search(r"(\d+)\s*x\s*(\d+)", size_out)
+    if not m:
+        raise ValueError(f"无法读取设备分辨率: {size_out.strip()!r}")
+    width, height = int(m.group(1)), int(m.group(2))
+
+    m = re.search(r"(\d+)", density_out)
+    density = int(m.group(1)) if m else 0
+
+    rotation = 0
+    m = re.search(r"SurfaceOrientation:\s*(\d+)|orientation=(?:ROTATION_)?(\d+)", rotation_out)
+    if m:
+        value = int(m.group(1) or m.group(2))
+        rotation = value // 90 if value >= 90 else value % 4
+
+    version_lines = [line.strip() for line in version_out.splitlines() if line.strip()]
+    sdk = int(version_lines[0]) if version_lines and version_lines[0].isdigit() else 0
+    release = version_lines[1] if len(version_lines) > 1 else ""
+
+    m = re.search(r"(\d+)", motion_out)
+    motionevent = bool(m and int(m.group(1)) > 0) or sdk >= 29
+
+    return DeviceInfo(serial, width, height, density, rotation, sdk, release, motionevent, time.time())
+
+
+class DeviceInfoCache:
+    """
+    设备信息缓存 (线程安全)。
+    - get(): 有缓存直接返回，没有或已标记过期时执行一次批量查询 (失败且无旧数据时抛出异常)；
+    - invalidate(): 设备断开时调用，重新连接后的第一次 get() 会重新查询；
+    - check_orientation(): 截图窗口横竖与缓存方向不一致时刷新 (设备旋转)。
+    """
+
+    def __init__(self, path: Path = DEVICE_INFO_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._infos: Dict[str, DeviceInfo] = {}
+        self._stale: Set[str] = set()
+        # 序列号 -> 上次因方向不一致而重新查询的时间 (失败也记录，避免每次点击/滑动都阻塞查询)
+        self._orientation_attempts: Dict[str, float] = {}
+        self._loaded = False
+        self.fetches = 0
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for serial, fields in data.items():
+                self._infos[serial] = DeviceInfo(**fields)
+        except (OSError, ValueError, TypeError):
+            pass
+
+    def _save(self):
+        data = {serial: info._asdict() for serial, info in self._infos.items()}
+        try:
+            BASE_CONFIG_FOLDER.mkdir(exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=4, ensure_ascii=False)
+            tmp.replace(self.path)
+        except Exception as e:
+            print(f"[设备信息] 保存失败: {e}")
+
+    def _fetch(self, adb_path: str, serial: str) -> DeviceInfo:
+        self.fetches += 1
+        try:
+            _, out = get_shell_session(adb_path, serial).run(_PROBE_COMMAND, timeout=8.0)
+        except Exception:
+            out = run_adb(adb_path, ["-s", serial, "shell", _PROBE_COMMAND], timeout=8.0).stdout
+        return parse_device_info(serial, out)
+
+    def get(self, adb_path: str, serial: str, refresh: bool = False) -> DeviceInfo:
+        with self._lock:
+            self._load()
+            info = self._infos.get(serial)
+            if info is not None and not refresh and serial not in self._stale:
+                return info
+        try:
+            fetched = self._fetch(adb_path, serial)
+        except Exception:
+            if info is None:
+                raise
+            return info  # 查询失败时沿用旧数据
+        info = fetched
+        with self._lock:
+            self._infos[serial] = info
+            self._stale.discard(serial)
+            self._save()
+        return info
+
+    def peek(self, serial: str) -> Optional[DeviceInfo]:
+        with self._lock:
+            self._load()
+            return self._infos.get(serial)
+
+    def invalidate(self, serial: str):
+        with self._lock:
+            self._stale.add(serial)
+
+    def check_orientation(self, adb_path: str, serial: str, landscape: bool) -> DeviceInfo:
+        info = self.get(adb_path, serial)
+        width, height = display_size(info)
+        if (width > height) == landscape:
+            return info
+        now = time.time()
+        with self._lock:
+            last = max(info.fetched_at, self._orientation_attempts.get(serial, 0.0))
+            if now - last <= ORIENTATION_RECHECK_INTERVAL:
+                return info
+            self._orientation_attempts[serial] = now
+        return self.get(adb_path, serial, refresh=True)
+
+
+DEVICE_INFO = DeviceInfoCache()
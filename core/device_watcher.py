@@ -0,0 +1,101 @@
+# core/device_watcher.py
+# =======================================================================
+#
+#        全功能控制器 - 设备热插拔监听模块
+#        后台订阅 adb server 的 host:track-devices，把设备增减/状态变化以增量信号发出
+#
+# =======================================================================
+import threading
+from typing import Dict, Optional
+
+from config import USE_NATIVE_ADB_CLIENT
+from utils.adb_client import AdbClientError, DeviceTracker, get_adb_client
+from utils.helpers import get_connected_devices, run_adb
+from .events import Signal
+
+# server 不可用或连接断开后的重试间隔 (秒)
+RECONNECT_INTERVAL = 2.0
+# 未启用协议客户端时退回定时执行 adb devices 的间隔 (秒)
+POLL_INTERVAL = 3.0
+
+
+class DeviceWatcher:
+    """
+    设备列表监听器。信号均从后台线程发出，界面需要通过事件循环的 bind() 连接。
+    state 与 `adb devices` 一致："device" 表示可用，其余 (offline/unauthorized...) 视为不可用。
+    """
+
+    device_added = Signal(str, str)  # serial, state
+    device_removed = Signal(str)  # serial
+    device_state_changed = Signal(str, str)  # serial, new state
+    log_message = Signal(str)
+
+    def __init__(self, adb_path: str):
+        self.adb = adb_path
+        self.devices: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._tracker: Optional[DeviceTracker] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="DeviceWatcher")
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        tracker = self._tracker
+        if tracker is not None:
+            tracker.close()  # 让阻塞中的 read() 立即返回
+
+    def snapshot(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self.devices)
+
+    def is_online(self, serial: Optional[str]) -> bool:
+        with self._lock:
+            return bool(serial) and self.devices.get(serial) == "device"
+
+    def _apply(self, current: Dict[str, str]):
+        """与上一次的设备列表比较，只发出有变化的部分。"""
+        with self._lock:
+            previous, self.devices = self.devices, dict(current)
+        for serial in previous.keys() - current.keys():
+            self.device_removed.emit(serial)
+        for serial, state in current.items():
+            if serial not in previous:
+                self.device_added.emit(serial, state)
+            elif previous[serial] != state:
+                self.device_state_changed.emit(serial, state)
+
+    def _loop(self):
+        failing = False
+        while not self._stop_event.is_set():
+            if not USE_NATIVE_ADB_CLIENT:
+                self._apply({serial: "device" for serial in get_connected_devices(self.adb)})
+                self._stop_event.wait(POLL_INTERVAL)
+                continue
+            try:
+                self._tracker = get_adb_client().track_devices()
+                while not self._stop_event.is_set():
+                    self._apply(self._tracker.read())
+                    failing = False
+            except (AdbClientError, ConnectionError, OSError) as e:
+                if self._stop_event.is_set():
+                    break
+                if not failing:
+                    self.log_message.emit(f"[设备监听] 与 adb server 的连接中断，将自动重试: {e}")
+                failing = True
+                try:
+                    # server 未运行时由 adb 命令行负责拉起
+                    run_adb(self.adb, ["start-server"], timeout=10.0)
+                except Exception:
+                    pass
+                self._stop_event.wait(RECONNECT_INTERVAL)
+            finally:
+                if self._tracker is not None:
+                    self._tracker.close()
+                    self._tracker = None
@@ -0,0 +1,175 @@
+# core/events.py
+# =======================================================================
+#
+#        全功能控制器 - 事件/回调层 (不依赖 Qt)
+#        Signal 的声明和用法与 pyqtSignal 相同；EventLoop 提供投递与定时回调，
+#        图形界面 (ui/qt_bridge.py) 和命令行 (cli.py) 各自提供一个事件循环
+#
+# =======================================================================
+import heapq
+import itertools
+import threading
+import time
+import traceback
+from typing import Any, Callable, List, Optional
+
+# 空闲时单次等待的上限 (秒)：让主线程定期返回解释器，Ctrl+C 等信号处理函数得以执行
+_MAX_IDLE_WAIT = 0.5
+
+
+class BoundSignal:
+    """某个对象上的信号实例。emit() 在调用线程中同步执行所有槽函数。"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._slots: List[Callable[..., Any]] = []
+
+    def connect(self, slot: Callable[..., Any]):
+        with self._lock:
+            self._slots = self._slots + [slot]
+
+    def disconnect(self, slot: Optional[Callable[..., Any]] = None):
+        with self._lock:
+            self._slots = [] if slot is None else [s for s in self._slots if s != slot]
+
+    def emit(self, *args: Any):
+        for slot in self._slots:
+            try:
+                slot(*args)
+            except Exception:
+                # 与 Qt 一致：槽函数的异常只打印，不影响发出信号的一方
+                traceback.print_exc()
+
+
+class Signal:
+    """
+    类属性形式声明的信号，每个实例各有一份连接列表：
+        class Worker:
+            log_message = Signal(str)
+    参数类型只用于说明，不做检查。
+    """
+
+    def __init__(self, *types: type):
+        self.types = types
+        self.name = ""
+
+    def __set_name__(self, owner: type, name: str):
+        self.name = name
+
+    def __get__(self, obj: Any, objtype: Optional[type] = None):
+        if obj is None:
+            return self
+        bound = obj.__dict__.get(self.name)
+        if bound is None:
+            bound = obj.__dict__.setdefault(self.name, BoundSignal(self.name))
+        return bound
+
+
+class TimerHandle:
+    """call_later() 的返回值，cancel() 后回调不再执行。"""
+
+    __slots__ = ("fn", "args", "cancelled")
+
+    def __init__(self, fn: Callable[..., Any], args: tuple):
+        self.fn = fn
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        if not self.cancelled:
+            self.fn(*self.args)
+
+
+class EventLoop:
+    """
+    单线程事件循环。post()/call_later() 可以在任意线程调用，回调总在循环线程中执行，
+    相当于 Qt 的排队连接；bind(slot) 返回一个把调用投递到本循环的函数，可直接 connect 到 Signal。
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._queue: List[tuple] = []
+        self._seq = itertools.count()
+        self._running = False
+        self._thread_id: Optional[int] = None
+
+    def call_later(self, delay: float, fn: Callable[..., Any], *args: Any) -> TimerHandle:
+        handle = TimerHandle(fn, args)
+        with self._cond:
+            heapq.heappush(self._queue, (time.monotonic() + max(0.0, delay), next(self._seq), handle))
+            self._cond.notify()
+        return handle
+
+    def post(self, fn: Callable[..., Any], *args: Any) -> TimerHandle:
+        return self.call_later(0.0, fn, *args)
+
+    def bind(self, slot: Callable[..., Any]) -> Callable[..., None]:
+        return lambda *args: self.post(slot, *args)
+
+    def in_loop_thread(self) -> bool:
+        return threading.get_ident() == self._thread_id
+
+    def run(self):
+        """在当前线程运行，直到 stop()。"""
+        self._thread_id = threading.get_ident()
+        with self._cond:
+            self._running = True
+        while True:
+            with self._cond:
+                while self._running:
+                    now = time.monotonic()
+                    if self._queue and self._queue[0][0] <= now:
+                        handle = heapq.heappop(self._queue)[2]
+                        break
+                    self._cond.wait(min(self._queue[0][0] - now, _MAX_IDLE_WAIT) if self._queue else _MAX_IDLE_WAIT)
+                else:
+                    return
+            try:
+                handle.run()
+            except Exception:
+                traceback.print_exc()
+
+    def start(self) -> threading.Thread:
+        """在后台线程中运行。"""
+        thread = threading.Thread(target=self.run, daemon=True, name="EventLoop")
+        thread.start()
+        return thread
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+
+class Timer:
+    """
+    周期定时器 (对应 QTimer 的常用部分)，回调在所属事件循环中执行。
+    start()/stop() 应在事件循环线程中调用。
+    """
+
+    def __init__(self, loop: "EventLoop", interval_ms: int, callback: Callable[[], Any]):
+        self.loop = loop
+        self.interval_ms = interval_ms
+        self.callback = callback
+        self._handle: Optional[TimerHandle] = None
+
+    def start(self):
+        self.stop()
+        self._handle = self.loop.call_later(self.interval_ms / 1000.0, self._tick)
+
+    def stop(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def is_active(self) -> bool:
+        return self._handle is not None
+
+    def _tick(self):
+        # 先安排下一次，回调里调用 stop() 时会一并取消
+        self._handle = self.loop.call_later(self.interval_ms / 1000.0, self._tick)
+        self.callback()
@@ -0,0 +1,58 @@
+# core/hunter_priority.py
+# =======================================================================
+#
+#        全功能控制器 - 狩猎器优先级匹配 (不依赖 Qt，可在离线基准测试中直接调用)
+#
+# =======================================================================
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.matcher import TemplateMatcher
+from utils.vision import Box, PreparedFrame
+
+# 子文件夹 -> 动作，字典顺序即优先级
+ACTION_FOLDERS = {
+    "a": "a_click",
+    "b": "b_back",
+    "c": "c_reserved",
+    "d": "d_reserved",
+}
+
+PriorityOrder = List[Tuple[str, str]]
+
+
+def build_priority_order(images_by_action: Dict[str, Sequence[str]]) -> PriorityOrder:
+    """优先检测A类 (按文件名排序)，然后依次是 B/C/D 类。返回 [(模板路径, 动作), ...]。"""
+    order = [
+        (path, "a_click")
+        for path in sorted(images_by_action.get("a_click", []), key=lambda p: Path(p).name)
+    ]
+    for action_key in ["b_back", "c_reserved", "d_reserved"]:
+        order += [(path, action_key) for path in images_by_action.get(action_key, [])]
+    return order
+
+
+def find_priority_match(
+    matcher: TemplateMatcher,
+    frame: np.ndarray,
+    order: PriorityOrder,
+    confidence: float,
+    region: Optional[Tuple[int, int, int, int]] = None,
+    pyramid: bool = False,
+) -> Optional[Tuple[Box, str, str]]:
+    """返回优先级最高的命中 (Box, 模板路径, 动作)，没有命中时返回 None。"""
+    # A/B/C/D 所有模板都与同一帧匹配，缩放等派生视图也只计算一次
+    prepared = PreparedFrame(frame)
+    hit = matcher.find_first(
+        prepared,
+        [path for path, _ in order],
+        confidence=confidence,
+        region=region,
+        pyramid=pyramid,
+    )
+    if hit is None:
+        return None
+    index, box = hit
+    return box, order[index][0], order[index][1]
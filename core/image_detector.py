@@ -7,24 +7,30 @@
 import threading
 import time
 from pathlib import Path
+from typing import Optional
 
-from PyQt6.QtCore import QObject, pyqtSignal
+from utils.frame_bus import FRAME_BUS, FrameSubscription
+from utils.frame_change import FrameChangeGate
+from utils.matcher import TemplateMatcher
+from utils.recorder import RECORDER, describe_match
+from utils.vision import PreparedFrame
+from .events import Signal
 
-from utils.helpers import get_window_region, find_image_with_opencv
 
-
-class ImageDetector(QObject):
-    status_updated = pyqtSignal(bool)
-    interrupt_requested = pyqtSignal()
+class ImageDetector:
+    status_updated = Signal(bool)
+    interrupt_requested = Signal()
 
     def __init__(self, folder: Path, poll_interval=1.5):
-        super().__init__()
         self.folder = folder
         self._running = threading.Event()
         self._stop = threading.Event()
         self.found_event = threading.Event()
         self.poll_interval = poll_interval
         self.confidence = 0.8
+        self.pyramid = False
+        self.matcher = TemplateMatcher()
+        self.change_gate = FrameChangeGate()
         self.target_window_title = ""
         self._thread = None
 
@@ -38,6 +44,7 @@ class ImageDetector(QObject):
 
     def enable(self, window_title: str):
         self.target_window_title = window_title
+        self.change_gate.reset()
         self._running.set()
 
     def stop(self):
@@ -48,41 +55,79 @@ class ImageDetector(QObject):
 
     def disable(self):
         self._running.clear()
+        self.change_gate.reset()
         self.found_event.clear()
         self.status_updated.emit(False)
 
     def _loop(self):
         if not self.folder.is_dir():
-            self.stop()
+            # 不能在检测线程里调用 stop() (join 自身会抛异常)
+            self._stop.set()
             return
 
-        while not self._stop.is_set():
-            if not self._running.is_set() or not self.target_window_title:
-                time.sleep(0.2)
-                continue
+        frames: Optional[FrameSubscription] = None
+        try:
+            while not self._stop.is_set():
+                if not self._running.is_set() or not self.target_window_title:
+                    if frames is not None:
+                        frames.close()
+                        frames = None
+                    time.sleep(0.2)
+                    continue
+
+                if frames is None or frames.window_title != self.target_window_title:
+                    if frames is not None:
+                        frames.close()
+                    frames = FRAME_BUS.subscribe(
+                        self.target_window_title, interval=self.poll_interval
+                    )
+
+                # 从共享帧总线取最新的、尚未处理过的帧
+                frame = frames.next_frame(timeout=self.poll_interval * 2)
+                if frame is None:
+                    continue
+
+                if frame.image is None:
+                    self.change_gate.reset()
+                    if self.found_event.is_set():
+                        self.found_event.clear()
+                        self.status_updated.emit(False)
+                    time.sleep(self.poll_interval)
+                    continue
+
+                paths = [str(p) for p in self.folder.glob("*.png") if p.exists()]
+                query = (tuple(paths), self.confidence, self.pyramid)
+                evaluated = self.change_gate.should_evaluate(frame.image, query)
+                hit = None
+                if evaluated:
+                    hit = self.matcher.find_first(
+                        PreparedFrame(frame.image),
+                        paths,
+                        confidence=self.confidence,
+                        region=frame.region,
+                        pyramid=self.pyramid,
+                    )
+                    found = hit is not None
+                else:
+                    # 画面没有变化，沿用上一次的检测结果
+                    found = self.found_event.is_set()
+                if RECORDER.active:
+                    RECORDER.record(
+                        "match", source="detector", window=self.target_window_title, seq=frame.seq,
+                        evaluated=evaluated, templates=RECORDER.record_templates("detector", [(p, "") for p in paths]),
+                        conf=self.confidence, pyramid=self.pyramid, change_threshold=self.change_gate.threshold,
+                        found=found, result=describe_match((hit[1], paths[hit[0]], "") if hit else None),
+                    )
 
-            region = get_window_region(self.target_window_title)
-            if region is None:
-                if self.found_event.is_set():
+                if found and not self.found_event.is_set():
+                    self.found_event.set()
+                    self.status_updated.emit(True)
+                    self.interrupt_requested.emit()
+                elif not found and self.found_event.is_set():
                     self.found_event.clear()
                     self.status_updated.emit(False)
-                time.sleep(self.poll_interval)
-                continue
-
-            found = any(
-                find_image_with_opencv(
-                    str(path), confidence=self.confidence, region=region
-                )
-                for path in self.folder.glob("*.png")
-                if path.exists()
-            )
 
-            if found and not self.found_event.is_set():
-                self.found_event.set()
-                self.status_updated.emit(True)
-                self.interrupt_requested.emit()
-            elif not found and self.found_event.is_set():
-                self.found_event.clear()
-                self.status_updated.emit(False)
-
-            time.sleep(self.poll_interval)
+                time.sleep(self.poll_interval)
+        finally:
+            if frames is not None:
+                frames.close()
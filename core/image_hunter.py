@@ -10,24 +10,35 @@ import time
 from pathlib import Path
 from typing import Dict, Any, Tuple, Optional, List
 
-from PyQt6.QtCore import QObject, pyqtSignal
-
+import numpy as np
 from config import IMAGE_FOLDER_HUNTER
-from utils.helpers import get_window_region, find_image_with_opencv
+from utils.frame_bus import FRAME_BUS, FrameSubscription
+from utils.frame_change import FrameChangeGate, DEFAULT_CHANGE_THRESHOLD
+from utils.matcher import TemplateMatcher
+from utils.metrics import METRICS
+from utils.recorder import RECORDER, describe_match
 from .adb_controller import AdbController
+from .events import Signal
+from .hunter_priority import ACTION_FOLDERS, build_priority_order, find_priority_match
 
 
-class ImageHunter(QObject):
-    log_message = pyqtSignal(str)
-    stopped = pyqtSignal()
-    started = pyqtSignal()
+class ImageHunter:
+    log_message = Signal(str)
+    stopped = Signal()
+    started = Signal()
 
     def __init__(self, controller: AdbController):
-        super().__init__()
         self.controller = controller
         self._stop_event = threading.Event()
         self._thread: Optional[threading.Thread] = None
         self.params: Dict[str, Any] = {}
+        self._frames: Optional[FrameSubscription] = None
+        self.matcher = TemplateMatcher()
+        self.change_gate = FrameChangeGate()
+        self._priority_order: List[Tuple[str, str]] = []
+        # 目标设备在线时置位 (由设备监听器更新)；清除时狩猎循环暂停
+        self._device_online = threading.Event()
+        self._device_online.set()
         self.target_images_by_action: Dict[str, List[str]] = {
             "a_click": [],
             "b_back": [],
@@ -36,13 +47,8 @@ class ImageHunter(QObject):
         }
 
     def _load_target_images(self):
-        base, action_map = IMAGE_FOLDER_HUNTER, {
-            "a": "a_click",
-            "b": "b_back",
-            "c": "c_reserved",
-            "d": "d_reserved",
-        }
-        for folder_name, action_key in action_map.items():
+        base = IMAGE_FOLDER_HUNTER
+        for folder_name, action_key in ACTION_FOLDERS.items():
             folder_path = base / folder_name
             if folder_path.is_dir():
                 images = [str(p) for p in folder_path.glob("*.png") if p.exists()]
@@ -67,6 +73,12 @@ class ImageHunter(QObject):
 
         self.params = params
         self.target_window_title = window_title
+        self._priority_order = build_priority_order(self.target_images_by_action)
+        self.change_gate.threshold = params.get(
+            "change_threshold", DEFAULT_CHANGE_THRESHOLD
+        )
+        self.change_gate.reset()
+        self._device_online.set()
         self._stop_event.clear()
         self._thread = threading.Thread(target=self._loop, daemon=True)
         self._thread.start()
@@ -76,37 +88,54 @@ class ImageHunter(QObject):
     def stop(self):
         self._stop_event.set()
         if self._thread:
+            st = self.matcher.stats()
+            self.log_message.emit(
+                f"[狩猎器] 累计局部搜索命中 {st['locality_hits']} 次，"
+                f"回退全窗口搜索 {st['fallbacks']} 次。"
+            )
+            gate = self.change_gate.stats()
+            self.log_message.emit(
+                f"[狩猎器] 画面静止跳过匹配 {gate['skipped']} 次，"
+                f"实际匹配 {gate['evaluated']} 次。"
+            )
             self.log_message.emit("[狩猎器] 狩猎模式已停止。")
             self._thread = None
         self.stopped.emit()
 
+    def set_device_online(self, online: bool):
+        if online == self._device_online.is_set():
+            return
+        if online:
+            self._device_online.set()
+        else:
+            self._device_online.clear()
+        if self._thread:
+            state = "已重新连接，恢复狩猎" if online else "已断开，狩猎暂停"
+            self.log_message.emit(f"[狩猎器] 目标设备{state}。")
+
+    def _wait_for_device(self):
+        """设备离线时阻塞，直到重新连接或狩猎被停止。"""
+        while not self._device_online.is_set() and not self._stop_event.is_set():
+            self._device_online.wait(0.5)
+
     def _find_priority_match(
-        self, region: Tuple[int, int, int, int]
+        self, frame: np.ndarray, region: Tuple[int, int, int, int]
     ) -> Optional[Tuple[Any, str, str]]:
-        conf = self.params.get("conf", 0.8)
-        # 优先检测A类
-        a_matches = [
-            (box, path)
-            for path in self.target_images_by_action["a_click"]
-            if (box := find_image_with_opencv(path, confidence=conf, region=region))
-        ]
-        if a_matches:
-            a_matches.sort(key=lambda m: Path(m[1]).name)  # 按文件名排序
-            return a_matches[0][0], a_matches[0][1], "a_click"
-
-        # 检测其他类别
-        for action_key in ["b_back", "c_reserved", "d_reserved"]:
-            for img_path in self.target_images_by_action.get(action_key, []):
-                if box := find_image_with_opencv(
-                    img_path, confidence=conf, region=region
-                ):
-                    return box, img_path, action_key
-        return None
+        return find_priority_match(
+            self.matcher,
+            frame,
+            self._priority_order,
+            confidence=self.params.get("conf", 0.8),
+            region=region,
+            pyramid=self.params.get("pyramid_enabled", False),
+        )
 
     def _translate_pc_to_phone_coords(
         self, pc_x: int, pc_y: int, region: Tuple[int, int, int, int]
     ) -> Tuple[int, int]:
         rl, rt, rw, rh = region
+        # 窗口横竖变化说明设备已旋转，需要用新方向的分辨率换算
+        self.controller.sync_orientation(rw > rh)
         ph_w, ph_h = self.controller.width, self.controller.height
         rel_x = (pc_x - rl) / rw
         rel_y = (pc_y - rt) / rh
@@ -129,28 +158,43 @@ class ImageHunter(QObject):
         self._stop_event.wait(wait_time)
         if self._stop_event.is_set():
             return
+        if not self._device_online.is_set():
+            self._record_action(action_key, img_name, box, "device_offline")
+            self.log_message.emit("[狩猎器] 动作取消：目标设备已断开。")
+            return
 
-        current_region = get_window_region(self.target_window_title)
+        # 等待结束后取一帧新的画面重新确认 (动作延迟从这里开始计时，不含随机等待)
+        started = time.perf_counter()
+        frame = self._frames.next_frame(timeout=2.0) if self._frames else None
+        current_region = frame.region if frame else None
         if not current_region:
+            self._record_action(action_key, img_name, box, "window_gone")
             self.log_message.emit(
                 f"[狩猎器] 动作取消：窗口 '{self.target_window_title}' 已消失。"
             )
             return
 
-        if not find_image_with_opencv(
-            img_path, confidence=p.get("conf", 0.8), region=current_region
+        if not self.matcher.match(
+            frame.image,
+            img_path,
+            confidence=p.get("conf", 0.8),
+            region=current_region,
+            pyramid=p.get("pyramid_enabled", False),
         ):
+            self._record_action(action_key, img_name, box, "target_gone", seq=frame.seq)
             self.log_message.emit(
                 f"[狩猎器] 动作取消：目标 {img_name} 在等待后消失了。"
             )
             return
 
+        point = None
         try:
             if action_key == "a_click":
                 pc_x, pc_y = self._get_random_point_in_box(box)
                 phone_x, phone_y = self._translate_pc_to_phone_coords(
                     pc_x, pc_y, current_region
                 )
+                point = [phone_x, phone_y]
                 self.controller.human_click_at_coords(phone_x, phone_y)
                 self.log_message.emit(
                     f"[狩猎器] ✓ 点击 {img_name} 成功 (坐标 {phone_x}, {phone_y})"
@@ -163,21 +207,64 @@ class ImageHunter(QObject):
                     f"[狩猎器] ✓ 备用动作 {action_key[0]} 已记录 (目标 {img_name})"
                 )
         except Exception as e:
+            METRICS.inc("hunter_action_errors", action=action_key, device=self.controller.device_id)
+            self._record_action(action_key, img_name, box, "error", seq=frame.seq, point=point, error=str(e))
             self.log_message.emit(f"[狩猎器] 执行失败: {e}")
+            return
+        self._record_action(action_key, img_name, box, "done", seq=frame.seq, point=point)
+        METRICS.observe(
+            "hunter_action_ms", (time.perf_counter() - started) * 1000.0,
+            action=action_key, template=img_name, device=self.controller.device_id,
+        )
+
+    def _record_action(self, action_key: str, img_name: str, box: Any, outcome: str, **fields: Any):
+        if RECORDER.active:
+            RECORDER.record(
+                "action", source="hunter", action=action_key, template=img_name,
+                box=[int(v) for v in box], outcome=outcome, device=self.controller.device_id, **fields,
+            )
+
+    def _record_match(self, frame: Any, evaluated: bool, match: Optional[Tuple[Any, str, str]]):
+        templates = RECORDER.record_templates("hunter", self._priority_order)
+        RECORDER.record(
+            "match", source="hunter", window=self.target_window_title, seq=frame.seq,
+            evaluated=evaluated, templates=templates,
+            conf=self.params.get("conf", 0.8), pyramid=self.params.get("pyramid_enabled", False),
+            change_threshold=self.change_gate.threshold, result=describe_match(match),
+        )
 
     def _loop(self):
-        while not self._stop_event.is_set():
-            region = get_window_region(self.target_window_title)
-            if not region:
-                if self.target_window_title:
-                    self.log_message.emit(
-                        f"[狩猎器] 等待窗口 '{self.target_window_title}' 出现..."
-                    )
-                self._stop_event.wait(2.0)
-                continue
-
-            match = self._find_priority_match(region)
-            if match:
-                self._perform_action(match[0], match[1], match[2])
-
-            self._stop_event.wait(0.5)
+        frames = FRAME_BUS.subscribe(self.target_window_title, interval=0.5)
+        self._frames = frames
+        last_match: Optional[Tuple[Any, str, str]] = None
+        try:
+            while not self._stop_event.is_set():
+                if not self._device_online.is_set():
+                    self._wait_for_device()
+                    self.change_gate.reset()
+                    last_match = None
+                    continue
+                frame = frames.next_frame(timeout=2.0)
+                if frame is None or frame.image is None:
+                    if self.target_window_title:
+                        self.log_message.emit(
+                            f"[狩猎器] 等待窗口 '{self.target_window_title}' 出现..."
+                        )
+                    self._stop_event.wait(2.0)
+                    continue
+
+                # 画面 (及窗口位置) 没有变化时直接复用上一次的匹配结果
+                evaluated = self.change_gate.should_evaluate(frame.image, frame.region)
+                if evaluated:
+                    last_match = self._find_priority_match(frame.image, frame.region)
+                if RECORDER.active:
+                    self._record_match(frame, evaluated, last_match)
+                match = last_match
+                if match:
+                    self._perform_action(match[0], match[1], match[2])
+
+                self._stop_event.wait(0.5)
+        finally:
+            frames.close()
+            if self._frames is frames:
+                self._frames = None
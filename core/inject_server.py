@@ -0,0 +1,367 @@
+# core/inject_server.py
+# =======================================================================
+#
+#        全功能控制器 - 常驻设备端注入服务 (客户端 + 本地替身服务)
+#        仿照 scrcpy server：设备上常驻一个 app_process 进程，
+#        主机通过 adb forward 的 socket 直接发送触摸/按键事件，不再每步启动 input 进程；
+#        设备端服务的源码在 server/src (python -m server.build 构建)，协议修改时两边需同步
+#
+# =======================================================================
+import hashlib
+import random
+import socket
+import struct
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from config import INJECT_SERVER_JAR
+from utils.helpers import run_adb
+from .adb_shell import get_shell_session
+from .input_backends import InputBackend, ShellInputBackend
+
+# ---------- 协议 (大端序) ----------
+# 连接建立后服务端先发送 4 字节魔数，用于确认 forward 的另一端确实是注入服务
+PROTOCOL_MAGIC = b"SINJ"
+MSG_TOUCH = 1  # u8 type, u8 action, i32 x, i32 y, u16 delay_ms (服务端等待 delay 后再注入)
+MSG_KEY = 2  # u8 type, i32 keycode (服务端注入 DOWN+UP)
+MSG_SYNC = 3  # u8 type, u32 token -> 回复 u8 type, u32 token, u32 自上次 DOWN 起的微秒数
+ACTION_DOWN, ACTION_UP, ACTION_MOVE = 0, 1, 2
+
+TOUCH_FORMAT = ">BBiiH"
+KEY_FORMAT = ">Bi"
+SYNC_FORMAT = ">BI"
+SYNC_REPLY_FORMAT = ">BII"
+
+# 设备上的文件名和 socket 名都带有 jar 内容的摘要：重新构建后自动推送新版本并启动，
+# 旧版本的服务不会被误认为可用
+SERVER_DEVICE_PATH_PREFIX = "/data/local/tmp/swipe-inject-server-"
+SERVER_MAIN_CLASS = "com.lww3716.inject.Server"
+SERVER_SOCKET_NAME = "swipe_inject"
+# 注入失败后多久再尝试重新连接服务 (期间使用 input 命令)
+RECONNECT_COOLDOWN = 30.0
+# 等待服务端回复的超时 = 事件中计划的总延时 + 该余量 (秒)；超时视为服务卡死
+REPLY_TIMEOUT_MARGIN = 2.0
+
+
+_version_cache: Tuple[Optional[Tuple[int, int]], str] = (None, "")
+
+
+def server_version() -> str:
+    """本地服务 jar 的内容摘要 (前 12 位)，jar 未改动时不重新计算。"""
+    global _version_cache
+    try:
+        st = INJECT_SERVER_JAR.stat()
+    except OSError:
+        raise FileNotFoundError(f"未找到注入服务文件: {INJECT_SERVER_JAR}")
+    stamp = (st.st_mtime_ns, st.st_size)
+    if _version_cache[0] != stamp:
+        _version_cache = (stamp, hashlib.sha1(INJECT_SERVER_JAR.read_bytes()).hexdigest()[:12])
+    return _version_cache[1]
+
+
+def server_device_path(version: str) -> str:
+    return f"{SERVER_DEVICE_PATH_PREFIX}{version}.jar"
+
+
+def server_socket_name(version: str) -> str:
+    return f"{SERVER_SOCKET_NAME}_{version}"
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("注入服务连接已断开")
+        data += chunk
+    return data
+
+
+class InjectServerBackend(InputBackend):
+    """
+    通过常驻注入服务发送事件的输入后端。
+    整条滑动 (含每步延时) 一次性写入 socket，由设备端按时注入；
+    服务不可用时自动退回 input 命令 (ShellInputBackend)，冷却后再尝试重连。
+    endpoint 指定 (host, port) 时直接连接该地址，跳过部署和 adb forward (用于本地替身服务)。
+    """
+
+    name = "server"
+
+    def __init__(
+        self,
+        adb_path: str,
+        serial: str,
+        endpoint: Optional[Tuple[str, int]] = None,
+    ):
+        self.adb = adb_path
+        self.serial = serial
+        self.endpoint = endpoint
+        self.fallback = ShellInputBackend(adb_path, serial)
+        self._sock: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+        self._tokens = 0
+        self._failed_at: Optional[float] = None
+        self._forward_port: Optional[int] = None
+
+    # ---------- 部署与连接 ----------
+    def _forward(self, socket_name: str) -> Tuple[str, int]:
+        # 之前的 forward 可能已随设备断开失效，重新建立
+        self._remove_forward()
+        p = run_adb(
+            self.adb,
+            ["-s", self.serial, "forward", "tcp:0", f"localabstract:{socket_name}"],
+            timeout=5.0,
+        )
+        port = p.stdout.strip()
+        if p.returncode != 0 or not port.isdigit():
+            raise RuntimeError(f"adb forward 失败: {p.stderr.strip()}")
+        self._forward_port = int(port)
+        return "127.0.0.1", self._forward_port
+
+    def _remove_forward(self):
+        if self._forward_port is None:
+            return
+        try:
+            run_adb(
+                self.adb,
+                ["-s", self.serial, "forward", "--remove", f"tcp:{self._forward_port}"],
+                timeout=3.0,
+            )
+        except Exception:
+            pass
+        self._forward_port = None
+
+    def _launch(self, version: str):
+        """推送 (设备上没有这一版本时) 并启动服务；先结束旧版本的服务进程。"""
+        device_path = server_device_path(version)
+        shell = get_shell_session(self.adb, self.serial)
+        code, _ = shell.run(f"test -f {device_path}", timeout=3.0)
+        if code != 0:
+            shell.run(f"rm -f {SERVER_DEVICE_PATH_PREFIX}*.jar", timeout=3.0)
+            p = run_adb(
+                self.adb,
+                ["-s", self.serial, "push", str(INJECT_SERVER_JAR), device_path],
+                timeout=15.0,
+            )
+            if p.returncode != 0:
+                raise RuntimeError(f"推送注入服务失败: {p.stderr.strip()}")
+        shell.run(
+            f"pkill -f {SERVER_MAIN_CLASS} 2>/dev/null; "
+            f"CLASSPATH={device_path} nohup app_process / {SERVER_MAIN_CLASS} "
+            f"{server_socket_name(version)} >/dev/null 2>&1 &",
+            timeout=3.0,
+        )
+
+    @staticmethod
+    def _open(host: str, port: int) -> socket.socket:
+        """建立连接并完成握手；forward 的另一端没有服务在监听时连接会立即被关闭，握手失败。"""
+        sock = socket.create_connection((host, port), timeout=2.0)
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            if _recv_exact(sock, len(PROTOCOL_MAGIC)) != PROTOCOL_MAGIC:
+                raise ConnectionError("注入服务握手失败")
+        except Exception:
+            sock.close()
+            raise
+        sock.settimeout(REPLY_TIMEOUT_MARGIN)
+        return sock
+
+    def connect(self):
+        version = None
+        if self.endpoint is not None:
+            host, port = self.endpoint
+        else:
+            version = server_version()
+            host, port = self._forward(server_socket_name(version))
+        last_error: Optional[Exception] = None
+        # 先探测当前版本的服务是否已在运行，没有时才部署并启动；服务端 (JVM) 启动需要一点时间，短暂重试
+        for _ in range(10):
+            try:
+                self._sock = self._open(host, port)
+                self._failed_at = None
+                return
+            except Exception as e:
+                last_error = e
+            if version is not None:
+                self._launch(version)
+                version = None
+            time.sleep(0.2)
+        raise ConnectionError(f"无法连接注入服务: {last_error}")
+
+    def _ensure_connected(self) -> bool:
+        if self._sock is not None:
+            return True
+        if self._failed_at is not None and time.monotonic() - self._failed_at < RECONNECT_COOLDOWN:
+            return False
+        try:
+            self.connect()
+            return True
+        except Exception as e:
+            print(f"[注入服务] {self.serial} 不可用，改用 input 命令: {e}")
+            self._failed_at = time.monotonic()
+            return False
+
+    def _drop_connection(self, error: Exception):
+        # 事件可能已经部分或全部送达设备，本次操作不再用 input 命令重发 (否则会执行两次)，
+        # 之后的操作在冷却期内改用 input 命令
+        print(f"[注入服务] {self.serial} 连接异常，本次操作不重发，之后改用 input 命令: {error}")
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except Exception:
+                pass
+        self._sock = None
+        self._failed_at = time.monotonic()
+
+    # ---------- 事件发送 ----------
+    def _send(self, events: List[bytes]) -> float:
+        """
+        发送事件并等待服务端执行完毕，返回自上次 DOWN 起的设备端耗时 (ms)。
+        socket 超时按计划的总延时加 REPLY_TIMEOUT_MARGIN 设置，服务卡死时抛出 socket.timeout，
+        由调用方断开连接 (本次不重发)，不会在持有 _lock 时无限等待。
+        """
+        planned_ms = sum(struct.unpack(TOUCH_FORMAT, e)[-1] for e in events if e[0] == MSG_TOUCH)
+        self._sock.settimeout(planned_ms / 1000.0 + REPLY_TIMEOUT_MARGIN)
+        self._sock.sendall(b"".join(events))
+        return self._sync()
+
+    def _sync(self) -> float:
+        """等待服务端处理完之前的所有事件，返回自上次 DOWN 起的设备端耗时 (ms)。"""
+        self._tokens = (self._tokens + 1) & 0xFFFFFFFF
+        self._sock.sendall(struct.pack(SYNC_FORMAT, MSG_SYNC, self._tokens))
+        reply = _recv_exact(self._sock, struct.calcsize(SYNC_REPLY_FORMAT))
+        _, token, elapsed_us = struct.unpack(SYNC_REPLY_FORMAT, reply)
+        if token != self._tokens:
+            raise ConnectionError("注入服务同步序号不一致")
+        return elapsed_us / 1000.0
+
+    @staticmethod
+    def _touch(action: int, x: int, y: int, delay_ms: float) -> bytes:
+        delay = max(0, min(0xFFFF, int(round(delay_ms))))
+        return struct.pack(TOUCH_FORMAT, MSG_TOUCH, action, int(x), int(y), delay)
+
+    def tap(self, x: int, y: int, duration_ms: int):
+        with self._lock:
+            if self._ensure_connected():
+                try:
+                    self._send([self._touch(ACTION_DOWN, x, y, 0), self._touch(ACTION_UP, x, y, duration_ms)])
+                except Exception as e:
+                    self._drop_connection(e)
+                return
+        # 只有连接/握手失败 (尚未发送任何事件) 时才改用 input 命令
+        self.fallback.tap(x, y, duration_ms)
+
+    def key(self, keycode: int):
+        with self._lock:
+            if self._ensure_connected():
+                try:
+                    self._send([struct.pack(KEY_FORMAT, MSG_KEY, keycode)])
+                except Exception as e:
+                    self._drop_connection(e)
+                return
+        self.fallback.key(keycode)
+
+    def swipe_chain(
+        self,
+        points: List[Tuple[int, int]],
+        durations_ms: List[int],
+        device_playback: bool = False,
+    ) -> Optional[float]:
+        if len(points) < 2:
+            return None
+        with self._lock:
+            if self._ensure_connected():
+                try:
+                    # 事件与延时本来就由设备端执行，device_playback 对本后端没有区别
+                    x, y = points[0]
+                    events = [self._touch(ACTION_DOWN, x, y, 0)]
+                    delay = random.uniform(5, 10)  # 极短的接触时间，避免被识别为长按
+                    for (x, y), dur_ms in zip(points[1:], durations_ms):
+                        events.append(self._touch(ACTION_MOVE, x, y, delay))
+                        delay = dur_ms
+                    events.append(self._touch(ACTION_UP, x, y, delay))
+                    return self._send(events)
+                except Exception as e:
+                    self._drop_connection(e)
+                    return None
+        return self.fallback.swipe_chain(points, durations_ms, device_playback)
+
+    def close(self):
+        with self._lock:
+            if self._sock is not None:
+                try:
+                    self._sock.close()
+                except Exception:
+                    pass
+                self._sock = None
+        self._remove_forward()
+
+
+class StandInInjectServer:
+    """
+    本地替身注入服务：在主机上实现同一套协议，记录收到的事件并按 delay 模拟设备端计时。
+    用于在没有设备/服务 jar 的情况下调试 InjectServerBackend：
+        server = StandInInjectServer().start()
+        backend = InjectServerBackend("adb", "stand-in", endpoint=("127.0.0.1", server.port))
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind((host, port))
+        self.host, self.port = self._listener.getsockname()
+        # (单调时间戳, 类型, 参数...) 列表
+        self.events: List[tuple] = []
+        self._stop = threading.Event()
+
+    def start(self) -> "StandInInjectServer":
+        self._listener.listen(1)
+        threading.Thread(target=self._accept_loop, daemon=True, name="StandInInject").start()
+        return self
+
+    def close(self):
+        self._stop.set()
+        try:
+            self._listener.close()
+        except Exception:
+            pass
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn: socket.socket):
+        last_down: Optional[float] = None
+        try:
+            conn.sendall(PROTOCOL_MAGIC)
+            while not self._stop.is_set():
+                msg_type = _recv_exact(conn, 1)[0]
+                if msg_type == MSG_TOUCH:
+                    rest = _recv_exact(conn, struct.calcsize(TOUCH_FORMAT) - 1)
+                    _, action, x, y, delay = struct.unpack(TOUCH_FORMAT, bytes([msg_type]) + rest)
+                    if delay:
+                        time.sleep(delay / 1000.0)
+                    now = time.monotonic()
+                    if action == ACTION_DOWN:
+                        last_down = now
+                    self.events.append((now, "touch", action, x, y))
+                elif msg_type == MSG_KEY:
+                    (keycode,) = struct.unpack(">i", _recv_exact(conn, 4))
+                    self.events.append((time.monotonic(), "key", keycode))
+                elif msg_type == MSG_SYNC:
+                    (token,) = struct.unpack(">I", _recv_exact(conn, 4))
+                    elapsed = time.monotonic() - last_down if last_down else 0.0
+                    conn.sendall(
+                        struct.pack(SYNC_REPLY_FORMAT, MSG_SYNC, token, int(elapsed * 1e6))
+                    )
+                else:
+                    return  # 未知消息，断开连接
+        except Exception:
+            pass
+        finally:
+            conn.close()
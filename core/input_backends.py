@@ -0,0 +1,235 @@
+# core/input_backends.py
+# =======================================================================
+#
+#        全功能控制器 - 输入注入后端模块
+#        统一点击/按键/滑动接口，按设备选择具体实现 (input 命令 / 常驻注入服务 / sendevent)
+#
+# =======================================================================
+import random
+import re
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config import DEFAULT_INPUT_BACKEND, INPUT_BACKEND_BY_DEVICE, si
+from .adb_shell import ShellCommandNotSent, close_shell_session, get_shell_session
+from .device_info import DEVICE_INFO
+
+
+class InputBackend:
+    """输入后端基类。坐标均为设备像素坐标。"""
+
+    name = "base"
+
+    def tap(self, x: int, y: int, duration_ms: int):
+        raise NotImplementedError
+
+    def key(self, keycode: int):
+        raise NotImplementedError
+
+    def swipe_chain(
+        self,
+        points: List[Tuple[int, int]],
+        durations_ms: List[int],
+        device_playback: bool = False,
+    ) -> Optional[float]:
+        """执行滑动，返回实际耗时 (ms)；失败时返回 None。"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class ShellInputBackend(InputBackend):
+    """通过常驻 adb shell 会话执行 `input` 命令 (默认后端，所有设备可用)。"""
+
+    name = "shell"
+
+    def __init__(self, adb_path: str, serial: str):
+        self.adb = adb_path
+        self.serial = serial
+        self._input_overhead_ms = 0.0
+
+    def _shell_input(self, args: List[str]):
+        try:
+            # 优先走常驻 shell 会话，省去每次启动 adb 进程和建立连接的开销
+            get_shell_session(self.adb, self.serial).run(
+                " ".join(["input"] + args), timeout=5.0
+            )
+        except ShellCommandNotSent:
+            # 命令没有写入会话时退回一次性进程，保证动作不丢失
+            subprocess.run(
+                [self.adb, "-s", self.serial, "shell", "input"] + args,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                startupinfo=si,
+            )
+        except Exception as e:
+            # 命令已经写入会话 (超时或进程中途退出)：设备可能已执行，不再重发，丢弃会话下次重建
+            print(f"[滑动器] input 命令异常 (不重发): {e}")
+            close_shell_session(self.serial)
+
+    def tap(self, x: int, y: int, duration_ms: int):
+        self._shell_input(["swipe", str(x), str(y), str(x), str(y), str(duration_ms)])
+
+    def key(self, keycode: int):
+        self._shell_input(["keyevent", str(keycode)])
+
+    def swipe_chain(
+        self,
+        points: List[Tuple[int, int]],
+        durations_ms: List[int],
+        device_playback: bool = False,
+    ) -> Optional[float]:
+        if len(points) < 2:
+            return None
+        info = DEVICE_INFO.peek(self.serial)
+        if info is not None and not info.motionevent:
+            return self._legacy_swipe(points, durations_ms)
+        if device_playback:
+            return self._device_swipe_chain(points, durations_ms)
+        started = time.perf_counter()
+        try:
+            # 与点击共用同一个常驻 shell 会话，命令按顺序排队执行
+            shell = get_shell_session(self.adb, self.serial)
+            x, y = points[0]
+            # Down: 几乎无延迟，模拟一触即发
+            futures = [shell.submit(f"input touchscreen motionevent DOWN {x} {y}")]
+            # 极短的接触时间，避免被识别为长按
+            time.sleep(random.uniform(0.005, 0.01))
+
+            for (x, y), dur_ms in zip(points[1:], durations_ms):
+                futures.append(shell.submit(f"input touchscreen motionevent MOVE {x} {y}"))
+                if dur_ms > 0:
+                    time.sleep(dur_ms / 1000.0)
+
+            # Up: 直接抬起，不等待，保留残影速度
+            futures.append(shell.submit(f"input touchscreen motionevent UP {x} {y}"))
+            # 命令按顺序执行，UP 完成时其余命令也已完成；任一步失败 (异常或非零退出码) 都算滑动失败
+            deadline = time.monotonic() + 10.0
+            for index, future in enumerate(futures):
+                code, out = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                if code != 0:
+                    print(f"[滑动器] motionevent 第 {index + 1} 步失败 (退出码 {code}): {out.strip()}")
+                    return None
+            return (time.perf_counter() - started) * 1000.0
+        except Exception as e:
+            print(f"[滑动器] motionevent 异常: {e}")
+            return None
+
+    def _legacy_swipe(
+        self, points: List[Tuple[int, int]], durations_ms: List[int]
+    ) -> Optional[float]:
+        """旧系统 (Android 10 以前) 没有 motionevent，只能用 input swipe 走起点到终点的直线。"""
+        (x0, y0), (x1, y1) = points[0], points[-1]
+        started = time.perf_counter()
+        self._shell_input(["swipe", str(x0), str(y0), str(x1), str(y1), str(max(1, sum(durations_ms)))])
+        return (time.perf_counter() - started) * 1000.0
+
+    def _device_swipe_chain(
+        self, points: List[Tuple[int, int]], durations_ms: List[int]
+    ) -> Optional[float]:
+        """
+        设备端回放：把整条 DOWN/MOVE/UP 序列连同每段的 sleep 一次性发给设备 shell，
+        主机不再参与计时。每条 input 命令本身的启动耗时会从 sleep 中扣除 (动态估计)。
+        """
+        overhead_ms = self._input_overhead_ms
+        down_wait = random.uniform(0.005, 0.01)
+        x, y = points[0]
+        lines = [
+            "__swipe_t0=$(date +%s%N)",
+            f"input touchscreen motionevent DOWN {x} {y}",
+            f"sleep {down_wait:.4f}",
+        ]
+        slept_ms = down_wait * 1000.0
+        for (x, y), dur_ms in zip(points[1:], durations_ms):
+            lines.append(f"input touchscreen motionevent MOVE {x} {y}")
+            wait_ms = dur_ms - overhead_ms
+            if wait_ms >= 1:
+                lines.append(f"sleep {wait_ms / 1000.0:.4f}")
+                slept_ms += wait_ms
+        lines.append(f"input touchscreen motionevent UP {x} {y}")
+        lines.append('echo "__SWIPE_TIMING__ $__swipe_t0 $(date +%s%N)"')
+
+        planned_ms = down_wait * 1000.0 + sum(durations_ms)
+        started = time.perf_counter()
+        try:
+            shell = get_shell_session(self.adb, self.serial)
+            _, out = shell.run(
+                "\n".join(lines), timeout=planned_ms / 1000.0 + len(points) * 0.5 + 5.0
+            )
+        except Exception as e:
+            print(f"[滑动器] 设备端回放异常: {e}")
+            return None
+        host_ms = (time.perf_counter() - started) * 1000.0
+
+        m = re.search(r"__SWIPE_TIMING__ (\d+) (\d+)", out)
+        if not m:
+            # 设备的 date 不支持 %N 时退回主机侧计时
+            return host_ms
+        realized_ms = (int(m.group(2)) - int(m.group(1))) / 1e6
+        # 更新每条 input 命令的平均启动耗时估计 (指数滑动平均)
+        per_cmd = max(0.0, (realized_ms - slept_ms) / (len(points) + 1))
+        self._input_overhead_ms = 0.7 * self._input_overhead_ms + 0.3 * per_cmd
+        return realized_ms
+
+
+_backends: Dict[Tuple[str, str], InputBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def _create_backend(adb_path: str, serial: str) -> InputBackend:
+    kind = INPUT_BACKEND_BY_DEVICE.get(serial, DEFAULT_INPUT_BACKEND)
+    if kind == "server":
+        from .inject_server import InjectServerBackend
+
+        return InjectServerBackend(adb_path, serial)
+    if kind == "sendevent":
+        from .sendevent_input import SendeventInputBackend
+
+        return SendeventInputBackend(adb_path, serial)
+    return ShellInputBackend(adb_path, serial)
+
+
+def get_input_backend(adb_path: str, serial: str) -> InputBackend:
+    """返回该设备当前选用的输入后端 (按 INPUT_BACKEND_BY_DEVICE 选择，默认 input 命令)。"""
+    key = (adb_path, serial)
+    with _backends_lock:
+        backend = _backends.get(key)
+        if backend is None:
+            backend = _create_backend(adb_path, serial)
+            _backends[key] = backend
+        return backend
+
+
+def set_input_backend(serial: str, kind: str):
+    """切换某台设备的输入后端 ("shell" / "server" / "sendevent")，下次使用时生效。"""
+    INPUT_BACKEND_BY_DEVICE[serial] = kind
+    close_input_backend(serial)
+
+
+def close_input_backend(serial: str):
+    with _backends_lock:
+        keys = [key for key in _backends if key[1] == serial]
+        backends = [_backends.pop(key) for key in keys]
+    for backend in backends:
+        backend.close()
+
+
+def release_device(serial: str):
+    """
+    设备断开后释放它的输入后端和 shell 会话，并把设备信息标记为过期 (重新连接后重建/重新查询)。
+    可能阻塞数秒 (等待进行中的滑动、结束 shell 进程、移除 adb forward)，请在后台任务中调用。
+    """
+    DEVICE_INFO.invalidate(serial)
+    close_input_backend(serial)
+    close_shell_session(serial)
+
+
+def close_all_input_backends():
+    with _backends_lock:
+        backends = list(_backends.values())
+        _backends.clear()
+    for backend in backends:
+        backend.close()
@@ -0,0 +1,50 @@
+# core/profiles.py
+# =======================================================================
+#
+#        全功能控制器 - 配置方案 (combined_profiles.json) 的读写与默认值
+#        图形界面和命令行共用
+#
+# =======================================================================
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+from config import CONFIG_FILE_COMBINED, DEFAULT_PROFILE_NAME
+
+Profiles = Dict[str, Dict[str, Dict[str, Any]]]
+
+
+def default_swiper_config() -> Dict[str, Any]:
+    return {"start_x": 0.5, "start_y": 0.85, "end_x": 0.5, "end_y": 0.45, "duration_min": 400, "duration_max": 500, "jitter": 2, "steps_min": 25, "steps_max": 35, "coord_offset": 1.0, "interval_min": 4.0, "interval_max": 10.0, "detection_enabled": False, "p1_start_condition_enabled": False, "confidence": 0.8, "pyramid_enabled": False, "change_threshold": 8.0, "device_playback": False}
+
+
+def default_hunter_config() -> Dict[str, Any]:
+    return {"min_s": 5.0, "max_s": 10.0, "conf": 0.8, "x_min": 0.3, "x_max": 0.7, "y_min": 0.3, "y_max": 0.7, "pyramid_enabled": False, "change_threshold": 8.0}
+
+
+def default_profiles() -> Profiles:
+    return {DEFAULT_PROFILE_NAME: {"swiper": default_swiper_config(), "hunter": default_hunter_config()}}
+
+
+def load_profiles(path: Path = CONFIG_FILE_COMBINED) -> Profiles:
+    """读取全部配置方案；文件不存在或无法解析时返回只含默认方案的字典。"""
+    if path.exists():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            pass
+    return default_profiles()
+
+
+def save_profiles(profiles: Profiles, path: Path = CONFIG_FILE_COMBINED):
+    path.parent.mkdir(exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profiles, f, indent=4, ensure_ascii=False)
+
+
+def complete_profile(profile: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """缺少 swiper/hunter 部分时补上默认值 (原地修改并返回)。"""
+    profile.setdefault("swiper", default_swiper_config())
+    profile.setdefault("hunter", default_hunter_config())
+    return profile
@@ -0,0 +1,318 @@
+# core/sendevent_input.py
+# =======================================================================
+#
+#        全功能控制器 - sendevent 原始触摸事件后端
+#        直接向触摸屏的 /dev/input/eventN 写入多点触控事件，完全绕过 input 命令
+#
+# =======================================================================
+import random
+import re
+import threading
+import time
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple
+
+from .adb_shell import get_shell_session
+from .device_info import DEVICE_INFO
+from .input_backends import InputBackend, ShellInputBackend
+
+# Linux input 事件常量
+EV_SYN, EV_KEY, EV_ABS = 0x00, 0x01, 0x03
+SYN_REPORT, SYN_MT_REPORT = 0x00, 0x02
+BTN_TOUCH = 0x14A
+ABS_MT_SLOT = 0x2F
+ABS_MT_TOUCH_MAJOR = 0x30
+ABS_MT_POSITION_X = 0x35
+ABS_MT_POSITION_Y = 0x36
+ABS_MT_TRACKING_ID = 0x39
+ABS_MT_PRESSURE = 0x3A
+
+# 一次探测得到的触摸屏参数。
+# protocol: "B" (带 TRACKING_ID 的 slot 协议) 或 "A" (SYN_MT_REPORT 协议)
+# width/height: 屏幕物理分辨率 (像素)，用于把像素坐标换算为触摸屏原始坐标
+TouchscreenInfo = namedtuple(
+    "TouchscreenInfo",
+    [
+        "node",
+        "name",
+        "x_range",
+        "y_range",
+        "protocol",
+        "has_slot",
+        "has_btn_touch",
+        "pressure_max",
+        "touch_major_max",
+        "width",
+        "height",
+    ],
+)
+
+_PROBE_SPLIT = "__SENDEVENT_PROBE_WM__"
+
+
+def parse_getevent(output: str) -> List[dict]:
+    """解析 `getevent -p` 的输出，返回每个输入设备的 {node, name, keys, abs} 描述。"""
+    devices: List[dict] = []
+    current: Optional[dict] = None
+    section = None
+    for line in output.splitlines():
+        m = re.match(r"add device \d+:\s*(\S+)", line)
+        if m:
+            current = {"node": m.group(1), "name": "", "keys": set(), "abs": {}}
+            devices.append(current)
+            section = None
+            continue
+        if current is None:
+            continue
+        m = re.match(r'\s*name:\s*"(.*)"', line)
+        if m:
+            current["name"] = m.group(1)
+            continue
+        m = re.match(r"\s*(KEY|ABS|REL|SW|LED|MSC|FF|SND)\s*\([0-9a-fA-F]+\):\s*(.*)", line)
+        if m:
+            section, rest = m.group(1), m.group(2)
+        elif section and re.match(r"\s+[0-9a-fA-F]{4}\b", line):
+            rest = line
+        else:
+            section = None
+            continue
+        if section == "KEY":
+            current["keys"].update(int(code, 16) for code in re.findall(r"\b[0-9a-fA-F]{4}\b", rest))
+        elif section == "ABS":
+            m = re.match(r"\s*([0-9a-fA-F]{4})\s*:.*?min\s+(-?\d+),\s*max\s+(-?\d+)", rest)
+            if m:
+                current["abs"][int(m.group(1), 16)] = (int(m.group(2)), int(m.group(3)))
+    return devices
+
+
+def _select_touchscreen(devices: List[dict]) -> Optional[dict]:
+    candidates = [
+        d for d in devices if ABS_MT_POSITION_X in d["abs"] and ABS_MT_POSITION_Y in d["abs"]
+    ]
+    if not candidates:
+        return None
+    # 名字里带 touch 的优先，其次选坐标范围最大的
+    candidates.sort(
+        key=lambda d: ("touch" in d["name"].lower(), d["abs"][ABS_MT_POSITION_X][1]),
+        reverse=True,
+    )
+    return candidates[0]
+
+
+_probe_cache: Dict[str, Optional[TouchscreenInfo]] = {}
+_probe_lock = threading.Lock()
+
+
+def probe_touchscreen(adb_path: str, serial: str, refresh: bool = False) -> Optional[TouchscreenInfo]:
+    """
+    探测设备的触摸屏节点、坐标范围和多点触控协议 (每个设备只执行一次 getevent -p)。
+    节点不可写或没有触摸屏时返回 None，结果同样会被缓存。
+    """
+    with _probe_lock:
+        if not refresh and serial in _probe_cache:
+            return _probe_cache[serial]
+
+    info: Optional[TouchscreenInfo] = None
+    try:
+        shell = get_shell_session(adb_path, serial)
+        _, out = shell.run(f"getevent -p 2>/dev/null; echo {_PROBE_SPLIT}; wm size", timeout=5.0)
+        events_out, _, wm_out = out.partition(_PROBE_SPLIT)
+        device = _select_touchscreen(parse_getevent(events_out))
+        m = re.search(r"Physical size:\s*(\d+)\s*x\s*(\d+)", wm_out) or re.search(
+            r"(\d+)\s*x\s*(\d+)", wm_out
+        )
+        if device and m:
+            code, _ = shell.run(f"test -w {device['node']}", timeout=3.0)
+            if code == 0:
+                abs_axes = device["abs"]
+                info = TouchscreenInfo(
+                    node=device["node"],
+                    name=device["name"],
+                    x_range=abs_axes[ABS_MT_POSITION_X],
+                    y_range=abs_axes[ABS_MT_POSITION_Y],
+                    protocol="B" if ABS_MT_TRACKING_ID in abs_axes else "A",
+                    has_slot=ABS_MT_SLOT in abs_axes,
+                    has_btn_touch=BTN_TOUCH in device["keys"],
+                    pressure_max=abs_axes.get(ABS_MT_PRESSURE, (0, 0))[1],
+                    touch_major_max=abs_axes.get(ABS_MT_TOUCH_MAJOR, (0, 0))[1],
+                    width=int(m.group(1)),
+                    height=int(m.group(2)),
+                )
+            else:
+                print(f"[sendevent] {serial} 的 {device['node']} 不可写，改用 input 命令")
+    except Exception as e:
+        print(f"[sendevent] {serial} 触摸屏探测失败: {e}")
+
+    with _probe_lock:
+        _probe_cache[serial] = info
+    return info
+
+
+def invalidate_touchscreen(serial: Optional[str] = None):
+    with _probe_lock:
+        if serial is None:
+            _probe_cache.clear()
+        else:
+            _probe_cache.pop(serial, None)
+
+
+class SendeventInputBackend(InputBackend):
+    """
+    用 sendevent 直接写触摸屏节点的输入后端。
+    整条滑动 (事件 + 每段 sleep) 作为一个脚本交给设备 shell 执行，由设备端计时；
+    按键和探测失败的设备退回 ShellInputBackend。
+    """
+
+    name = "sendevent"
+
+    def __init__(self, adb_path: str, serial: str):
+        self.adb = adb_path
+        self.serial = serial
+        self.fallback = ShellInputBackend(adb_path, serial)
+        self._tracking_id = random.randint(100, 10000)
+        # 每帧 (若干条 sendevent) 的平均执行耗时估计，从 sleep 中扣除
+        self._frame_overhead_ms = 0.0
+
+    def info(self) -> Optional[TouchscreenInfo]:
+        return probe_touchscreen(self.adb, self.serial)
+
+    # ---------- 事件脚本生成 ----------
+    def _rotation(self) -> int:
+        # 只读缓存 (不查询设备)；方向由 DEVICE_INFO.check_orientation 随截图窗口保持更新
+        info = DEVICE_INFO.peek(self.serial)
+        return info.rotation if info is not None else 0
+
+    @staticmethod
+    def _to_raw(info: TouchscreenInfo, x: int, y: int, rotation: int = 0) -> Tuple[int, int]:
+        """
+        当前方向下的显示坐标 -> 触摸屏原始坐标。触摸屏的坐标轴固定在自然方向 (竖屏)，
+        先按 rotation 转回自然方向 (与系统 TouchInputMapper 的旋转互逆)，再按范围缩放。
+        """
+        if rotation == 1:
+            x, y = info.width - 1 - y, x
+        elif rotation == 2:
+            x, y = info.width - 1 - x, info.height - 1 - y
+        elif rotation == 3:
+            x, y = y, info.height - 1 - x
+        (x_min, x_max), (y_min, y_max) = info.x_range, info.y_range
+        raw_x = x_min + round(x * (x_max - x_min) / max(1, info.width - 1))
+        raw_y = y_min + round(y * (y_max - y_min) / max(1, info.height - 1))
+        return min(max(raw_x, x_min), x_max), min(max(raw_y, y_min), y_max)
+
+    @staticmethod
+    def _event(info: TouchscreenInfo, ev_type: int, code: int, value: int) -> str:
+        return f"sendevent {info.node} {ev_type} {code} {value}"
+
+    def _frame(self, info: TouchscreenInfo, phase: str, x: int, y: int, rotation: int = 0) -> List[str]:
+        ev = lambda t, c, v: self._event(info, t, c, v)  # noqa: E731
+        raw_x, raw_y = self._to_raw(info, x, y, rotation)
+        lines: List[str] = []
+        if info.protocol == "B":
+            if phase == "down":
+                if info.has_slot:
+                    lines.append(ev(EV_ABS, ABS_MT_SLOT, 0))
+                lines.append(ev(EV_ABS, ABS_MT_TRACKING_ID, self._tracking_id))
+                if info.has_btn_touch:
+                    lines.append(ev(EV_KEY, BTN_TOUCH, 1))
+            if phase == "up":
+                lines.append(ev(EV_ABS, ABS_MT_TRACKING_ID, -1))
+                if info.has_btn_touch:
+                    lines.append(ev(EV_KEY, BTN_TOUCH, 0))
+                lines.append(ev(EV_SYN, SYN_REPORT, 0))
+                return lines
+            lines.append(ev(EV_ABS, ABS_MT_POSITION_X, raw_x))
+            lines.append(ev(EV_ABS, ABS_MT_POSITION_Y, raw_y))
+            if phase == "down":
+                if info.touch_major_max:
+                    lines.append(ev(EV_ABS, ABS_MT_TOUCH_MAJOR, max(1, info.touch_major_max // 8)))
+                if info.pressure_max:
+                    lines.append(ev(EV_ABS, ABS_MT_PRESSURE, max(1, info.pressure_max // 2)))
+        else:
+            if phase == "up":
+                lines.append(ev(EV_SYN, SYN_MT_REPORT, 0))
+                if info.has_btn_touch:
+                    lines.append(ev(EV_KEY, BTN_TOUCH, 0))
+                lines.append(ev(EV_SYN, SYN_REPORT, 0))
+                return lines
+            if phase == "down" and info.has_btn_touch:
+                lines.append(ev(EV_KEY, BTN_TOUCH, 1))
+            lines.append(ev(EV_ABS, ABS_MT_POSITION_X, raw_x))
+            lines.append(ev(EV_ABS, ABS_MT_POSITION_Y, raw_y))
+            if info.pressure_max:
+                lines.append(ev(EV_ABS, ABS_MT_PRESSURE, max(1, info.pressure_max // 2)))
+            lines.append(ev(EV_SYN, SYN_MT_REPORT, 0))
+        lines.append(ev(EV_SYN, SYN_REPORT, 0))
+        return lines
+
+    def _play(
+        self, info: TouchscreenInfo, points: List[Tuple[int, int]], waits_ms: List[float]
+    ) -> Optional[float]:
+        """
+        points[0] 为按下点，其余为移动点，最后在末点抬起。
+        waits_ms[i] 为第 i 帧之后、下一帧之前的等待时间。
+        """
+        overhead_ms = self._frame_overhead_ms
+        x, y = points[0]
+        rotation = self._rotation()
+        lines = ["__swipe_t0=$(date +%s%N)"] + self._frame(info, "down", x, y, rotation)
+        slept_ms = 0.0
+        for i, wait_ms in enumerate(waits_ms):
+            wait_ms = wait_ms - overhead_ms
+            if wait_ms >= 1:
+                lines.append(f"sleep {wait_ms / 1000.0:.4f}")
+                slept_ms += wait_ms
+            if i + 1 < len(points):
+                x, y = points[i + 1]
+                lines += self._frame(info, "move", x, y, rotation)
+        lines += self._frame(info, "up", x, y, rotation)
+        lines.append('echo "__SWIPE_TIMING__ $__swipe_t0 $(date +%s%N)"')
+        self._tracking_id = self._tracking_id % 60000 + 1
+
+        started = time.perf_counter()
+        shell = get_shell_session(self.adb, self.serial)
+        _, out = shell.run(
+            "\n".join(lines), timeout=sum(waits_ms) / 1000.0 + len(points) * 0.2 + 5.0
+        )
+        host_ms = (time.perf_counter() - started) * 1000.0
+        m = re.search(r"__SWIPE_TIMING__ (\d+) (\d+)", out)
+        if not m:
+            return host_ms
+        realized_ms = (int(m.group(2)) - int(m.group(1))) / 1e6
+        frames = len(points) + 1
+        per_frame = max(0.0, (realized_ms - slept_ms) / frames)
+        self._frame_overhead_ms = 0.7 * self._frame_overhead_ms + 0.3 * per_frame
+        return realized_ms
+
+    # ---------- InputBackend 接口 ----------
+    def tap(self, x: int, y: int, duration_ms: int):
+        info = self.info()
+        if info is None:
+            return self.fallback.tap(x, y, duration_ms)
+        try:
+            self._play(info, [(x, y)], [duration_ms])
+        except Exception as e:
+            print(f"[sendevent] 点击异常，改用 input 命令: {e}")
+            self.fallback.tap(x, y, duration_ms)
+
+    def key(self, keycode: int):
+        # 按键由键盘设备产生，这里不模拟，直接使用 input keyevent
+        self.fallback.key(keycode)
+
+    def swipe_chain(
+        self,
+        points: List[Tuple[int, int]],
+        durations_ms: List[int],
+        device_playback: bool = False,
+    ) -> Optional[float]:
+        if len(points) < 2:
+            return None
+        info = self.info()
+        if info is None:
+            return self.fallback.swipe_chain(points, durations_ms, device_playback)
+        # 按下后极短的接触时间，之后每个移动点后等待对应的段耗时
+        waits = [random.uniform(5, 10)] + list(durations_ms)
+        try:
+            return self._play(info, points, waits)
+        except Exception as e:
+            print(f"[sendevent] 滑动异常: {e}")
+            return None
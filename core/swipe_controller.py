@@ -3,48 +3,15 @@
 #   2025年12月 终极核弹级拟人滑动（Flick专用版）
 #   解决：兼容长距离滑动，消除末端停顿，模拟手指“甩动”离屏时的非零速度
 # =======================================================================
-import math
 import random
-import re
-import subprocess
-import time
 from typing import List, Tuple, Optional, Dict, Any
 
-from config import si
-from utils.helpers import run_adb
+import numpy as np
 
-
-# ---------- 三阶贝塞尔曲线 ----------
-def cubic_bezier(
-    p0: Tuple[int, int],
-    p1: Tuple[float, float],
-    p2: Tuple[float, float],
-    p3: Tuple[int, int],
-    t: float,
-) -> Tuple[float, float]:
-    u = 1 - t
-    x = u**3 * p0[0] + 3 * u**2 * t * p1[0] + 3 * u * t**2 * p2[0] + t**3 * p3[0]
-    y = u**3 * p0[1] + 3 * u**2 * t * p1[1] + 3 * u * t**2 * p2[1] + t**3 * p3[1]
-    return x, y
-
-
-# ---------- 智能甩动曲线 (Smart Flick) ----------
-def smart_flick(t: float) -> float:
-    """
-    智能甩动曲线。
-    数学公式：f(t) = t + A * t * (1 - t)
-
-    特点：
-    1. t=0 时，速度极快（爆发力）。
-    2. t=1 时，速度依然 > 0（关键！）。
-    3. 这模拟了手指在克服摩擦力后，带着动能离开屏幕的过程。
-
-    相比 EaseOutCubic/Quint 在 t=1 时速度归零，这个函数能彻底根治“停顿感”。
-    """
-    # 系数 0.5 决定了曲线的弯曲程度。
-    # 0.5 意味着起步速度是匀速的 1.5 倍，结束速度是匀速的 0.5 倍。
-    # 保证了“前快后慢”但“绝不停止”。
-    return t + 0.5 * t * (1 - t)
+from utils.metrics import METRICS
+from .device_info import DEFAULT_SIZE, DEVICE_INFO, display_size
+from .input_backends import get_input_backend
+from .trajectory import SwipePlan, generate_paths
 
 
 class HumanSwipeController:
@@ -53,6 +20,9 @@ class HumanSwipeController:
         self.device = device_serial
         self.width: Optional[int] = None
         self.height: Optional[int] = None
+        self._rng = np.random.default_rng()
+        # True 时整条滑动脚本交给设备端按时回放 (见 ShellInputBackend)
+        self.device_playback = False
 
     def _base_cmd(self) -> List[str]:
         cmd = [self.adb]
@@ -62,55 +32,62 @@ class HumanSwipeController:
 
     def update_device_size(self, allow_fallback: bool = True) -> Tuple[int, int]:
         try:
-            proc = run_adb(self.adb, ["shell", "wm", "size"])
-            m = re.search(r"(\d+)\s*x\s*(\d+)", proc.stdout.strip())
-            if m:
-                self.width, self.height = int(m.group(1)), int(m.group(2))
-            else:
-                self.width, self.height = 1080, 2400
+            if not self.device:
+                raise RuntimeError("没有目标滑动设备")
+            self.width, self.height = display_size(DEVICE_INFO.get(self.adb, self.device))
         except Exception:
-            self.width, self.height = 1080, 2400
+            self.width, self.height = DEFAULT_SIZE
         return self.width, self.height
 
+    def reset_device_size(self):
+        """设备重新连接后调用：下次使用时重新读取设备信息 (断开时已标记过期，会重新查询)。"""
+        self.width = self.height = None
+
+    def sync_orientation(self, landscape: bool):
+        """与 AdbController.sync_orientation 相同：截图窗口的横竖方向与缓存不一致时 (设备旋转) 刷新分辨率。"""
+        if not self.device:
+            return
+        try:
+            info = DEVICE_INFO.check_orientation(self.adb, self.device, landscape)
+            self.width, self.height = display_size(info)
+        except Exception:
+            pass
+
     def pct_to_px(self, pct: Tuple[float, float]) -> Tuple[int, int]:
         if self.width is None or self.height is None:
             self.update_device_size()
         return int(pct[0] * self.width), int(pct[1] * self.height)
 
-    def adb_swipe_chain(self, points: List[Tuple[int, int]], durations_ms: List[int]):
+    def device_size(self) -> Tuple[int, int]:
+        if self.width is None or self.height is None:
+            self.update_device_size()
+        return self.width, self.height
+
+    def adb_swipe_chain(
+        self, points: List[Tuple[int, int]], durations_ms: List[int]
+    ) -> Optional[float]:
+        """执行滑动，返回实际耗时 (ms)；失败时返回 None。少于 2 个点时无需滑动，返回 0。"""
         if len(points) < 2:
+            return 0.0
+        # 与 AdbController 共用同一个设备输入后端
+        backend = get_input_backend(self.adb, self.device)
+        return backend.swipe_chain(points, durations_ms, self.device_playback)
+
+    def _swipe(self, points: List[Tuple[int, int]], durations_ms: List[int]) -> Optional[float]:
+        realized_ms = self.adb_swipe_chain(points, durations_ms)
+        if len(points) >= 2:
+            # 退化轨迹 (去重后不足 2 个点) 没有真正滑动，不计入统计
+            self._record_swipe(sum(durations_ms), realized_ms)
+        return realized_ms
+
+    def _record_swipe(self, planned_ms: float, realized_ms: Optional[float]):
+        if realized_ms is None:
+            METRICS.inc("swipe_failures", device=self.device)
             return
-        base = self._base_cmd()
-        try:
-            with subprocess.Popen(
-                base + ["shell"],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                startupinfo=si,
-                text=True,
-                encoding="utf-8",
-            ) as p:
-                x, y = points[0]
-                # Down: 几乎无延迟，模拟一触即发
-                p.stdin.write(f"input touchscreen motionevent DOWN {x} {y}\n")
-                p.stdin.flush()
-                # 极短的接触时间，避免被识别为长按
-                time.sleep(random.uniform(0.005, 0.01))
-
-                for (x, y), dur_ms in zip(points[1:], durations_ms):
-                    p.stdin.write(f"input touchscreen motionevent MOVE {x} {y}\n")
-                    p.stdin.flush()
-                    if dur_ms > 0:
-                        time.sleep(dur_ms / 1000.0)
-
-                # Up: 直接抬起，不等待，保留残影速度
-                p.stdin.write(f"input touchscreen motionevent UP {x} {y}\n")
-                p.stdin.flush()
-                p.stdin.close()
-                p.wait(timeout=2.0)
-        except Exception as e:
-            print(f"[滑动器] motionevent 异常: {e}")
+        METRICS.observe("swipe_planned_ms", planned_ms, device=self.device)
+        METRICS.observe("swipe_realized_ms", realized_ms, device=self.device)
+        # 实际耗时与计划耗时之差 (绝对值)，反映回放的计时精度
+        METRICS.observe("swipe_drift_ms", abs(realized_ms - planned_ms), device=self.device)
 
     def human_swipe_pct(
         self,
@@ -128,52 +105,31 @@ class HumanSwipeController:
         p0 = self.pct_to_px(start_pct)
         p3 = self.pct_to_px(end_pct)
 
-        # 稍微减小偏移，让长距离滑动更稳定
-        offset_scale = 60 + jitter * 10
-        mid_x = (p0[0] + p3[0]) / 2
+        # 向量化计算整条轨迹 (稍微减小偏移，让长距离滑动更稳定；
+        # 使用智能甩动曲线，确保 t=1 时依然有斜率；坐标去重防止卡顿)
+        points, durations = generate_paths(
+            [p0], [p3], [duration_ms], jitter, [steps], self._rng
+        )[0]
 
-        p1 = (
-            mid_x + random.uniform(-offset_scale, offset_scale),
-            p0[1] + random.uniform(-offset_scale * 0.8, offset_scale * 0.2),
-        )
-        p2 = (
-            mid_x + random.uniform(-offset_scale, offset_scale),
-            p3[1] + random.uniform(-offset_scale * 0.4, offset_scale * 0.6),
-        )
-
-        points = [p0]
-        durations = []
-        last_t = 0.0
-        total_duration = float(duration_ms)
-
-        last_pt_int = (int(p0[0]), int(p0[1]))
-
-        for i in range(1, steps + 1):
-            t_raw = i / steps
-
-            # 使用智能甩动曲线，确保 t=1 时依然有斜率（速度）
-            t_eased = smart_flick(t_raw)
-
-            pt = cubic_bezier(p0, p1, p2, p3, t_eased)
-            curr_pt_int = (int(pt[0]), int(pt[1]))
-
-            # 坐标去重：这是防止卡顿的第二道防线
-            if curr_pt_int == last_pt_int:
-                continue
-
-            points.append(curr_pt_int)
-
-            step_dur = total_duration * (t_eased - last_t)
-            durations.append(max(1, int(step_dur)))
-
-            last_t = t_eased
-            last_pt_int = curr_pt_int
-
-        self.adb_swipe_chain(points, durations)
+        realized_ms = self._swipe(points, durations)
 
         return {
             "segments": len(durations),
             "duration_ms": sum(durations),
+            "realized_ms": round(realized_ms) if realized_ms is not None else None,
             "start": start_pct,
             "end": end_pct,
         }
+
+    def execute_plan(self, plan: SwipePlan) -> Dict[str, Any]:
+        """执行一条预先生成的滑动计划 (来自 TrajectoryPool)。"""
+        if not self.device:
+            raise RuntimeError("没有目标滑动设备")
+        realized_ms = self._swipe(plan.points, plan.durations)
+        return {
+            "segments": len(plan.durations),
+            "duration_ms": sum(plan.durations),
+            "realized_ms": round(realized_ms) if realized_ms is not None else None,
+            "start": plan.start_pct,
+            "end": plan.end_pct,
+        }
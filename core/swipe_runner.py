@@ -9,41 +9,62 @@ import random
 import time
 from typing import Dict, Any, Optional
 
-from PyQt6.QtCore import QObject, pyqtSignal, QTimer
+import numpy as np
 
 from config import ID_TO_NAME, IMAGE_FOLDER_SWIPER_GATE
-from utils.helpers import get_window_region, find_image_with_opencv
+from utils.frame_bus import FRAME_BUS, FrameSubscription
+from utils.helpers import get_window_region
+from utils.matcher import TemplateMatcher
+from utils.recorder import RECORDER, describe_match
+from utils.task_pool import TASK_POOL
+from utils.vision import PreparedFrame
+from .events import EventLoop, Signal, Timer
 from .swipe_controller import HumanSwipeController
+from .trajectory import TrajectoryPool
 from .image_detector import ImageDetector
 
 
-class SwipeRunner(QObject):
-    log_message = pyqtSignal(str)
-    status_updated = pyqtSignal(str)
-    countdown_updated = pyqtSignal(str)
-    stopped = pyqtSignal()
-    started = pyqtSignal()
+class SwipeRunner:
+    """
+    滑动调度器。调度状态只在 loop (事件循环) 线程中修改：
+    start/stop/set_device_online/interrupt_countdown 应在该线程中调用 (或通过 loop.bind 连接)，
+    后台线程中的滑动和启动门检测结果经由内部信号投递回来。
+    """
 
-    swipe_finished = pyqtSignal(dict)
-    error_occurred = pyqtSignal(str)
+    log_message = Signal(str)
+    status_updated = Signal(str)
+    countdown_updated = Signal(str)
+    stopped = Signal()
+    started = Signal()
+
+    swipe_finished = Signal(dict)
+    error_occurred = Signal(str)
+    # 启动门检测在后台线程完成后的结果 (是否通过, 是否为中断触发)
+    gate_checked = Signal(bool, bool)
 
     def __init__(
-        self, controller: HumanSwipeController, detector: Optional[ImageDetector]
+        self, controller: HumanSwipeController, detector: Optional[ImageDetector], loop: EventLoop
     ):
-        super().__init__()
+        self.loop = loop
         self.ctrl = controller
         self.detector = detector
         self._running = False
         self.remaining_time = 0
         self.swipe_count = 0
         self.params = {}
+        self._gate_frames: Optional[FrameSubscription] = None
+        self._gate_matcher = TemplateMatcher()
+        self._trajectories: Optional[TrajectoryPool] = None
+        # 目标设备是否在线 (由设备监听器更新)；离线时循环暂停而不是停止
+        self._device_online = True
+        self._device_drops = 0
+        self._gate_pending = False
 
-        self.countdown_timer = QTimer()
-        self.countdown_timer.setInterval(1000)
-        self.countdown_timer.timeout.connect(self._update_countdown)
+        self.countdown_timer = Timer(loop, 1000, self._update_countdown)
 
-        self.swipe_finished.connect(self._on_swipe_done)
-        self.error_occurred.connect(self._on_swipe_error)
+        self.swipe_finished.connect(loop.bind(self._on_swipe_done))
+        self.error_occurred.connect(loop.bind(self._on_swipe_error))
+        self.gate_checked.connect(loop.bind(self._on_gate_checked))
 
     def start(self, params: Dict[str, Any], window_title: str):
         if self._running:
@@ -56,7 +77,11 @@ class SwipeRunner(QObject):
         self.params["window_title"] = window_title  # 存储窗口标题供后续使用
         device_name = ID_TO_NAME.get(self.ctrl.device, self.ctrl.device[-8:])
         self._running = True
+        self._device_online = True
         self.swipe_count = 0
+        self.ctrl.device_playback = self.params.get("device_playback", False)
+        # 按当前配置在后台预生成随机轨迹，滑动时直接取用
+        self._trajectories = TrajectoryPool(self.params, self.ctrl.device_size)
         self.log_message.emit(f"[滑动器] 已启动循环滑动，目标: {device_name}")
         self.started.emit()
         # 立即执行第一次滑动，而不是先等待
@@ -67,7 +92,13 @@ class SwipeRunner(QObject):
             return
         self._running = False
         self.countdown_timer.stop()
-        QTimer.singleShot(0, self.stop_related_timers) # 确保所有定时器都被停止
+        if self._gate_frames is not None:
+            self._gate_frames.close()
+            self._gate_frames = None
+        if self._trajectories is not None:
+            self._trajectories.close()
+            self._trajectories = None
+        self.loop.post(self.stop_related_timers) # 确保所有定时器都被停止
         self.status_updated.emit(f"状态：已停止 (共 {self.swipe_count} 次)")
         self.countdown_updated.emit("下次循环倒计时：-- 秒")
         self.log_message.emit("[滑动器] 循环滑动已停止")
@@ -79,22 +110,56 @@ class SwipeRunner(QObject):
         # 但保留这个结构以备将来扩展更复杂的定时器。
         pass
 
-    def interrupt_countdown(self):
+    def set_device_online(self, online: bool):
+        """目标设备断开时暂停循环，重新连接后按正常间隔继续。"""
+        if online == self._device_online:
+            return
+        self._device_online = online
+        if not online:
+            self._device_drops += 1
+        else:
+            # 重新连接的可能是分辨率/方向不同的设备状态：重新读取尺寸并丢弃按旧尺寸预生成的轨迹
+            self.ctrl.reset_device_size()
+            if self._trajectories is not None:
+                self._trajectories.close()
+                self._trajectories = TrajectoryPool(self.params, self.ctrl.device_size)
         if not self._running:
             return
+        if not online:
+            self.countdown_timer.stop()
+            self.status_updated.emit(f"状态：设备已断开，已暂停 — 次数 {self.swipe_count}")
+            self.countdown_updated.emit("下次循环倒计时：--")
+            self.log_message.emit("[滑动器] 目标设备已断开，循环已暂停。")
+        else:
+            self.log_message.emit("[滑动器] 目标设备已重新连接，恢复循环。")
+            self._schedule_next_swipe(is_interrupted=False)
+
+    def interrupt_countdown(self):
+        if not self._running or not self._device_online:
+            return
         self.countdown_timer.stop()
         self.log_message.emit("[滑动器] 接收到P1图像检测中断信号，立即缩短间隔...")
         self._schedule_next_swipe(is_interrupted=True)
 
-    def _check_for_gate_image(self) -> bool:
-        """检查P1启动条件的图像是否存在。"""
+    def _gate_subscription(self) -> Optional[FrameSubscription]:
+        """
+        启动门使用的帧订阅，只在 loop 线程中创建/替换 (关闭由 stop 负责，同在 loop 线程)，
+        再交给后台任务使用，避免后台线程在 stop 之后重新订阅而泄漏截图线程。
+        """
         window_title = self.params.get("window_title")
         if not window_title:
-            return True  # 如果没有窗口标题，无法检测，默认通过
+            return None
+        if self._gate_frames is None or self._gate_frames.window_title != window_title:
+            if self._gate_frames is not None:
+                self._gate_frames.close()
+            self._gate_frames = FRAME_BUS.subscribe(window_title, interval=1.5)
+        return self._gate_frames
 
-        region = get_window_region(window_title)
-        if not region:
-            return False  # 窗口不存在，视为不满足条件
+    def _check_for_gate_image(self, frames: Optional[FrameSubscription]) -> bool:
+        """检查P1启动条件的图像是否存在 (在后台任务池中执行)。"""
+        if frames is None:
+            return True  # 如果没有窗口标题，无法检测，默认通过
+        window_title = frames.window_title
 
         confidence = self.params.get("confidence", 0.8)
 
@@ -102,24 +167,58 @@ class SwipeRunner(QObject):
         image_list = list(IMAGE_FOLDER_SWIPER_GATE.glob("*.png"))
         if not image_list: return True
 
-        for img_path in image_list:
-            if find_image_with_opencv(str(img_path), confidence=confidence, region=region):
-                return True
-        return False
+        # 从共享帧总线读取最新帧，与P1检测器/狩猎器共用同一个截图线程
+        frame = frames.latest()
+        if frame is None or frame.image is None:
+            return False  # 窗口不存在 (或尚未截到第一帧)，视为不满足条件
+
+        pyramid = self.params.get("pyramid_enabled", False)
+        prepared = PreparedFrame(frame.image)
+        paths = [str(p) for p in image_list]
+        hit = self._gate_matcher.find_first(
+            prepared, paths, confidence=confidence, region=frame.region, pyramid=pyramid
+        )
+        if RECORDER.active:
+            RECORDER.record(
+                "match", source="gate", window=window_title, seq=frame.seq, evaluated=True,
+                templates=RECORDER.record_templates("gate", [(p, "") for p in paths]),
+                conf=confidence, pyramid=pyramid, change_threshold=0,
+                found=hit is not None, result=describe_match((hit[1], paths[hit[0]], "") if hit else None),
+            )
+        return hit is not None
 
     def _schedule_next_swipe(self, is_interrupted: bool = False):
-        if not self._running:
+        if not self._running or not self._device_online:
             return
 
         is_gate_enabled = self.params.get("p1_start_condition_enabled", False)
         if is_gate_enabled:
-            if not self._check_for_gate_image():
-                self.status_updated.emit("状态：等待P1启动门图像...")
-                self.countdown_updated.emit("下次循环倒计时：--")
-                # 条件不满足，1.5秒后再次尝试调度
-                QTimer.singleShot(1500, lambda: self._schedule_next_swipe(is_interrupted=False))
+            # 截图和模板匹配放到后台任务池，结果通过 gate_checked 信号回到界面线程
+            if self._gate_pending:
                 return
+            self._gate_pending = True
+            future = TASK_POOL.submit("P1启动门检测", self._check_for_gate_image, self._gate_subscription())
+            future.add_done_callback(
+                lambda f: self.gate_checked.emit(
+                    not f.cancelled() and f.exception() is None and f.result(), is_interrupted
+                )
+            )
+            return
+        self._start_countdown(is_interrupted)
 
+    def _on_gate_checked(self, passed: bool, is_interrupted: bool):
+        self._gate_pending = False
+        if not self._running or not self._device_online:
+            return
+        if not passed:
+            self.status_updated.emit("状态：等待P1启动门图像...")
+            self.countdown_updated.emit("下次循环倒计时：--")
+            # 条件不满足，1.5秒后再次尝试调度
+            self.loop.call_later(1.5, lambda: self._schedule_next_swipe(is_interrupted=False))
+            return
+        self._start_countdown(is_interrupted)
+
+    def _start_countdown(self, is_interrupted: bool):
         try:
             min_interval, max_interval = (self.params["interval_min"], self.params["interval_max"])
             is_detection_enabled = self.params["detection_enabled"]
@@ -154,6 +253,8 @@ class SwipeRunner(QObject):
             self.remaining_time -= 1
 
     def _do_swipe(self):
+        if self._running and not self._device_online:
+            return  # 已暂停，设备重新连接后由 set_device_online 恢复
         if not self._running or not self.ctrl.device:
             self.log_message.emit("[滑动器] 滑动失败: 目标设备已断开或未选中。")
             self.stop()
@@ -162,25 +263,28 @@ class SwipeRunner(QObject):
 
     def _run_swipe_in_thread(self):
         try:
-            p = self.params
-            start_x, start_y, end_x, end_y = (p["start_x"], p["start_y"], p["end_x"], p["end_y"])
-            max_offset = p["coord_offset"] / 100.0
-
-            start_pct = (
-                max(0.0, min(1.0, start_x + random.uniform(-max_offset, max_offset))),
-                max(0.0, min(1.0, start_y + random.uniform(-max_offset, max_offset))),
-            )
-            end_pct = (
-                max(0.0, min(1.0, end_x + random.uniform(-max_offset, max_offset))),
-                max(0.0, min(1.0, end_y + random.uniform(-max_offset, max_offset))),
-            )
-
-            duration_ms = random.randint(p["duration_min"], p["duration_max"])
-            res = self.ctrl.human_swipe_pct(
-                start_pct, end_pct, duration_ms, p["jitter"], p["steps_min"], p["steps_max"]
-            )
+            pool = self._trajectories
+            if pool is None:
+                return
+            # 与狩猎器一致：投屏窗口横竖变化说明设备已旋转，先按新方向刷新分辨率再取轨迹
+            window_title = self.params.get("window_title")
+            region = get_window_region(window_title) if window_title else None
+            if region is not None:
+                self.ctrl.sync_orientation(region[2] > region[3])
+            plan = pool.take()
+            if RECORDER.active:
+                RECORDER.record(
+                    "swipe", source="runner", device=self.ctrl.device, count=self.swipe_count,
+                    start_pct=plan.start_pct, end_pct=plan.end_pct,
+                    points=np.asarray(plan.points), durations=np.asarray(plan.durations),
+                )
+            res = self.ctrl.execute_plan(plan)
+            if RECORDER.active:
+                RECORDER.record("swipe_result", source="runner", device=self.ctrl.device, result=res)
             self.swipe_finished.emit(res)
         except Exception as e:
+            if RECORDER.active:
+                RECORDER.record("swipe_result", source="runner", device=self.ctrl.device, error=str(e))
             self.error_occurred.emit(str(e))
 
     def _on_swipe_done(self, result: dict):
@@ -192,4 +296,12 @@ class SwipeRunner(QObject):
 
     def _on_swipe_error(self, error_message: str):
         self.log_message.emit(f"[滑动器] 滑动操作异常: {error_message}")
-        self.stop()
\ No newline at end of file
+        if not self._device_online:
+            return  # 设备断开引起的异常，保持暂停
+        # 设备断开的通知可能比滑动异常晚到一点，稍等再决定是否停止
+        drops = self._device_drops
+        self.loop.call_later(2.0, lambda: self._stop_unless_device_dropped(drops))
+
+    def _stop_unless_device_dropped(self, drops: int):
+        if self._running and self._device_drops == drops:
+            self.stop()
\ No newline at end of file
@@ -0,0 +1,214 @@
+# core/trajectory.py
+# =======================================================================
+#
+#        全功能控制器 - 向量化滑动轨迹引擎
+#        用 NumPy 一次生成整批贝塞尔/甩动轨迹，并提供后台预生成的轨迹池
+#
+# =======================================================================
+import threading
+from collections import deque, namedtuple
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# 一条完整的滑动计划：起止百分比坐标、像素路径点 (含起点) 及每段耗时 (ms)
+SwipePlan = namedtuple(
+    "SwipePlan", ["start_pct", "end_pct", "points", "durations", "size"]
+)
+
+# 甩动曲线的弯曲程度：起步速度是匀速的 1 + A 倍，结束速度是匀速的 1 - A 倍
+FLICK_COEFFICIENT = 0.5
+
+
+def smart_flick_np(t: np.ndarray) -> np.ndarray:
+    """
+    智能甩动曲线 f(t) = t + A * t * (1 - t)，对整个数组计算。
+    t=0 时速度极快 (爆发力)，t=1 时速度依然 > 0，模拟手指带着动能离开屏幕；
+    相比 EaseOutCubic/Quint 在 t=1 时速度归零，不会产生末端停顿。
+    """
+    return t + FLICK_COEFFICIENT * t * (1 - t)
+
+
+def _bezier(p0, p1, p2, p3, t):
+    # p* 形状为 (n, 1, 2)，t 形状为 (1, s, 1)，结果为 (n, s, 2)
+    u = 1 - t
+    return u**3 * p0 + 3 * u**2 * t * p1 + 3 * u * t**2 * p2 + t**3 * p3
+
+
+def generate_paths(
+    p0s: np.ndarray,
+    p3s: np.ndarray,
+    durations_ms: np.ndarray,
+    jitter: int,
+    steps: np.ndarray,
+    rng: np.random.Generator,
+) -> List[Tuple[List[Tuple[int, int]], List[int]]]:
+    """
+    批量生成轨迹。p0s/p3s 为 (n, 2) 的整数像素坐标，durations_ms/steps 为 (n,)。
+    返回 [(points, durations), ...]，与逐点计算的 human_swipe_pct 结果规则一致：
+    - 相邻重复的整数坐标会被去掉，其耗时并入下一个保留点；
+    - 使用 smart_flick_np 缓动，终点处速度不为零。
+    """
+    p0s = np.asarray(p0s, dtype=np.int64).reshape(-1, 2)
+    p3s = np.asarray(p3s, dtype=np.int64).reshape(-1, 2)
+    durations_ms = np.asarray(durations_ms, dtype=np.float64).reshape(-1)
+    steps = np.asarray(steps, dtype=np.int64).reshape(-1)
+    n = len(p0s)
+
+    # 控制点：与原实现相同的随机偏移范围
+    offset_scale = 60 + jitter * 10
+    mid_x = (p0s[:, 0] + p3s[:, 0]) / 2
+    p1s = np.stack(
+        [
+            mid_x + rng.uniform(-offset_scale, offset_scale, n),
+            p0s[:, 1] + rng.uniform(-offset_scale * 0.8, offset_scale * 0.2, n),
+        ],
+        axis=1,
+    )
+    p2s = np.stack(
+        [
+            mid_x + rng.uniform(-offset_scale, offset_scale, n),
+            p3s[:, 1] + rng.uniform(-offset_scale * 0.4, offset_scale * 0.6, n),
+        ],
+        axis=1,
+    )
+
+    results: List[Optional[Tuple[List[Tuple[int, int]], List[int]]]] = [None] * n
+    # 步数相同的轨迹一起计算
+    for step_count in np.unique(steps):
+        idx = np.nonzero(steps == step_count)[0]
+        t_eased = smart_flick_np(np.arange(1, step_count + 1) / step_count)
+        pts = _bezier(
+            p0s[idx, None, :].astype(np.float64),
+            p1s[idx, None, :],
+            p2s[idx, None, :],
+            p3s[idx, None, :].astype(np.float64),
+            t_eased[None, :, None],
+        ).astype(np.int64)  # 与 int() 一样向零截断
+        # 在最前面拼上起点，便于和前一个点比较做去重
+        full = np.concatenate([p0s[idx, None, :], pts], axis=1)
+        keep = np.any(full[:, 1:] != full[:, :-1], axis=2)
+
+        for row, i in enumerate(idx):
+            kept = keep[row]
+            kept_t = t_eased[kept]
+            prev_t = np.concatenate([[0.0], kept_t[:-1]])
+            durs = np.maximum(
+                1, (durations_ms[i] * (kept_t - prev_t)).astype(np.int64)
+            )
+            points = [tuple(p) for p in full[row, 0:1].tolist()] + [
+                tuple(p) for p in pts[row][kept].tolist()
+            ]
+            results[i] = (points, durs.tolist())
+    return results
+
+
+def plan_swipes(
+    params: Dict[str, Any],
+    size: Tuple[int, int],
+    count: int,
+    rng: np.random.Generator,
+) -> List[SwipePlan]:
+    """按滑动器配置批量生成完整的滑动计划 (含起止点随机偏移、时长和步数)。"""
+    width, height = size
+    max_offset = params["coord_offset"] / 100.0
+    start = np.clip(
+        np.array([params["start_x"], params["start_y"]])
+        + rng.uniform(-max_offset, max_offset, (count, 2)),
+        0.0,
+        1.0,
+    )
+    end = np.clip(
+        np.array([params["end_x"], params["end_y"]])
+        + rng.uniform(-max_offset, max_offset, (count, 2)),
+        0.0,
+        1.0,
+    )
+    scale = np.array([width, height], dtype=np.float64)
+    p0s = (start * scale).astype(np.int64)
+    p3s = (end * scale).astype(np.int64)
+    durations = rng.integers(
+        params["duration_min"], max(params["duration_min"], params["duration_max"]) + 1, count
+    )
+    steps = rng.integers(
+        params["steps_min"], max(params["steps_min"], params["steps_max"]) + 1, count
+    )
+    paths = generate_paths(p0s, p3s, durations, params["jitter"], steps, rng)
+    return [
+        SwipePlan(
+            tuple(start[i].tolist()), tuple(end[i].tolist()), points, durs, size
+        )
+        for i, (points, durs) in enumerate(paths)
+    ]
+
+
+class TrajectoryPool:
+    """
+    按配置预生成随机轨迹的池子，后台线程在余量不足时整批补充。
+    设备分辨率变化后，旧尺寸的轨迹在取出时被丢弃。
+    """
+
+    def __init__(self, params: Dict[str, Any], size_getter, capacity: int = 32):
+        self.params = dict(params)
+        self._size_getter = size_getter
+        self.capacity = capacity
+        self.low_water = max(1, capacity // 4)
+        self._plans: Deque[SwipePlan] = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._rng = np.random.default_rng()
+        self.generated = 0
+        self.served = 0
+        self.misses = 0
+        self._thread = threading.Thread(
+            target=self._refill_loop, daemon=True, name="TrajectoryPool"
+        )
+        self._thread.start()
+
+    def take(self) -> SwipePlan:
+        size = self._size_getter()
+        with self._lock:
+            while self._plans and self._plans[0].size != size:
+                self._plans.popleft()
+            plan = self._plans.popleft() if self._plans else None
+            remaining = len(self._plans)
+        if remaining <= self.low_water:
+            self._wake.set()
+        if plan is not None:
+            self.served += 1
+            return plan
+        # 池子暂时为空：当场生成一条
+        self.misses += 1
+        return plan_swipes(self.params, size, 1, np.random.default_rng())[0]
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pooled = len(self._plans)
+        return {
+            "pooled": pooled,
+            "generated": self.generated,
+            "served": self.served,
+            "misses": self.misses,
+        }
+
+    def _refill_loop(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+            with self._lock:
+                missing = self.capacity - len(self._plans)
+            if missing > 0:
+                try:
+                    plans = plan_swipes(
+                        self.params, self._size_getter(), missing, self._rng
+                    )
+                except Exception:
+                    plans = []
+                with self._lock:
+                    self._plans.extend(plans)
+                self.generated += len(plans)
+            self._wake.wait()
@@ -0,0 +1,77 @@
+# core/warmup.py
+# =======================================================================
+#
+#        全功能控制器 - 启动后的后台预热
+#        窗口显示之后在后台加载 OpenCV/截图库、解码模板图片、读取已连接设备的信息，
+#        第一次检测/滑动时不再临时等待
+#
+# =======================================================================
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import IMAGE_FOLDER_HUNTER, IMAGE_FOLDER_SWIPER, IMAGE_FOLDER_SWIPER_GATE
+from utils.helpers import get_connected_devices
+from utils.lazy_import import preload
+from utils.metrics import METRICS
+from utils.task_pool import TaskContext
+from utils.template_cache import TEMPLATE_CACHE
+from .device_info import DEVICE_INFO
+from .hunter_priority import ACTION_FOLDERS
+
+# 预热时加载的延迟导入模块
+WARM_UP_MODULES = ("cv2", "mss")
+
+
+def template_folders() -> List[Path]:
+    """P1检测器、启动门和狩猎器 a/b/c/d 各文件夹。"""
+    return [IMAGE_FOLDER_SWIPER, IMAGE_FOLDER_SWIPER_GATE] + [IMAGE_FOLDER_HUNTER / name for name in ACTION_FOLDERS]
+
+
+def warm_up(ctx: Optional[TaskContext], adb_path: str) -> Dict[str, Any]:
+    """
+    (后台线程) 依次预热依赖模块、模板缓存和设备信息，返回各部分的统计。
+    ctx 可为 None；给出时汇报进度，并在任务被取消时尽快返回。
+    """
+    started = time.perf_counter()
+    report = ctx.report if ctx is not None else (lambda text: None)
+    cancelled = ctx.cancelled.is_set if ctx is not None else (lambda: False)
+    summary: Dict[str, Any] = {"modules": {}, "templates": 0, "devices": 0}
+
+    report("加载图像处理模块...")
+    summary["modules"] = preload(*WARM_UP_MODULES)
+
+    report("解码模板图片...")
+    seen = set()
+    for folder in template_folders():
+        if cancelled() or not folder.is_dir():
+            continue
+        for path in folder.glob("*.png"):
+            # 与检测/狩猎时的路径写法一致，才能命中同一条缓存
+            key = str(path)
+            if key not in seen and TEMPLATE_CACHE.get(key) is not None:
+                seen.add(key)
+    summary["templates"] = len(seen)
+
+    if not cancelled():
+        report("读取设备信息...")
+        for serial in get_connected_devices(adb_path):
+            try:
+                DEVICE_INFO.get(adb_path, serial)
+                summary["devices"] += 1
+            except Exception:
+                pass
+
+    summary["elapsed_ms"] = (time.perf_counter() - started) * 1000.0
+    METRICS.observe("warmup_ms", summary["elapsed_ms"])
+    return summary
+
+
+def format_warm_up(summary: Dict[str, Any]) -> str:
+    modules = ", ".join(
+        f"{name} {'失败' if ms is None else f'{ms:.0f}ms'}" for name, ms in summary["modules"].items()
+    )
+    return (
+        f"后台预热完成，耗时 {summary['elapsed_ms']:.0f}ms：模块 [{modules}]，"
+        f"模板 {summary['templates']} 张，设备信息 {summary['devices']} 台。"
+    )
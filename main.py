@@ -4,18 +4,50 @@
 #        全功能控制器 (模块化版本 v6.0) - 主程序入口
 #
 # =======================================================================
+import time
+
+_STARTED = time.perf_counter()
+
+import os
 import sys
+from PyQt6.QtCore import QEvent, QObject, QTimer
 from PyQt6.QtWidgets import QApplication
 from ui.main_window import SwipeApp_PyQt
+from utils.metrics import METRICS
+
+# 设置该环境变量时，窗口首次绘制后输出启动耗时并立即退出 (供 bench/startup_bench.py 使用)
+STARTUP_PROBE_ENV = "CONTROLLER_STARTUP_PROBE"
+
+
+def set_app_user_model_id():
+    """解决Windows任务栏图标问题：设置当前进程的AppUserModelID (其他平台无需处理)。"""
+    if os.name != "nt":
+        return
+    import ctypes
+
+    # 定义一个唯一的应用程序ID，格式可以自定义，只要不冲突即可
+    myappid = "lww3716.tools.controller.1.0"
+    ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(myappid)
+
+
+class FirstPaintProbe(QObject):
+    """记录从进程启动到主窗口第一次绘制的耗时 (startup_first_paint_ms)。"""
 
-# --- ↓↓↓ 新增图标修复代码，解决Windows任务栏图标问题 ↓↓↓ ---
-import ctypes
+    def __init__(self, window, exit_after: bool):
+        super().__init__(window)
+        self.exit_after = exit_after
+        window.installEventFilter(self)
 
-# 定义一个唯一的应用程序ID，格式可以自定义，只要不冲突即可
-myappid = "lww3716.tools.controller.1.0"
-# 调用Windows API，设置当前进程的AppUserModelID
-ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(myappid)
-# --- ↑↑↑ 新增代码结束 ↑↑↑ ---
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint:
+            obj.removeEventFilter(self)
+            elapsed_ms = (time.perf_counter() - _STARTED) * 1000.0
+            METRICS.observe("startup_first_paint_ms", elapsed_ms)
+            if self.exit_after:
+                print(f"STARTUP first_paint_ms={elapsed_ms:.1f}", flush=True)
+                # exit() 不会给窗口发送关闭事件，跳过退出确认框
+                QTimer.singleShot(0, lambda: QApplication.exit(0))
+        return False
 
 
 if __name__ == "__main__":
@@ -23,7 +55,9 @@ if __name__ == "__main__":
     程序的主入口。
     它的唯一职责是创建并运行Qt应用程序和主窗口。
     """
+    set_app_user_model_id()
     app = QApplication(sys.argv)
     window = SwipeApp_PyQt()
+    probe = FirstPaintProbe(window, exit_after=bool(os.environ.get(STARTUP_PROBE_ENV)))
     window.show()
     sys.exit(app.exec())
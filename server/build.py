@@ -0,0 +1,110 @@
+# server/build.py
+# =======================================================================
+#
+#        全功能控制器 - 设备端注入服务构建脚本
+#        用 javac 编译 server/src 下的源码 (以 android.jar 作为引导类路径)，再用 d8 转成 dex，
+#        输出 app_process 可以直接加载的 jar，默认写到 config.INJECT_SERVER_JAR
+#
+# =======================================================================
+#
+# 需要 JDK (javac) 和 Android SDK (platforms/android-XX/android.jar, build-tools/XX/d8)。
+# 用法 (在仓库根目录执行):
+#     python -m server.build                          用 ANDROID_HOME/ANDROID_SDK_ROOT 中最新的 platform/build-tools
+#     python -m server.build --sdk D:\android-sdk --output build\swipe-inject-server.jar
+#
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Optional, Sequence
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import INJECT_SERVER_JAR
+
+SERVER_ROOT = Path(__file__).resolve().parent
+SOURCE_ROOT = SERVER_ROOT / "src"
+JAVA_RELEASE = "8"  # d8 支持的字节码版本，所有 Android 版本都能加载
+
+
+def _version_key(path: Path):
+    # 数字部分按数值比较；预览版等非数字部分排在同级数字之前
+    parts = path.name.replace("android-", "").replace("-", ".").split(".")
+    return [(1, int(p), "") if p.isdigit() else (0, 0, p) for p in parts]
+
+
+def _latest(folder: Path, pattern: str) -> Optional[Path]:
+    candidates = sorted(folder.glob(pattern), key=_version_key) if folder.is_dir() else []
+    return candidates[-1] if candidates else None
+
+
+def find_sdk_tools(sdk: Path):
+    """返回 (android.jar, d8 可执行文件)，找不到时抛出 FileNotFoundError。"""
+    platform = _latest(sdk / "platforms", "android-*")
+    android_jar = platform / "android.jar" if platform is not None else None
+    if android_jar is None or not android_jar.is_file():
+        raise FileNotFoundError(f"在 {sdk / 'platforms'} 中未找到 android.jar")
+    build_tools = _latest(sdk / "build-tools", "*")
+    d8 = None
+    if build_tools is not None:
+        for name in ("d8.bat", "d8") if os.name == "nt" else ("d8",):
+            if (build_tools / name).is_file():
+                d8 = build_tools / name
+                break
+    if d8 is None:
+        raise FileNotFoundError(f"在 {sdk / 'build-tools'} 中未找到 d8")
+    return android_jar, d8
+
+
+def build(sdk: Path, output: Path) -> Path:
+    android_jar, d8 = find_sdk_tools(sdk)
+    sources = [str(p) for p in SOURCE_ROOT.rglob("*.java")]
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory() as work:
+        classes = Path(work) / "classes"
+        subprocess.run(
+            ["javac", "-source", JAVA_RELEASE, "-target", JAVA_RELEASE, "-bootclasspath", str(android_jar),
+             "-encoding", "UTF-8", "-d", str(classes)] + sources,
+            check=True,
+        )
+        jar = Path(work) / "server.jar"
+        class_files = [str(p) for p in classes.rglob("*.class")]
+        subprocess.run(
+            [str(d8), "--release", "--min-api", "21", "--lib", str(android_jar), "--output", str(jar)] + class_files,
+            check=True,
+        )
+        shutil.copyfile(jar, output)
+    return output
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="构建设备端注入服务 jar")
+    parser.add_argument(
+        "--sdk", default=os.environ.get("ANDROID_HOME") or os.environ.get("ANDROID_SDK_ROOT"),
+        help="Android SDK 目录 (默认读取 ANDROID_HOME / ANDROID_SDK_ROOT)",
+    )
+    parser.add_argument("--output", default=str(INJECT_SERVER_JAR), help="输出的 jar 路径")
+    args = parser.parse_args(argv)
+
+    if not args.sdk:
+        print("[构建] 未指定 Android SDK 目录 (--sdk 或 ANDROID_HOME)。")
+        return 1
+    if shutil.which("javac") is None:
+        print("[构建] 未找到 javac，请安装 JDK 并加入 PATH。")
+        return 1
+    try:
+        output = build(Path(args.sdk), Path(args.output))
+    except (FileNotFoundError, subprocess.CalledProcessError) as e:
+        print(f"[构建] 失败: {e}")
+        return 1
+    print(f"[构建] 已生成 {output}")
+    print("[构建] 下次连接设备时会自动推送新版本并替换设备上正在运行的旧服务。")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
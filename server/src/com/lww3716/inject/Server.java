@@ -0,0 +1,161 @@
+// server/src/com/lww3716/inject/Server.java
+// =======================================================================
+//
+//        全功能控制器 - 设备端常驻注入服务
+//        由 app_process 以 shell 用户启动 (与 scrcpy server 相同)，监听 abstract unix socket，
+//        按 core/inject_server.py 中的协议接收触摸/按键事件并通过 InputManager 注入
+//
+// =======================================================================
+//
+// 启动: CLASSPATH=/data/local/tmp/swipe-inject-server.jar app_process / com.lww3716.inject.Server swipe_inject
+//
+// 协议 (大端序，与 core/inject_server.py 一致):
+//     连接建立后服务端先发送 4 字节魔数 "SINJ"
+//     TOUCH (1): u8 type, u8 action (0=DOWN 1=UP 2=MOVE), i32 x, i32 y, u16 delay_ms
+//                等待 delay_ms 后在 (x, y) 注入触摸事件
+//     KEY   (2): u8 type, i32 keycode，注入 DOWN + UP
+//     SYNC  (3): u8 type, u32 token -> 回复 u8 type, u32 token, u32 自上次 DOWN 起的微秒数
+//                之前的事件全部注入完毕后才回复
+//     未知类型: 断开连接
+//
+package com.lww3716.inject;
+
+import android.net.LocalServerSocket;
+import android.net.LocalSocket;
+import android.os.SystemClock;
+import android.view.InputDevice;
+import android.view.InputEvent;
+import android.view.KeyCharacterMap;
+import android.view.KeyEvent;
+import android.view.MotionEvent;
+
+import java.io.BufferedInputStream;
+import java.io.DataInputStream;
+import java.io.DataOutputStream;
+import java.io.EOFException;
+import java.io.IOException;
+import java.lang.reflect.Method;
+
+public final class Server {
+
+    private static final byte[] PROTOCOL_MAGIC = {'S', 'I', 'N', 'J'};
+    private static final int MSG_TOUCH = 1;
+    private static final int MSG_KEY = 2;
+    private static final int MSG_SYNC = 3;
+    private static final int ACTION_DOWN = 0;
+    private static final int ACTION_UP = 1;
+    private static final int ACTION_MOVE = 2;
+
+    // InputManager.INJECT_INPUT_EVENT_MODE_ASYNC (隐藏常量)
+    private static final int INJECT_MODE_ASYNC = 0;
+
+    private final Object inputManager;
+    private final Method injectInputEvent;
+    private long downTime;
+    private long lastDownNanos;
+
+    private Server() throws ReflectiveOperationException {
+        // Android 14 起 injectInputEvent 移到了 InputManagerGlobal，旧版本在 InputManager 上
+        Class<?> cls;
+        try {
+            cls = Class.forName("android.hardware.input.InputManagerGlobal");
+        } catch (ClassNotFoundException e) {
+            cls = Class.forName("android.hardware.input.InputManager");
+        }
+        inputManager = cls.getDeclaredMethod("getInstance").invoke(null);
+        injectInputEvent = cls.getMethod("injectInputEvent", InputEvent.class, int.class);
+    }
+
+    private void inject(InputEvent event) throws IOException {
+        try {
+            injectInputEvent.invoke(inputManager, event, INJECT_MODE_ASYNC);
+        } catch (ReflectiveOperationException e) {
+            throw new IOException("注入事件失败: " + e);
+        }
+    }
+
+    private void touch(int action, int x, int y) throws IOException {
+        long now = SystemClock.uptimeMillis();
+        int motionAction;
+        if (action == ACTION_DOWN) {
+            downTime = now;
+            lastDownNanos = System.nanoTime();
+            motionAction = MotionEvent.ACTION_DOWN;
+        } else if (action == ACTION_UP) {
+            motionAction = MotionEvent.ACTION_UP;
+        } else {
+            motionAction = MotionEvent.ACTION_MOVE;
+        }
+        MotionEvent event = MotionEvent.obtain(
+                downTime, now, motionAction, x, y, action == ACTION_UP ? 0f : 1f, 1f, 0, 1f, 1f, 0, 0);
+        event.setSource(InputDevice.SOURCE_TOUCHSCREEN);
+        try {
+            inject(event);
+        } finally {
+            event.recycle();
+        }
+    }
+
+    private void key(int keycode) throws IOException {
+        long now = SystemClock.uptimeMillis();
+        for (int action : new int[] {KeyEvent.ACTION_DOWN, KeyEvent.ACTION_UP}) {
+            inject(new KeyEvent(now, now, action, keycode, 0, 0,
+                    KeyCharacterMap.VIRTUAL_KEYBOARD, 0, 0, InputDevice.SOURCE_KEYBOARD));
+        }
+    }
+
+    private void serve(LocalSocket socket) throws IOException {
+        DataInputStream in = new DataInputStream(new BufferedInputStream(socket.getInputStream()));
+        DataOutputStream out = new DataOutputStream(socket.getOutputStream());
+        out.write(PROTOCOL_MAGIC);
+        out.flush();
+        lastDownNanos = 0;
+        while (true) {
+            int type = in.readUnsignedByte();
+            if (type == MSG_TOUCH) {
+                int action = in.readUnsignedByte();
+                int x = in.readInt();
+                int y = in.readInt();
+                int delayMs = in.readUnsignedShort();
+                if (delayMs > 0) {
+                    SystemClock.sleep(delayMs);
+                }
+                touch(action, x, y);
+            } else if (type == MSG_KEY) {
+                key(in.readInt());
+            } else if (type == MSG_SYNC) {
+                int token = in.readInt();
+                long elapsedUs = lastDownNanos != 0 ? (System.nanoTime() - lastDownNanos) / 1000 : 0;
+                out.writeByte(MSG_SYNC);
+                out.writeInt(token);
+                out.writeInt((int) Math.min(elapsedUs, 0xFFFFFFFFL));
+                out.flush();
+            } else {
+                return; // 未知消息，断开连接
+            }
+        }
+    }
+
+    public static void main(String[] args) throws Exception {
+        String socketName = args.length > 0 ? args[0] : "swipe_inject";
+        Server server = new Server();
+        LocalServerSocket listener;
+        try {
+            listener = new LocalServerSocket(socketName);
+        } catch (IOException e) {
+            // 同名 socket 已被占用：之前启动的服务仍在运行，直接退出
+            System.err.println("socket " + socketName + " 已被占用: " + e);
+            return;
+        }
+        // 一次只服务一个客户端 (主机端每台设备只有一个连接)，断开后等待下一个
+        while (true) {
+            try (LocalSocket socket = listener.accept()) {
+                server.serve(socket);
+            } catch (EOFException e) {
+                // 客户端正常断开
+            } catch (IOException e) {
+                System.err.println("连接异常: " + e);
+            }
+        }
+    }
+}
@@ -0,0 +1,6 @@
+# tests/conftest.py
+# 测试直接导入仓库根目录下的 config / core / utils，与 main.py 的运行方式一致
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
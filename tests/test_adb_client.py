@@ -0,0 +1,53 @@
+# tests/test_adb_client.py
+# AdbClient 对本地替身 adb server 的 host:devices / shell / track-devices 请求
+import pytest
+
+from utils.adb_client import AdbClient, AdbClientError, FakeAdbServer
+
+
+@pytest.fixture
+def server():
+    def shell(serial, command):
+        if command == "exit 3":
+            return 3, ""
+        return 0, f"{serial}:{command}\n"
+
+    server = FakeAdbServer({"emulator-5554": "device", "R58M": "unauthorized"}, shell).start()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def client(server):
+    client = AdbClient(port=server.port, pool_size=0)
+    yield client
+    client.close()
+
+
+def test_devices(client):
+    assert client.devices() == [("emulator-5554", "device"), ("R58M", "unauthorized")]
+
+
+def test_shell_output_and_exit_code(client, server):
+    assert client.shell("emulator-5554", "echo hi") == (0, "emulator-5554:echo hi\n")
+    assert client.shell("emulator-5554", "exit 3") == (3, "")
+    # 第二次请求复用缓存的 transport id
+    assert any(r.startswith("host:tport:serial:") for r in server.requests)
+    assert any(r.startswith("host:transport-id:") for r in server.requests)
+
+
+def test_shell_unknown_device(client):
+    with pytest.raises(AdbClientError):
+        client.shell("missing", "echo hi")
+
+
+def test_track_devices(client, server):
+    tracker = client.track_devices()
+    try:
+        assert tracker.read() == {"emulator-5554": "device", "R58M": "unauthorized"}
+        server.set_device("192.168.1.2:5555")
+        assert tracker.read()["192.168.1.2:5555"] == "device"
+        server.set_device("emulator-5554", None)
+        assert "emulator-5554" not in tracker.read()
+    finally:
+        tracker.close()
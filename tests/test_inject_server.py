@@ -0,0 +1,71 @@
+# tests/test_inject_server.py
+# InjectServerBackend 与本地替身服务之间的协议往返 (TOUCH / KEY / SYNC)
+import time
+
+import pytest
+
+from core.inject_server import (
+    ACTION_DOWN,
+    ACTION_MOVE,
+    ACTION_UP,
+    InjectServerBackend,
+    StandInInjectServer,
+)
+
+
+class _NoFallback:
+    """连接正常时不应走到 input 命令。"""
+
+    def __getattr__(self, name):
+        raise AssertionError(f"不应调用 fallback.{name}")
+
+
+@pytest.fixture
+def backend():
+    server = StandInInjectServer().start()
+    backend = InjectServerBackend("adb", "stand-in", endpoint=(server.host, server.port))
+    backend.fallback = _NoFallback()
+    yield backend, server
+    backend.close()
+    server.close()
+
+
+def _touches(server):
+    return [event[1:] for event in server.events if event[1] == "touch"]
+
+
+def test_tap_sends_down_then_up(backend):
+    backend, server = backend
+    backend.tap(10, 20, 30)
+    assert _touches(server) == [("touch", ACTION_DOWN, 10, 20), ("touch", ACTION_UP, 10, 20)]
+    down, up = server.events
+    assert up[0] - down[0] >= 0.025
+
+
+def test_key(backend):
+    backend, server = backend
+    backend.key(4)
+    assert [event[1:] for event in server.events] == [("key", 4)]
+
+
+def test_swipe_chain_returns_device_elapsed(backend):
+    backend, server = backend
+    points = [(0, 0), (10, 10), (20, 20)]
+    started = time.monotonic()
+    realized_ms = backend.swipe_chain(points, [20, 20])
+    assert _touches(server) == [
+        ("touch", ACTION_DOWN, 0, 0),
+        ("touch", ACTION_MOVE, 10, 10),
+        ("touch", ACTION_MOVE, 20, 20),
+        ("touch", ACTION_UP, 20, 20),
+    ]
+    # SYNC 回复的是自 DOWN 起的设备端耗时：至少包含计划的延时，且不超过主机端等待的时间
+    assert 40 <= realized_ms <= (time.monotonic() - started) * 1000 + 1
+
+
+def test_reuses_connection(backend):
+    backend, server = backend
+    backend.key(4)
+    sock = backend._sock
+    backend.key(5)
+    assert backend._sock is sock
@@ -0,0 +1,61 @@
+# tests/test_window_tracker.py
+# WindowTracker 在假窗口上的位置缓存与可见性变化
+import pytest
+
+from utils.window_backends import FakeWindowBackend
+from utils.window_tracker import WindowTracker
+
+TITLE = "嵬嵬手机"
+
+
+@pytest.fixture
+def backend():
+    return FakeWindowBackend()
+
+
+@pytest.fixture
+def tracker(backend):
+    # 关闭定时复查，位置只在窗口指纹变化时重新读取
+    return WindowTracker(backend=backend, missing_recheck=0.0, geometry_recheck=float("inf"))
+
+
+def test_region_cached_until_window_changes(backend, tracker):
+    handle = backend.add_window(TITLE, (100, 50, 540, 1200))
+    assert tracker.region(TITLE) == (100, 50, 540, 1200)
+    assert tracker.region(TITLE) == (100, 50, 540, 1200)
+    assert backend.calls["find_window"] == 1
+    assert backend.calls["client_region"] == 1
+
+    backend.move(handle, (200, 60, 1200, 540))
+    assert tracker.region(TITLE) == (200, 60, 1200, 540)
+    assert backend.calls["find_window"] == 1
+    assert backend.calls["client_region"] == 2
+
+
+def test_minimize_and_restore(backend, tracker):
+    handle = backend.add_window(TITLE, (0, 0, 540, 1200))
+    assert tracker.region(TITLE) == (0, 0, 540, 1200)
+    backend.minimize(handle)
+    assert tracker.region(TITLE) is None
+    backend.minimize(handle, False)
+    assert tracker.region(TITLE) == (0, 0, 540, 1200)
+
+
+def test_closed_window_is_looked_up_again(backend, tracker):
+    handle = backend.add_window(TITLE, (0, 0, 540, 1200))
+    assert tracker.region(TITLE) == (0, 0, 540, 1200)
+    backend.close(handle)
+    assert tracker.region(TITLE) is None
+    backend.add_window(TITLE, (10, 10, 540, 1200))
+    assert tracker.region(TITLE) == (10, 10, 540, 1200)
+    assert tracker.stats()["lookups"] == 3
+
+
+def test_missing_window_lookup_is_throttled(backend):
+    tracker = WindowTracker(backend=backend, missing_recheck=60.0)
+    assert tracker.region(TITLE) is None
+    assert tracker.region(TITLE) is None
+    assert backend.calls["find_window"] == 1
+    tracker.invalidate(TITLE)
+    assert tracker.region(TITLE) is None
+    assert backend.calls["find_window"] == 2
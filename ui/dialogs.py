@@ -61,6 +61,9 @@ class SwiperSettingsDialog(SettingsDialog):
         self.confidence = QDoubleSpinBox(
             decimals=2, minimum=0.1, maximum=1.0, singleStep=0.05
         )
+        self.pyramid_enabled = QCheckBox("P1 使用金字塔快速匹配 (大屏窗口推荐)")
+        self.change_threshold = QDoubleSpinBox(decimals=1, maximum=255.0)
+        self.device_playback = QCheckBox("设备端按时回放滑动 (主机不参与计时)")
 
         self._add_row(0, "起点 (X/Y):", self.start_x, self.start_y)
         self._add_row(1, "终点 (X/Y):", self.end_x, self.end_y)
@@ -76,6 +79,9 @@ class SwiperSettingsDialog(SettingsDialog):
         self.grid_layout.addWidget(self.detection_enabled, 7, 0, 1, 3)
         self.grid_layout.addWidget(self.start_condition_enabled, 8, 0, 1, 3)
         self._add_row(9, "P1 匹配可信度(0.1-1.0):", self.confidence)
+        self.grid_layout.addWidget(self.pyramid_enabled, 10, 0, 1, 3)
+        self._add_row(11, "P1 画面变化阈值 (0=关闭):", self.change_threshold)
+        self.grid_layout.addWidget(self.device_playback, 12, 0, 1, 3)
 
         self.populate_fields()
 
@@ -97,6 +103,9 @@ class SwiperSettingsDialog(SettingsDialog):
             self.config.get("p1_start_condition_enabled", False)
         )
         self.confidence.setValue(self.config.get("confidence", 0.8))
+        self.pyramid_enabled.setChecked(self.config.get("pyramid_enabled", False))
+        self.change_threshold.setValue(self.config.get("change_threshold", 8.0))
+        self.device_playback.setChecked(self.config.get("device_playback", False))
 
     def get_config(self):
         return {
@@ -115,6 +124,9 @@ class SwiperSettingsDialog(SettingsDialog):
             "detection_enabled": self.detection_enabled.isChecked(),
             "p1_start_condition_enabled": self.start_condition_enabled.isChecked(),
             "confidence": self.confidence.value(),
+            "pyramid_enabled": self.pyramid_enabled.isChecked(),
+            "change_threshold": self.change_threshold.value(),
+            "device_playback": self.device_playback.isChecked(),
         }
 
 
@@ -132,13 +144,17 @@ class HunterSettingsDialog(SettingsDialog):
         self.x_max = QDoubleSpinBox(decimals=2, maximum=1.0)
         self.y_min = QDoubleSpinBox(decimals=2, maximum=1.0)
         self.y_max = QDoubleSpinBox(decimals=2, maximum=1.0)
+        self.pyramid_enabled = QCheckBox("使用金字塔快速匹配 (大屏窗口推荐)")
+        self.change_threshold = QDoubleSpinBox(decimals=1, maximum=255.0)
 
         self._add_row(0, "行动前等待 (最小/最大 s):", self.min_s, self.max_s)
         self._add_row(1, "图像相似度 (0.1-1.0):", self.conf)
         self._add_row(2, "点击范围 X (最小/最大 %):", self.x_min, self.x_max)
         self._add_row(3, "点击范围 Y (最小/最大 %):", self.y_min, self.y_max)
+        self.grid_layout.addWidget(self.pyramid_enabled, 4, 0, 1, 3)
+        self._add_row(5, "画面变化阈值 (0=关闭):", self.change_threshold)
         self.grid_layout.addWidget(
-            QLabel(f"目标文件夹: {IMAGE_FOLDER_HUNTER}"), 4, 0, 1, 3
+            QLabel(f"目标文件夹: {IMAGE_FOLDER_HUNTER}"), 6, 0, 1, 3
         )
 
         self.populate_fields()
@@ -151,6 +167,8 @@ class HunterSettingsDialog(SettingsDialog):
         self.x_max.setValue(self.config.get("x_max", 0.7))
         self.y_min.setValue(self.config.get("y_min", 0.3))
         self.y_max.setValue(self.config.get("y_max", 0.7))
+        self.pyramid_enabled.setChecked(self.config.get("pyramid_enabled", False))
+        self.change_threshold.setValue(self.config.get("change_threshold", 8.0))
 
     def get_config(self):
         return {
@@ -161,4 +179,6 @@ class HunterSettingsDialog(SettingsDialog):
             "x_max": self.x_max.value(),
             "y_min": self.y_min.value(),
             "y_max": self.y_max.value(),
+            "pyramid_enabled": self.pyramid_enabled.isChecked(),
+            "change_threshold": self.change_threshold.value(),
         }
\ No newline at end of file
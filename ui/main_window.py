@@ -5,17 +5,17 @@
 #
 # =======================================================================
 import json
-import time
 import subprocess
 from pathlib import Path
 import os
 import re
 import sys
-import ctypes
+import time
+from typing import Optional
 
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QPushButton, QGroupBox,
-    QLabel, QTextEdit, QGridLayout, QMessageBox, QComboBox, QFileDialog,
+    QLabel, QPlainTextEdit, QGridLayout, QMessageBox, QComboBox, QFileDialog,
     QInputDialog
 )
 from PyQt6.QtCore import QTimer
@@ -23,16 +23,30 @@ from PyQt6.QtGui import QIcon
 
 # 从自定义模块中导入
 from config import (
-    ID_TO_NAME, SCRCPY_PATH, BASE_CONFIG_FOLDER, CONFIG_FILE_COMBINED,
-    IMAGE_FOLDER_SWIPER, DEFAULT_PROFILE_NAME
+    ID_TO_NAME, SCRCPY_PATH, BASE_CONFIG_FOLDER,
+    IMAGE_FOLDER_SWIPER, DEFAULT_PROFILE_NAME, LOG_VIEW_MAX_BLOCKS, LOG_FLUSH_INTERVAL_MS,
+    METRICS_PANEL_REFRESH_MS
 )
 from utils.helpers import find_adb, get_connected_devices, run_adb
 from core.swipe_controller import HumanSwipeController
 from core.adb_controller import AdbController
+from core.adb_shell import close_all_shell_sessions
+from core.input_backends import close_all_input_backends, release_device
+from core.device_info import DEFAULT_SIZE, DEVICE_INFO, DeviceInfo, display_size
+from core.device_watcher import DeviceWatcher
+from core.profiles import complete_profile, default_hunter_config, default_swiper_config, load_profiles, save_profiles
 from core.image_detector import ImageDetector
 from core.swipe_runner import SwipeRunner
+from core.warmup import format_warm_up, warm_up
 from core.image_hunter import ImageHunter
+from utils.log_store import LOG_STORE, RotatingJsonlSink, format_record
+from utils.metrics import METRICS, format_snapshot
+from utils.recorder import RECORDER
+from utils.task_pool import TASK_POOL
+from utils.window_tracker import WINDOW_TRACKER
 from .dialogs import SwiperSettingsDialog, HunterSettingsDialog
+from .qt_bridge import QtEventLoop
+from .task_bridge import TaskBridge
 
 
 def resource_path(relative_path):
@@ -43,9 +57,6 @@ def resource_path(relative_path):
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
 
-myappid = 'lww3716.tools.controller.1.0' 
-ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID(myappid)
-
 
 class SwipeApp_PyQt(QMainWindow):
     def __init__(self):
@@ -63,6 +74,7 @@ class SwipeApp_PyQt(QMainWindow):
         self.profiles = self._load_profiles()
         self.current_profile_name = DEFAULT_PROFILE_NAME
         self.device_name_to_id = {}
+        self.scrcpy_buttons = {}
         self.current_device_id = None
         self.current_device_name = "未连接"
         self.wifi_ip_to_name = {}
@@ -71,9 +83,22 @@ class SwipeApp_PyQt(QMainWindow):
         self.swipe_controller = HumanSwipeController(self.adb_path)
         self.click_controller = AdbController(self.adb_path)
         self.p1_detector = ImageDetector(IMAGE_FOLDER_SWIPER)
-        self.runner = SwipeRunner(self.swipe_controller, self.p1_detector)
+        # 核心模块的信号在各自的线程中发出，经 qt_loop 投递到 GUI 线程处理
+        self.qt_loop = QtEventLoop(self)
+        self.runner = SwipeRunner(self.swipe_controller, self.p1_detector, self.qt_loop)
         self.p1_detector.start()
         self.hunter = ImageHunter(self.click_controller)
+        self.device_watcher = DeviceWatcher(self.adb_path)
+        self.tasks = TaskBridge(parent=self)
+        if LOG_STORE.sink is None:
+            LOG_STORE.sink = RotatingJsonlSink()
+        self.log_flush_timer = QTimer(self)
+        self.log_flush_timer.setInterval(LOG_FLUSH_INTERVAL_MS)
+        self.log_flush_timer.timeout.connect(self._flush_log)
+        self.log_flush_timer.start()
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.setInterval(METRICS_PANEL_REFRESH_MS)
+        self.metrics_timer.timeout.connect(self._refresh_metrics)
 
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -92,6 +117,14 @@ class SwipeApp_PyQt(QMainWindow):
         self.profile_chooser.setCurrentText(self.current_profile_name)
         self._load_profile(self.current_profile_name)
         QTimer.singleShot(100, self.refresh_devices)
+        QTimer.singleShot(200, self.device_watcher.start)
+        # 事件循环开始后 (窗口已显示) 再在后台加载 OpenCV、模板和设备信息
+        QTimer.singleShot(0, self._start_warm_up)
+
+    def _start_warm_up(self):
+        self.tasks.run("后台预热", warm_up, self.adb_path, with_context=True,
+                       on_done=lambda summary: self.log(format_warm_up(summary)),
+                       on_error=lambda e: self.log(f"后台预热失败: {e}"))
 
     def _create_left_column(self):
         left_widget = QWidget()
@@ -123,15 +156,18 @@ class SwipeApp_PyQt(QMainWindow):
         self.status_label = QLabel("状态：已停止")
         self.countdown_label = QLabel("下次循环倒计时：-- 秒")
         self.image_status_label = QLabel("P1图像检测：未开启")
+        self.task_status_label = QLabel("后台任务：空闲")
         status_layout.addWidget(self.status_label)
         status_layout.addWidget(self.countdown_label)
         status_layout.addWidget(self.image_status_label)
+        status_layout.addWidget(self.task_status_label)
         status_group.setLayout(status_layout)
         layout.addWidget(status_group)
         log_group = QGroupBox("📜 共享日志")
         log_layout = QVBoxLayout()
-        self.log_text = QTextEdit()
+        self.log_text = QPlainTextEdit()
         self.log_text.setReadOnly(True)
+        self.log_text.setMaximumBlockCount(LOG_VIEW_MAX_BLOCKS)
         self.clear_log_btn = QPushButton("🗑️ 清除日志")
         log_layout.addWidget(self.log_text)
         log_layout.addWidget(self.clear_log_btn)
@@ -189,6 +225,32 @@ class SwipeApp_PyQt(QMainWindow):
         hunter_layout.addWidget(self.hunter_settings_btn)
         hunter_card.setLayout(hunter_layout)
         layout.addWidget(hunter_card)
+        metrics_group = QGroupBox("📈 性能统计")
+        metrics_layout = QVBoxLayout()
+        self.metrics_text = QPlainTextEdit()
+        self.metrics_text.setReadOnly(True)
+        self.metrics_text.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        metrics_buttons_layout = QGridLayout()
+        self.metrics_export_json_btn = QPushButton("导出JSON")
+        self.metrics_export_prom_btn = QPushButton("导出Prometheus")
+        self.metrics_reset_btn = QPushButton("🗑️ 重置统计")
+        metrics_buttons_layout.addWidget(self.metrics_export_json_btn, 0, 0)
+        metrics_buttons_layout.addWidget(self.metrics_export_prom_btn, 0, 1)
+        metrics_buttons_layout.addWidget(self.metrics_reset_btn, 1, 0, 1, 2)
+        metrics_layout.addWidget(self.metrics_text)
+        metrics_layout.addLayout(metrics_buttons_layout)
+        metrics_group.setLayout(metrics_layout)
+        metrics_group.setEnabled(METRICS.enabled)
+        layout.addWidget(metrics_group, 1)
+        self.metrics_timer.start()
+        record_group = QGroupBox("🎞️ 会话录制")
+        record_layout = QVBoxLayout()
+        self.record_btn = QPushButton("⏺ 开始录制")
+        self.record_status_label = QLabel("未录制")
+        record_layout.addWidget(self.record_btn)
+        record_layout.addWidget(self.record_status_label)
+        record_group.setLayout(record_layout)
+        layout.addWidget(record_group)
         layout.addStretch(1)
         self.main_layout.addWidget(right_widget)
 
@@ -199,6 +261,10 @@ class SwipeApp_PyQt(QMainWindow):
         self.device_chooser.currentTextChanged.connect(self._on_device_switch)
         self.wifi_connect_btn.clicked.connect(self._wifi_connect)
         self.clear_log_btn.clicked.connect(self.log_text.clear)
+        self.metrics_export_json_btn.clicked.connect(lambda: self._export_metrics("json"))
+        self.metrics_export_prom_btn.clicked.connect(lambda: self._export_metrics("prometheus"))
+        self.metrics_reset_btn.clicked.connect(self._reset_metrics)
+        self.record_btn.clicked.connect(self._toggle_recording)
         self.profile_chooser.currentTextChanged.connect(self._on_profile_switch)
         self.save_profile_btn.clicked.connect(self._save_current_profile)
         self.add_profile_btn.clicked.connect(self._add_new_profile)
@@ -210,49 +276,175 @@ class SwipeApp_PyQt(QMainWindow):
         self.hunter_start_btn.clicked.connect(self.start_hunter)
         self.hunter_stop_btn.clicked.connect(self.hunter.stop)
         self.hunter_settings_btn.clicked.connect(self.open_hunter_settings)
+        on_gui = self.qt_loop.bind
         self.runner.log_message.connect(self.log)
-        self.runner.status_updated.connect(self.update_status)
-        self.runner.countdown_updated.connect(self.update_countdown)
-        self.runner.started.connect(self._on_runner_started)
-        self.runner.stopped.connect(self._on_runner_stopped)
+        self.runner.status_updated.connect(on_gui(self.update_status))
+        self.runner.countdown_updated.connect(on_gui(self.update_countdown))
+        self.runner.started.connect(on_gui(self._on_runner_started))
+        self.runner.stopped.connect(on_gui(self._on_runner_stopped))
         self.hunter.log_message.connect(self.log)
-        self.hunter.started.connect(self._on_hunter_started)
-        self.hunter.stopped.connect(self._on_hunter_stopped)
-        self.p1_detector.status_updated.connect(self._on_image_status)
-        self.p1_detector.interrupt_requested.connect(self.runner.interrupt_countdown)
+        self.hunter.started.connect(on_gui(self._on_hunter_started))
+        self.hunter.stopped.connect(on_gui(self._on_hunter_stopped))
+        self.p1_detector.status_updated.connect(on_gui(self._on_image_status))
+        self.p1_detector.interrupt_requested.connect(on_gui(self.runner.interrupt_countdown))
+        self.device_watcher.log_message.connect(self.log)
+        self.tasks.progress.connect(self._on_task_progress)
+        self.tasks.busy_changed.connect(self._on_tasks_busy)
+        self.device_watcher.device_added.connect(on_gui(lambda serial, state: self._on_device_presence(serial, state == "device")))
+        self.device_watcher.device_state_changed.connect(on_gui(lambda serial, state: self._on_device_presence(serial, state == "device")))
+        self.device_watcher.device_removed.connect(on_gui(lambda serial: self._on_device_presence(serial, False)))
+
+    def log(self, text: str):
+        # 只写入日志存储，界面由 _flush_log 定时批量刷新
+        LOG_STORE.append(text)
+
+    def _flush_log(self):
+        records = LOG_STORE.drain()
+        if records:
+            self.log_text.appendPlainText("\n".join(format_record(r) for r in records))
+
+    def _refresh_metrics(self):
+        if RECORDER.active:
+            st = RECORDER.stats()
+            self.record_status_label.setText(f"录制中：{st['frames_written']} 帧 / {st['events']} 个事件")
+        if not METRICS.enabled or not self.metrics_text.isVisible(): return
+        scroll = self.metrics_text.verticalScrollBar().value()
+        self.metrics_text.setPlainText(format_snapshot(METRICS.snapshot()))
+        self.metrics_text.verticalScrollBar().setValue(scroll)
+
+    def _export_metrics(self, fmt: str):
+        suffix, file_filter = (".json", "JSON Files (*.json)") if fmt == "json" else (".prom", "Prometheus Text (*.prom *.txt)")
+        default = str(BASE_CONFIG_FOLDER / f"metrics_{time.strftime('%Y%m%d_%H%M%S')}{suffix}")
+        path, _ = QFileDialog.getSaveFileName(self, "导出性能统计", default, file_filter)
+        if not path: return
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(METRICS.to_json() if fmt == "json" else METRICS.to_prometheus())
+            self.log(f"✓ 性能统计已导出到 '{Path(path).name}'。")
+        except Exception as e:
+            QMessageBox.critical(self, "导出失败", f"无法写入文件: {e}")
+
+    def _reset_metrics(self):
+        METRICS.reset()
+        self._refresh_metrics()
+        self.log("性能统计已重置。")
+
+    def _toggle_recording(self):
+        if not RECORDER.active:
+            try:
+                path = RECORDER.start()
+            except OSError as e:
+                QMessageBox.critical(self, "录制失败", f"无法创建会话目录: {e}")
+                return
+            self.record_btn.setText("⏹ 停止录制")
+            self.log(f"⏺ 开始录制会话: {path}")
+            self._refresh_metrics()
+            return
+        # 停止时要等后台写完剩余的帧，放到任务池里执行
+        self.record_btn.setEnabled(False)
+        self.tasks.run("停止录制", RECORDER.stop, on_done=self._on_recording_stopped)
+
+    def _on_recording_stopped(self, path):
+        st = RECORDER.stats()
+        self.record_btn.setEnabled(True)
+        self.record_btn.setText("⏺ 开始录制")
+        self.record_status_label.setText(f"上次录制：{st['frames_written']} 帧 / {st['events']} 个事件")
+        self.log(
+            f"⏹ 会话已保存: {path} (帧 {st['frames_written']}，重复帧 {st['frames_deduped']}，"
+            f"丢弃 {st['frames_dropped']})"
+        )
 
-    def log(self, text: str): self.log_text.append(f"{time.strftime('%H:%M:%S')} — {text}")
     def update_status(self, text: str): self.status_label.setText(text)
     def update_countdown(self, text: str): self.countdown_label.setText(text)
 
+    def _on_task_progress(self, name: str, text: str):
+        self.task_status_label.setText(f"后台任务：{name} — {text}")
+
+    def _on_tasks_busy(self, count: int):
+        if count == 0: self.task_status_label.setText("后台任务：空闲")
+        # 同一操作执行期间禁用对应按钮，避免重复提交
+        for name, btn in (("刷新设备", self.refresh_devices_btn), ("WIFI连接", self.wifi_connect_btn), ("清理ADB", self.kill_server_btn)):
+            btn.setEnabled(not TASK_POOL.running(name))
+
     def refresh_devices(self):
-        devices = get_connected_devices(self.adb_path)
+        self.tasks.run("刷新设备", get_connected_devices, self.adb_path, on_done=self._apply_device_list)
+
+    def _apply_device_list(self, devices):
         self.log(f"已检测到 {len(devices)} 个设备。")
         connected_ips = {dev for dev in devices if ":" in dev}
         self.wifi_ip_to_name = {ip: name for ip, name in self.wifi_ip_to_name.items() if ip in connected_ips}
-        new_device_name_to_id = {}
+        for dev in set(self.device_name_to_id.values()) - set(devices):
+            self._on_device_presence(dev, False)
         for dev in devices:
-            display_name = self.wifi_ip_to_name.get(dev, ID_TO_NAME.get(dev, f"未知 {dev}"))
-            if dev in self.wifi_ip_to_name: display_name += " (WIFI)"
-            new_device_name_to_id[display_name] = dev
-        self.device_name_to_id = new_device_name_to_id
-        for i in reversed(range(self.scrcpy_buttons_layout.count())): self.scrcpy_buttons_layout.itemAt(i).widget().setParent(None)
-        for name, dev_id in self.device_name_to_id.items():
-            btn = QPushButton(f"开 {name}")
-            btn.clicked.connect(lambda _, did=dev_id, dname=name: self.open_device(did, dname))
-            self.scrcpy_buttons_layout.addWidget(btn)
+            self._on_device_presence(dev, True)
+
+    def _device_display_name(self, dev: str) -> str:
+        display_name = self.wifi_ip_to_name.get(dev, ID_TO_NAME.get(dev, f"未知 {dev}"))
+        if dev in self.wifi_ip_to_name: display_name += " (WIFI)"
+        return display_name
+
+    def _on_device_presence(self, dev: str, online: bool):
+        """设备上线/下线的增量更新 (来自设备监听器或手动刷新)，只改动受影响的按钮和选项。"""
+        known = dev in self.device_name_to_id.values()
+        if online and not known:
+            name = self._add_device_entry(dev)
+            if dev == self.current_device_id:
+                self.device_chooser.blockSignals(True)
+                self.device_chooser.setCurrentText(name)
+                self.device_chooser.blockSignals(False)
+                self.log(f"设备 {name} 已重新连接，恢复运行。")
+                self.runner.set_device_online(True)
+                self.hunter.set_device_online(True)
+            elif self.current_device_id is None:
+                self.device_chooser.blockSignals(True)
+                self.device_chooser.setCurrentText(name)
+                self.device_chooser.blockSignals(False)
+                self._on_device_switch(name)
+        elif not online and known:
+            name = self._remove_device_entry(dev)
+            # 设备上的 shell 会话/注入连接已失效，重新连接后会自动重建，设备信息也重新查询；
+            # 释放过程可能阻塞 (等待进行中的滑动、结束进程、移除 forward)，放到后台执行
+            self.tasks.run("释放设备连接", release_device, dev,
+                           on_error=lambda e: self.log(f"释放设备 {name} 的连接时出错: {e}"))
+            if dev == self.current_device_id:
+                self.log(f"设备 {name} 已断开，滑动器/狩猎器暂停，等待重新连接...")
+                self.runner.set_device_online(False)
+                self.hunter.set_device_online(False)
+
+    def _add_device_entry(self, dev: str) -> str:
+        name = self._device_display_name(dev)
+        self.device_name_to_id[name] = dev
+        btn = QPushButton(f"开 {name}")
+        btn.clicked.connect(lambda _, did=dev, dname=name: self.open_device(did, dname))
+        self.scrcpy_buttons[dev] = btn
+        self.scrcpy_buttons_layout.addWidget(btn)
         self.device_chooser.blockSignals(True)
-        self.device_chooser.clear()
-        if self.device_name_to_id:
-            self.device_chooser.addItems(self.device_name_to_id.keys())
-            if self.current_device_name in self.device_name_to_id: self.device_chooser.setCurrentText(self.current_device_name)
-            else: self.device_chooser.setCurrentIndex(0)
-        else: self.device_chooser.addItem("未连接")
+        for placeholder in ("未连接", f"{name} (已断开)"):
+            index = self.device_chooser.findText(placeholder)
+            if index >= 0: self.device_chooser.removeItem(index)
+        self.device_chooser.addItem(name)
         self.device_chooser.blockSignals(False)
-        self._on_device_switch(self.device_chooser.currentText())
+        return name
+
+    def _remove_device_entry(self, dev: str) -> str:
+        name = next(n for n, d in self.device_name_to_id.items() if d == dev)
+        del self.device_name_to_id[name]
+        btn = self.scrcpy_buttons.pop(dev, None)
+        if btn is not None:
+            btn.setParent(None)
+            btn.deleteLater()
+        self.device_chooser.blockSignals(True)
+        index = self.device_chooser.findText(name)
+        if index >= 0:
+            # 当前目标设备保留在列表中并标记为已断开，其余设备直接移除
+            if dev == self.current_device_id: self.device_chooser.setItemText(index, f"{name} (已断开)")
+            else: self.device_chooser.removeItem(index)
+        if self.device_chooser.count() == 0: self.device_chooser.addItem("未连接")
+        self.device_chooser.blockSignals(False)
+        return name
 
     def _on_device_switch(self, device_name: str):
-        if not device_name or device_name == "未连接":
+        if not device_name or device_name not in self.device_name_to_id:
             self.current_device_id, self.current_device_name = None, "未连接"
             self.swipe_controller.device, self.click_controller.device_id = None, None
             self.hunter.target_window_title = ""
@@ -260,18 +452,42 @@ class SwipeApp_PyQt(QMainWindow):
             return
         self.current_device_name = device_name
         self.current_device_id = self.device_name_to_id.get(device_name)
+        self.device_chooser.blockSignals(True)
+        for index in reversed(range(self.device_chooser.count())):
+            if self.device_chooser.itemText(index).endswith(" (已断开)"): self.device_chooser.removeItem(index)
+        self.device_chooser.blockSignals(False)
         if self.current_device_id:
             self.runner.stop()
             self.hunter.stop()
-            try:
-                self.swipe_controller.device = self.current_device_id
-                self.swipe_controller.update_device_size()
-                self.log(f"[滑动器] 已切换到: {device_name} ({self.swipe_controller.width}x{self.swipe_controller.height})")
-                self.click_controller.set_device(self.current_device_id)
-                self.log(f"[狩猎器] 已切换到: {device_name} ({self.click_controller.width}x{self.click_controller.height})")
-                self._on_image_detection_toggle()
-            except Exception as e:
-                self.log(f"切换设备时出错: {e}")
+            # 设备信息 (分辨率等) 在后台查询，完成后控制器直接读取缓存
+            device_id = self.current_device_id
+            self.swipe_controller.device, self.click_controller.device_id = device_id, device_id
+            self.tasks.run(
+                "读取设备信息", DEVICE_INFO.get, self.adb_path, device_id,
+                on_done=lambda info: self._finish_device_switch(device_name, device_id, info),
+                on_error=lambda e: self._on_device_info_failed(device_name, device_id, e),
+            )
+
+    def _on_device_info_failed(self, device_name: str, device_id: str, error: Exception):
+        if device_id != self.current_device_id:
+            return
+        # 不在界面线程中重新查询 (设备离线时会阻塞数秒)：沿用缓存的旧信息，没有时使用默认分辨率
+        cached = DEVICE_INFO.peek(device_id)
+        self.log(f"读取设备 {device_name} 的信息失败，{'沿用上次缓存的' if cached else '使用默认'}分辨率: {error}")
+        self._finish_device_switch(device_name, device_id, cached)
+
+    def _finish_device_switch(self, device_name: str, device_id: str, info: Optional[DeviceInfo]):
+        if device_id != self.current_device_id:
+            return  # 查询期间又切换了设备
+        try:
+            size = display_size(info) if info is not None else DEFAULT_SIZE
+            self.swipe_controller.width, self.swipe_controller.height = size
+            self.log(f"[滑动器] 已切换到: {device_name} ({self.swipe_controller.width}x{self.swipe_controller.height})")
+            self.click_controller.set_device(device_id, size)
+            self.log(f"[狩猎器] 已切换到: {device_name} ({self.click_controller.width}x{self.click_controller.height})")
+            self._on_image_detection_toggle()
+        except Exception as e:
+            self.log(f"切换设备时出错: {e}")
 
     def open_device(self, device_id: str, display_name: str):
         if not Path(SCRCPY_PATH).exists():
@@ -280,36 +496,33 @@ class SwipeApp_PyQt(QMainWindow):
         cmd = [SCRCPY_PATH, "-S", "-s", device_id, "--window-title", display_name]
         self.log(f"正在打开设备 {display_name}...")
         subprocess.Popen(cmd, creationflags=subprocess.CREATE_NEW_CONSOLE if os.name == 'nt' else 0)
+        # 新窗口出现后立即被找到，不必等待"找不到窗口"的缓存过期
+        WINDOW_TRACKER.invalidate(display_name)
 
     def kill_server(self):
         self.log("正在执行 adb kill-server...")
         self.runner.stop()
         self.hunter.stop()
-        try:
-            p = run_adb(self.adb_path, ["kill-server"])
-            if p.returncode == 0: self.log("✓ ADB 进程已清除。")
-            else: self.log(f"警告：清除进程失败: {p.stderr.strip()}")
-            self.refresh_devices()
-        except Exception as e:
-            self.log(f"清除进程操作异常: {e}")
+        self.tasks.run("清理ADB", run_adb, self.adb_path, ["kill-server"], on_done=self._on_kill_server_done,
+                       on_error=lambda e: self.log(f"清除进程操作异常: {e}"))
+
+    def _on_kill_server_done(self, p):
+        if p.returncode == 0: self.log("✓ ADB 进程已清除。")
+        else: self.log(f"警告：清除进程失败: {p.stderr.strip()}")
+        self.refresh_devices()
 
     def _get_default_swiper_config(self):
-        return {"start_x": 0.5, "start_y": 0.85, "end_x": 0.5, "end_y": 0.45, "duration_min": 400, "duration_max": 500, "jitter": 2, "steps_min": 25, "steps_max": 35, "coord_offset": 1.0, "interval_min": 4.0, "interval_max": 10.0, "detection_enabled": False, "p1_start_condition_enabled": False, "confidence": 0.8}
+        return default_swiper_config()
 
     def _get_default_hunter_config(self):
-        return {"min_s": 5.0, "max_s": 10.0, "conf": 0.8, "x_min": 0.3, "x_max": 0.7, "y_min": 0.3, "y_max": 0.7}
+        return default_hunter_config()
 
     def _load_profiles(self):
-        if CONFIG_FILE_COMBINED.exists():
-            try:
-                with open(CONFIG_FILE_COMBINED, "r", encoding="utf-8") as f: return json.load(f)
-            except json.JSONDecodeError: pass
-        return {DEFAULT_PROFILE_NAME: {"swiper": self._get_default_swiper_config(), "hunter": self._get_default_hunter_config()}}
+        return load_profiles()
 
     def _save_profiles(self):
         try:
-            BASE_CONFIG_FOLDER.mkdir(exist_ok=True)
-            with open(CONFIG_FILE_COMBINED, "w", encoding="utf-8") as f: json.dump(self.profiles, f, indent=4, ensure_ascii=False)
+            save_profiles(self.profiles)
         except Exception as e:
             self.log(f"保存配置文件失败: {e}")
 
@@ -328,8 +541,7 @@ class SwipeApp_PyQt(QMainWindow):
     def _load_profile(self, name):
         if name not in self.profiles: return
         self.current_profile_name = name
-        if "swiper" not in self.profiles[name]: self.profiles[name]["swiper"] = self._get_default_swiper_config()
-        if "hunter" not in self.profiles[name]: self.profiles[name]["hunter"] = self._get_default_hunter_config()
+        complete_profile(self.profiles[name])
         self.log(f"✓ 已加载配置: '{name}'")
         self._on_image_detection_toggle()
 
@@ -429,12 +641,17 @@ class SwipeApp_PyQt(QMainWindow):
         enabled = config.get("detection_enabled", False)
         confidence_val = config.get("confidence", 0.8)
         self.p1_detector.confidence = confidence_val
+        self.p1_detector.pyramid = config.get("pyramid_enabled", False)
+        self.p1_detector.change_gate.threshold = config.get("change_threshold", 8.0)
         if enabled and self.current_device_name != "未连接":
             self.p1_detector.enable(self.current_device_name)
             self.log(f"[滑动器] P1图像检测已启用 (可信度: {confidence_val:.2f})")
         else:
             self.p1_detector.disable()
             self.log("[滑动器] P1图像检测已禁用。")
+            gate = self.p1_detector.change_gate.stats()
+            if gate["evaluated"]:
+                self.log(f"[滑动器] P1画面静止跳过匹配 {gate['skipped']} 次，实际匹配 {gate['evaluated']} 次。")
         self._on_image_status(found=False)
 
     def _on_image_status(self, found: bool):
@@ -450,33 +667,43 @@ class SwipeApp_PyQt(QMainWindow):
             QMessageBox.warning(self, "操作无效", "请先在设备列表中选择一个通过USB连接的设备。")
             return
         self.log(f"开始为设备 {self.current_device_name} 启动WIFI连接...")
-        tcpip_result = run_adb(self.adb_path, ["-s", self.current_device_id, "tcpip", "5555"], timeout=5.0)
+        clean_name = self.current_device_name.replace(" (WIFI)", "")
+        self.tasks.run("WIFI连接", self._wifi_enable_tcpip, self.current_device_id, with_context=True,
+                       on_done=lambda device_ip: self._on_wifi_ip_ready(device_ip, clean_name),
+                       on_error=lambda e: QMessageBox.critical(self, "错误", str(e)))
+
+    def _wifi_enable_tcpip(self, ctx, device_id: str) -> str:
+        """(后台线程) 开启 TCP/IP 模式并读取设备的 WIFI IP 地址。"""
+        ctx.report("开启TCP/IP模式...")
+        tcpip_result = run_adb(self.adb_path, ["-s", device_id, "tcpip", "5555"], timeout=5.0)
         if "restarting in TCP mode" not in tcpip_result.stdout:
-            QMessageBox.critical(self, "错误", "开启TCP/IP模式失败，请检查设备连接。")
-            return
-        self.log("TCP/IP模式已开启，等待设备ADB服务重启...")
-        device_ip = None
-        for attempt in range(10): 
-            ip_result = run_adb(self.adb_path, ["-s", self.current_device_id, "shell", "ip", "addr", "show", "wlan0"], timeout=2.0)
+            raise RuntimeError("开启TCP/IP模式失败，请检查设备连接。")
+        ctx.report("TCP/IP模式已开启，等待设备ADB服务重启...")
+        for attempt in range(10):
+            ctx.report(f"获取设备IP地址 (第 {attempt + 1} 次尝试)...")
+            ip_result = run_adb(self.adb_path, ["-s", device_id, "shell", "ip", "addr", "show", "wlan0"], timeout=2.0)
             match = re.search(r"inet (\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})", ip_result.stdout)
             if match:
-                device_ip = match.group(1)
-                self.log(f"成功获取设备IP地址: {device_ip} (在第 {attempt + 1} 次尝试)")
-                break
-            time.sleep(0.5)
-        if not device_ip:
-            QMessageBox.critical(self, "错误", "无法获取设备IP地址。\n请确保手机和电脑连接到同一个WIFI网络。")
-            return
+                return match.group(1)
+            if ctx.sleep(0.5): break
+        raise RuntimeError("无法获取设备IP地址。\n请确保手机和电脑连接到同一个WIFI网络。")
+
+    def _on_wifi_ip_ready(self, device_ip: str, clean_name: str):
+        self.log(f"成功获取设备IP地址: {device_ip}")
         wifi_device_id = f"{device_ip}:5555"
-        clean_name = self.current_device_name.replace(" (WIFI)", "")
+        # 先记录映射，设备监听器发现新设备时即可显示正确的名字
         self.wifi_ip_to_name[wifi_device_id] = clean_name
         self.log(f"已记录WIFI映射：'{wifi_device_id}' -> '{clean_name}'")
-        connect_result = run_adb(self.adb_path, ["connect", wifi_device_id], timeout=5.0)
-        if "connected to" in connect_result.stdout or "already connected" in connect_result.stdout:
+        self.tasks.run("WIFI连接", run_adb, self.adb_path, ["connect", wifi_device_id], 5.0,
+                       on_done=lambda result: self._on_wifi_connected(wifi_device_id, result),
+                       on_error=lambda e: self._on_wifi_connected(wifi_device_id, None))
+
+    def _on_wifi_connected(self, wifi_device_id: str, connect_result):
+        if connect_result is not None and ("connected to" in connect_result.stdout or "already connected" in connect_result.stdout):
             QMessageBox.information(self, "成功", f"设备WIFI连接成功！\nIP: {wifi_device_id}\n现在可以拔掉USB数据线了。")
             self.refresh_devices()
         else:
-            del self.wifi_ip_to_name[wifi_device_id]
+            self.wifi_ip_to_name.pop(wifi_device_id, None)
             QMessageBox.critical(self, "连接失败", f"连接到 {wifi_device_id} 失败。\n请重试或检查网络设置。")
 
     def closeEvent(self, event):
@@ -486,6 +713,12 @@ class SwipeApp_PyQt(QMainWindow):
             self.hunter.stop()
             self._save_current_profile()
             self.p1_detector.stop()
+            self.device_watcher.stop()
+            RECORDER.stop()
+            TASK_POOL.shutdown()
+            LOG_STORE.close()
+            close_all_input_backends()
+            close_all_shell_sessions()
             event.accept()
         else:
             event.ignore()
@@ -508,7 +741,7 @@ class SwipeApp_PyQt(QMainWindow):
         common_styles = """
             QGroupBox { border-radius: 8px; margin-top: 1ex; font-weight: bold; }
             QGroupBox::title { subcontrol-origin: margin; subcontrol-position: top left; padding: 0 5px; border-radius: 4px; }
-            QTextEdit, QComboBox, QSpinBox, QDoubleSpinBox { border-radius: 4px; padding: 4px; }
+            QPlainTextEdit, QComboBox, QSpinBox, QDoubleSpinBox { border-radius: 4px; padding: 4px; }
             QComboBox::drop-down { border: none; }
             QLabel { background-color: transparent; }
         """
@@ -527,7 +760,7 @@ class SwipeApp_PyQt(QMainWindow):
             QPushButton#StopButton {{ background-color: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #ff453a, stop:1 #dc3545); border-bottom-color: #A92834; color: white; font-size: 12pt;}}
             QPushButton#StopButton:hover {{ background-color: #ff5b52; }}
             QPushButton#StopButton:pressed {{ background-color: #c82333; border-style: inset; padding-top: 8px; }}
-            QTextEdit, QComboBox, QSpinBox, QDoubleSpinBox {{ background-color: #252525; border: 1px solid #555; }}
+            QPlainTextEdit, QComboBox, QSpinBox, QDoubleSpinBox {{ background-color: #252525; border: 1px solid #555; }}
         """
         self.QSS_LIGHT = f"""
             QWidget {{ background-color: #F0F2F5; color: #1c1c1e; font-family: "Segoe UI", "Microsoft YaHei"; font-size: 10pt; }}
@@ -544,5 +777,5 @@ class SwipeApp_PyQt(QMainWindow):
             QPushButton#StopButton {{ background-color: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #ff453a, stop:1 #dc3545); border-bottom-color: #A92834; color: white; font-size: 12pt;}}
             QPushButton#StopButton:hover {{ background-color: #ff5b52; }}
             QPushButton#StopButton:pressed {{ background-color: #c82333; border-style: inset; padding-top: 8px; }}
-            QTextEdit, QComboBox, QSpinBox, QDoubleSpinBox {{ background-color: #FFFFFF; border: 1px solid #C6C6C8; }}
+            QPlainTextEdit, QComboBox, QSpinBox, QDoubleSpinBox {{ background-color: #FFFFFF; border: 1px solid #C6C6C8; }}
         """
\ No newline at end of file
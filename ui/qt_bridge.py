@@ -0,0 +1,51 @@
+# ui/qt_bridge.py
+# =======================================================================
+#
+#        全功能控制器 - 核心事件层与 Qt 之间的桥接
+#        提供与 core.events.EventLoop 相同接口的事件循环，回调在 GUI 线程中执行
+#
+# =======================================================================
+import threading
+from typing import Any, Callable, Optional
+
+from PyQt6.QtCore import QObject, Qt, QTimer, pyqtSignal
+
+from core.events import TimerHandle
+
+
+class QtEventLoop(QObject):
+    """
+    把核心模块的回调投递到 GUI 线程：
+        runner = SwipeRunner(ctrl, detector, loop=qt_loop)
+        runner.status_updated.connect(qt_loop.bind(self.update_status))
+    """
+
+    _posted = pyqtSignal(object)
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._thread_id = threading.get_ident()
+        # 固定使用排队连接：即使在 GUI 线程中 post()，回调也在当前调用返回之后才执行
+        self._posted.connect(self._run, Qt.ConnectionType.QueuedConnection)
+
+    def _run(self, handle: TimerHandle):
+        handle.run()
+
+    def call_later(self, delay: float, fn: Callable[..., Any], *args: Any) -> TimerHandle:
+        handle = TimerHandle(fn, args)
+        if delay <= 0:
+            self._posted.emit(handle)
+        else:
+            # QTimer 只能在 GUI 线程中启动，先投递过去再计时
+            ms = int(delay * 1000)
+            self._posted.emit(TimerHandle(lambda: QTimer.singleShot(ms, handle.run), ()))
+        return handle
+
+    def post(self, fn: Callable[..., Any], *args: Any) -> TimerHandle:
+        return self.call_later(0.0, fn, *args)
+
+    def bind(self, slot: Callable[..., Any]) -> Callable[..., None]:
+        return lambda *args: self.post(slot, *args)
+
+    def in_loop_thread(self) -> bool:
+        return threading.get_ident() == self._thread_id
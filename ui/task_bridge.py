@@ -0,0 +1,71 @@
+# ui/task_bridge.py
+# =======================================================================
+#
+#        全功能控制器 - 后台任务与界面线程之间的桥接
+#        任务在 TASK_POOL 中执行，结果和进度通过信号回到 GUI 线程
+#
+# =======================================================================
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from utils.task_pool import TASK_POOL, TaskPool
+
+
+class TaskBridge(QObject):
+    # (任务名, 进度文字)
+    progress = pyqtSignal(str, str)
+    # 正在执行的任务数变化
+    busy_changed = pyqtSignal(int)
+    # 内部使用：任务完成 (task_id, 结果, 异常)，在 GUI 线程中分发回调
+    _finished = pyqtSignal(int, object, object)
+    _progressed = pyqtSignal(int, str, str)
+
+    def __init__(self, pool: TaskPool = TASK_POOL, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.pool = pool
+        self._callbacks: Dict[int, Tuple[Optional[Callable], Optional[Callable]]] = {}
+        self._finished.connect(self._dispatch)
+        self._progressed.connect(lambda _id, name, text: self.progress.emit(name, text))
+        pool.progress_listeners.append(self._progressed.emit)
+
+    def run(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        on_done: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+        with_context: bool = False,
+    ) -> Future:
+        """
+        在后台执行 fn(*args)，完成后在 GUI 线程调用 on_done(结果) 或 on_error(异常)。
+        with_context=True 时 fn 的第一个参数为 TaskContext，可用 ctx.report() 汇报进度。
+        """
+        future = self.pool.submit(name, fn, *args, with_context=with_context)
+        task_id = future.task_context.task_id
+        self._callbacks[task_id] = (on_done, on_error)
+        self.busy_changed.emit(len(self._callbacks))
+        self.progress.emit(name, "开始执行...")
+        future.add_done_callback(lambda f: self._finished.emit(task_id, *self._outcome(f)))
+        return future
+
+    @staticmethod
+    def _outcome(future: Future) -> Tuple[Any, Optional[BaseException]]:
+        if future.cancelled():
+            return None, RuntimeError("任务已取消")
+        error = future.exception()
+        return (None, error) if error is not None else (future.result(), None)
+
+    def _dispatch(self, task_id: int, result: Any, error: Optional[BaseException]):
+        on_done, on_error = self._callbacks.pop(task_id, (None, None))
+        self.busy_changed.emit(len(self._callbacks))
+        if error is not None:
+            if on_error is not None:
+                on_error(error)
+            else:
+                self.progress.emit("后台任务", f"执行出错: {error}")
+            return
+        if on_done is not None:
+            on_done(result)
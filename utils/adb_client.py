@@ -0,0 +1,602 @@
+# utils/adb_client.py
+# =======================================================================
+#
+#        全功能控制器 - ADB 服务端协议客户端
+#        直接与本机 adb server (默认 127.0.0.1:5037) 通信，不再为每次查询启动 adb 进程
+#
+# =======================================================================
+import socket
+import struct
+import subprocess
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from config import ADB_SERVER_HOST, ADB_SERVER_PORT
+from .lazy_import import lazy_import
+
+# 只有 AsyncAdbClient 用到，同步路径不必在导入时加载
+asyncio = lazy_import("asyncio")
+
+# 预先建立、尚未使用的空闲连接数。adb server 的每个连接只能服务一个请求，
+# 因此池子里放的是 "热" 连接，用掉一个就在后台补一个
+POOL_SIZE = 2
+DEFAULT_TIMEOUT = 5.0
+RC_MARKER = "__ADB_CLIENT_RC__"
+
+
+class AdbClientError(Exception):
+    """adb server 返回 FAIL (message 为 server 给出的原因)。"""
+
+
+class AdbServerUnavailable(AdbClientError):
+    """无法连接 adb server (未启动或端口不对)。"""
+
+
+def _encode_request(request: str) -> bytes:
+    data = request.encode("utf-8")
+    return f"{len(data):04x}".encode("ascii") + data
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("adb server 连接已断开")
+        data += chunk
+    return data
+
+
+def _recv_all(sock: socket.socket) -> bytes:
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+def _split_rc(output: str) -> Tuple[int, str]:
+    """从 shell 输出末尾取出 `echo RC_MARKER$?` 写入的退出码。"""
+    pos = output.rfind(RC_MARKER)
+    if pos < 0:
+        return 0, output
+    try:
+        code = int(output[pos + len(RC_MARKER) :].strip() or 0)
+    except ValueError:
+        code = -1
+    return code, output[:pos].rstrip("\r\n") + ("\n" if pos > 0 else "")
+
+
+def parse_device_list(text: str) -> Dict[str, str]:
+    """解析 host:devices / host:track-devices 返回的 "serial\tstate" 列表。"""
+    result = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) >= 2:
+            result[parts[0]] = parts[1]
+    return result
+
+
+def _shell_request(command: str) -> str:
+    # 换行分隔，兼容以 & 结尾的命令
+    return f"shell:{command}\necho {RC_MARKER}$?"
+
+
+class AdbClient:
+    """
+    同步客户端。线程安全：每个请求使用独立连接，连接来自共享的热连接池。
+    设备请求先用 host:tport 取得 transport id 并缓存，之后用 host:transport-id 直接切换。
+    """
+
+    def __init__(
+        self,
+        host: str = ADB_SERVER_HOST,
+        port: int = ADB_SERVER_PORT,
+        pool_size: int = POOL_SIZE,
+    ):
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self._idle: Deque[socket.socket] = deque()
+        self._lock = threading.Lock()
+        self._refilling = False
+        self._transport_ids: Dict[str, int] = {}
+        self._tport_supported = True
+        self.requests = 0
+        self.pool_hits = 0
+
+    # ---------- 连接池 ----------
+    def _open(self, timeout: float) -> socket.socket:
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=timeout)
+        except OSError as e:
+            raise AdbServerUnavailable(f"无法连接 adb server {self.host}:{self.port}: {e}")
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _acquire(self, timeout: float) -> Tuple[socket.socket, bool]:
+        with self._lock:
+            sock = self._idle.popleft() if self._idle else None
+        if sock is None:
+            sock = self._open(timeout)
+            pooled = False
+        else:
+            sock.settimeout(timeout)
+            self.pool_hits += 1
+            pooled = True
+        self._schedule_refill()
+        return sock, pooled
+
+    def _schedule_refill(self):
+        with self._lock:
+            if self._refilling or len(self._idle) >= self.pool_size:
+                return
+            self._refilling = True
+        threading.Thread(target=self._refill, daemon=True, name="AdbClientPool").start()
+
+    def _refill(self):
+        try:
+            while True:
+                with self._lock:
+                    if len(self._idle) >= self.pool_size:
+                        return
+                try:
+                    sock = self._open(DEFAULT_TIMEOUT)
+                except AdbServerUnavailable:
+                    return
+                with self._lock:
+                    self._idle.append(sock)
+        finally:
+            with self._lock:
+                self._refilling = False
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+            self._transport_ids.clear()
+        for sock in idle:
+            try:
+                sock.close()
+            except Exception:
+                pass
+
+    # ---------- 协议基础 ----------
+    @staticmethod
+    def _read_status(sock: socket.socket):
+        status = _recv_exact(sock, 4)
+        if status == b"OKAY":
+            return
+        if status == b"FAIL":
+            raise AdbClientError(AdbClient._read_string(sock))
+        raise AdbClientError(f"adb server 返回未知状态: {status!r}")
+
+    @staticmethod
+    def _read_string(sock: socket.socket) -> str:
+        length = int(_recv_exact(sock, 4).decode("ascii"), 16)
+        return _recv_exact(sock, length).decode("utf-8", errors="ignore")
+
+    def _send_request(self, sock: socket.socket, request: str):
+        """
+        发送请求并确认 OKAY。发送本身失败时请求没有完整送达，server 不会执行，
+        抛出 AdbServerUnavailable；之后 (读取应答时) 的失败原样抛出，调用方不能重试。
+        """
+        try:
+            sock.sendall(_encode_request(request))
+        except OSError as e:
+            raise AdbServerUnavailable(f"请求未能送达 adb server: {e}")
+        self._read_status(sock)
+
+    def _request(self, request: str, timeout: float) -> socket.socket:
+        """发送一个 host 请求并确认 OKAY，返回可继续读取的连接。"""
+        self.requests += 1
+        sock, pooled = self._acquire(timeout)
+        try:
+            self._send_request(sock, request)
+            return sock
+        except (AdbServerUnavailable, ConnectionError):
+            sock.close()
+            if not pooled:
+                raise
+            # 池中的连接可能已被 server 关闭 (例如 kill-server 之后)：发送失败或未作任何应答就断开，
+            # 请求没有被执行，丢弃整个池并重试一次。读取超时 (server 可能正在执行) 不在此列
+            self.close()
+            sock = self._open(timeout)
+            try:
+                self._send_request(sock, request)
+                return sock
+            except Exception:
+                sock.close()
+                raise
+        except Exception:
+            sock.close()
+            raise
+
+    def _host_query(self, request: str, timeout: float = DEFAULT_TIMEOUT) -> str:
+        sock = self._request(request, timeout)
+        try:
+            return self._read_string(sock)
+        finally:
+            sock.close()
+
+    def _host_command(self, request: str, timeout: float = DEFAULT_TIMEOUT):
+        self._request(request, timeout).close()
+
+    def _transport(self, serial: Optional[str], timeout: float) -> socket.socket:
+        """返回已切换到目标设备的连接。"""
+        if serial is None:
+            return self._request("host:transport-any", timeout)
+        transport_id = self._transport_ids.get(serial)
+        if transport_id is not None:
+            try:
+                return self._request(f"host:transport-id:{transport_id}", timeout)
+            except AdbClientError as e:
+                if isinstance(e, AdbServerUnavailable):
+                    raise
+                # 设备重连后 transport id 会变化
+                self._transport_ids.pop(serial, None)
+        if self._tport_supported:
+            sock = None
+            try:
+                sock = self._request(f"host:tport:serial:{serial}", timeout)
+                (transport_id,) = struct.unpack("<Q", _recv_exact(sock, 8))
+                self._transport_ids[serial] = transport_id
+                return sock
+            except AdbClientError as e:
+                if isinstance(e, AdbServerUnavailable) or "unknown host service" not in str(e):
+                    raise
+                # 旧版 adb server 不支持 tport
+                self._tport_supported = False
+        return self._request(f"host:transport:{serial}", timeout)
+
+    def _device_stream(self, serial: Optional[str], service: str, timeout: float) -> str:
+        sock = self._transport(serial, timeout)
+        try:
+            self._send_request(sock, service)
+            return _recv_all(sock).decode("utf-8", errors="ignore")
+        finally:
+            sock.close()
+
+    # ---------- 对外接口 ----------
+    def version(self) -> int:
+        return int(self._host_query("host:version"), 16)
+
+    def devices(self) -> List[Tuple[str, str]]:
+        """返回 [(serial, state), ...]，与 `adb devices` 相同的数据。"""
+        return list(parse_device_list(self._host_query("host:devices")).items())
+
+    def track_devices(self, timeout: float = DEFAULT_TIMEOUT) -> "DeviceTracker":
+        """打开 host:track-devices 长连接，设备列表每次变化时 server 推送一份完整列表。"""
+        return DeviceTracker(self._request("host:track-devices", timeout))
+
+    def shell(
+        self, serial: Optional[str], command: str, timeout: float = DEFAULT_TIMEOUT
+    ) -> Tuple[int, str]:
+        """执行一条 shell 命令，返回 (退出码, 输出)。stderr 与 stdout 合并。"""
+        return _split_rc(self._device_stream(serial, _shell_request(command), timeout))
+
+    def tcpip(self, serial: Optional[str], port: int, timeout: float = DEFAULT_TIMEOUT) -> str:
+        return self._device_stream(serial, f"tcpip:{port}", timeout)
+
+    def connect(self, target: str, timeout: float = DEFAULT_TIMEOUT) -> str:
+        return self._host_query(f"host:connect:{target}", timeout)
+
+    def disconnect(self, target: str, timeout: float = DEFAULT_TIMEOUT) -> str:
+        return self._host_query(f"host:disconnect:{target}", timeout)
+
+    def kill_server(self):
+        try:
+            self._host_command("host:kill")
+        finally:
+            self.close()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            idle = len(self._idle)
+        return {
+            "requests": self.requests,
+            "pool_hits": self.pool_hits,
+            "idle": idle,
+            "transports": len(self._transport_ids),
+        }
+
+
+class DeviceTracker:
+    """host:track-devices 长连接。read() 阻塞到下一次设备列表变化，close() 可从其他线程调用。"""
+
+    def __init__(self, sock: socket.socket):
+        sock.settimeout(None)
+        self._sock = sock
+
+    def read(self) -> Dict[str, str]:
+        return parse_device_list(AdbClient._read_string(self._sock))
+
+    def close(self):
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+
+
+class AsyncAdbClient:
+    """asyncio 版本的客户端，接口与 AdbClient 一致 (不使用连接池)。"""
+
+    def __init__(self, host: str = ADB_SERVER_HOST, port: int = ADB_SERVER_PORT):
+        self.host = host
+        self.port = port
+
+    async def _request(self, request: str, timeout: float):
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), timeout
+            )
+        except OSError as e:
+            raise AdbServerUnavailable(f"无法连接 adb server {self.host}:{self.port}: {e}")
+        try:
+            await self._send(reader, writer, request, timeout)
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    @staticmethod
+    async def _send(reader, writer, request: str, timeout: float):
+        writer.write(_encode_request(request))
+        await writer.drain()
+        status = await asyncio.wait_for(reader.readexactly(4), timeout)
+        if status == b"FAIL":
+            raise AdbClientError(await AsyncAdbClient._read_string(reader, timeout))
+        if status != b"OKAY":
+            raise AdbClientError(f"adb server 返回未知状态: {status!r}")
+
+    @staticmethod
+    async def _read_string(reader, timeout: float) -> str:
+        length = int((await asyncio.wait_for(reader.readexactly(4), timeout)).decode("ascii"), 16)
+        data = await asyncio.wait_for(reader.readexactly(length), timeout)
+        return data.decode("utf-8", errors="ignore")
+
+    async def _host_query(self, request: str, timeout: float = DEFAULT_TIMEOUT) -> str:
+        reader, writer = await self._request(request, timeout)
+        try:
+            return await self._read_string(reader, timeout)
+        finally:
+            writer.close()
+
+    async def _device_stream(self, serial: Optional[str], service: str, timeout: float) -> str:
+        transport = f"host:transport:{serial}" if serial else "host:transport-any"
+        reader, writer = await self._request(transport, timeout)
+        try:
+            await self._send(reader, writer, service, timeout)
+            data = await asyncio.wait_for(reader.read(), timeout)
+            return data.decode("utf-8", errors="ignore")
+        finally:
+            writer.close()
+
+    async def version(self) -> int:
+        return int(await self._host_query("host:version"), 16)
+
+    async def devices(self) -> List[Tuple[str, str]]:
+        return list(parse_device_list(await self._host_query("host:devices")).items())
+
+    async def track_devices(self):
+        """异步迭代设备列表的变化，每次产出完整的 {serial: state}。"""
+        reader, writer = await self._request("host:track-devices", DEFAULT_TIMEOUT)
+        try:
+            while True:
+                length = int((await reader.readexactly(4)).decode("ascii"), 16)
+                data = await reader.readexactly(length)
+                yield parse_device_list(data.decode("utf-8", errors="ignore"))
+        finally:
+            writer.close()
+
+    async def shell(
+        self, serial: Optional[str], command: str, timeout: float = DEFAULT_TIMEOUT
+    ) -> Tuple[int, str]:
+        return _split_rc(await self._device_stream(serial, _shell_request(command), timeout))
+
+    async def connect(self, target: str, timeout: float = DEFAULT_TIMEOUT) -> str:
+        return await self._host_query(f"host:connect:{target}", timeout)
+
+
+_client: Optional[AdbClient] = None
+_client_lock = threading.Lock()
+
+
+def get_adb_client() -> AdbClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AdbClient()
+        return _client
+
+
+def _completed(args: List[str], code: int, stdout: str = "", stderr: str = ""):
+    return subprocess.CompletedProcess(args, code, stdout, stderr)
+
+
+def run_adb_native(
+    adb_path: str, args: List[str], timeout: Optional[float] = None
+) -> Optional[subprocess.CompletedProcess]:
+    """
+    用协议客户端执行 run_adb 最常见的几类命令，结果格式与 adb 命令行一致。
+    不支持的命令或请求送达 server 之前就失败时返回 None，由调用方退回启动 adb 进程；
+    请求发出后的失败不再退回 (否则 tap/swipe/connect 等会在设备上执行两次)：
+    超时抛出 subprocess.TimeoutExpired (与 adb 进程超时一致)，其他错误返回非零退出码。
+    """
+    serial = None
+    rest = list(args)
+    if len(rest) >= 2 and rest[0] == "-s":
+        serial, rest = rest[1], rest[2:]
+    if not rest:
+        return None
+    command, params = rest[0], rest[1:]
+    timeout = timeout or DEFAULT_TIMEOUT
+    client = get_adb_client()
+    cmd = [adb_path] + list(args)
+    try:
+        if command == "devices" and not params:
+            lines = "".join(f"{s}\t{state}\n" for s, state in client.devices())
+            return _completed(cmd, 0, f"List of devices attached\n{lines}\n")
+        if command == "shell" and params:
+            code, out = client.shell(serial, " ".join(params), timeout)
+            return _completed(cmd, code, out)
+        if command == "tcpip" and len(params) == 1:
+            return _completed(cmd, 0, client.tcpip(serial, int(params[0]), timeout))
+        if command in ("connect", "disconnect") and len(params) == 1:
+            target = params[0] if ":" in params[0] else f"{params[0]}:5555"
+            message = getattr(client, command)(target, timeout)
+            return _completed(cmd, 0, message + "\n")
+        if command == "kill-server" and not params:
+            client.kill_server()
+            return _completed(cmd, 0)
+    except AdbServerUnavailable:
+        return None
+    except AdbClientError as e:
+        # 与命令行一致：server 拒绝的请求返回非零退出码，原因写入 stderr
+        return _completed(cmd, 1, "", f"adb: error: {e}\n")
+    except socket.timeout:
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    except OSError as e:
+        return _completed(cmd, 1, "", f"adb: error: {e}\n")
+    return None
+
+
+class FakeAdbServer:
+    """
+    本地替身 adb server，实现 AdbClient 用到的协议子集，便于在没有 adb/设备的环境中调试。
+    shell_handler(serial, command) 返回 (退出码, 输出)。
+    """
+
+    def __init__(
+        self,
+        devices: Optional[Dict[str, str]] = None,
+        shell_handler: Optional[Callable[[str, str], Tuple[int, str]]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.devices = dict(devices or {})
+        self.shell_handler = shell_handler or (lambda serial, command: (0, ""))
+        self.requests: List[str] = []
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind((host, port))
+        self.host, self.port = self._listener.getsockname()
+        self._ids = {serial: i + 1 for i, serial in enumerate(self.devices)}
+        self._changed = threading.Condition()
+        self._generation = 0
+
+    def set_device(self, serial: str, state: Optional[str] = "device"):
+        """添加/修改 (state 为 None 时移除) 一台设备，并通知所有 track-devices 连接。"""
+        with self._changed:
+            if state is None:
+                self.devices.pop(serial, None)
+            else:
+                self.devices[serial] = state
+                self._ids.setdefault(serial, max(self._ids.values(), default=0) + 1)
+            self._generation += 1
+            self._changed.notify_all()
+
+    def _device_text(self) -> str:
+        return "".join(f"{s}\t{state}\n" for s, state in self.devices.items())
+
+    def start(self) -> "FakeAdbServer":
+        self._listener.listen(16)
+        threading.Thread(target=self._accept_loop, daemon=True, name="FakeAdbServer").start()
+        return self
+
+    def close(self):
+        try:
+            self._listener.close()
+        except Exception:
+            pass
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn, _ = self._listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    @staticmethod
+    def _send_string(conn: socket.socket, text: str):
+        conn.sendall(_encode_request(text))
+
+    def _fail(self, conn: socket.socket, message: str):
+        conn.sendall(b"FAIL")
+        self._send_string(conn, message)
+
+    def _serve(self, conn: socket.socket):
+        serial: Optional[str] = None
+        try:
+            while True:
+                try:
+                    length = int(_recv_exact(conn, 4).decode("ascii"), 16)
+                except ConnectionError:
+                    return
+                request = _recv_exact(conn, length).decode("utf-8")
+                self.requests.append(request)
+                if request == "host:version":
+                    conn.sendall(b"OKAY")
+                    self._send_string(conn, "0029")
+                    return
+                if request == "host:devices":
+                    conn.sendall(b"OKAY")
+                    self._send_string(conn, self._device_text())
+                    return
+                if request == "host:track-devices":
+                    conn.sendall(b"OKAY")
+                    while True:
+                        with self._changed:
+                            generation = self._generation
+                            text = self._device_text()
+                        self._send_string(conn, text)
+                        with self._changed:
+                            self._changed.wait_for(lambda: self._generation != generation)
+                if request.startswith(("host:connect:", "host:disconnect:")):
+                    action, target = request.split(":", 2)[1:]
+                    conn.sendall(b"OKAY")
+                    verb = "connected to" if action == "connect" else "disconnected"
+                    self._send_string(conn, f"{verb} {target}")
+                    return
+                if request == "host:kill":
+                    conn.sendall(b"OKAY")
+                    return
+                if request.startswith("host:tport:serial:"):
+                    serial = request[len("host:tport:serial:") :]
+                    if serial not in self.devices:
+                        self._fail(conn, f"device '{serial}' not found")
+                        return
+                    conn.sendall(b"OKAY" + struct.pack("<Q", self._ids[serial]))
+                    continue
+                if request.startswith("host:transport-id:"):
+                    transport_id = int(request.rsplit(":", 1)[1])
+                    serial = next((s for s, i in self._ids.items() if i == transport_id), None)
+                    if serial is None:
+                        self._fail(conn, "no device with transport id")
+                        return
+                    conn.sendall(b"OKAY")
+                    continue
+                if request.startswith("host:transport"):
+                    serial = request.split(":", 2)[2] if request.startswith("host:transport:") else next(iter(self.devices), None)
+                    if serial not in self.devices:
+                        self._fail(conn, f"device '{serial}' not found")
+                        return
+                    conn.sendall(b"OKAY")
+                    continue
+                if request.startswith("shell:") and serial is not None:
+                    command = request[len("shell:") :].rsplit(f"\necho {RC_MARKER}$?", 1)[0]
+                    code, output = self.shell_handler(serial, command)
+                    conn.sendall(b"OKAY" + f"{output}{RC_MARKER}{code}\n".encode("utf-8"))
+                    return
+                if request.startswith("tcpip:") and serial is not None:
+                    conn.sendall(b"OKAY" + f"restarting in TCP mode port: {request[6:]}\n".encode())
+                    return
+                self._fail(conn, "unknown host service")
+                return
+        except Exception:
+            pass
+        finally:
+            conn.close()
@@ -0,0 +1,160 @@
+# utils/frame_bus.py
+# =======================================================================
+#
+#        全功能控制器 - 共享帧总线模块
+#        每个目标窗口只有一个截图线程，P1检测器/P2狩猎器/启动门共享同一帧
+#
+# =======================================================================
+import threading
+import time
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+from .helpers import get_window_region
+from .lazy_import import lazy_import
+from .recorder import RECORDER
+from .screen_capture import ScreenCapture
+
+cv2 = lazy_import("cv2")
+
+# region/image 为 None 表示本次采样时窗口不存在 (或已最小化)
+Frame = namedtuple("Frame", ["seq", "timestamp", "region", "image"])
+
+
+class WindowFrameSource:
+    """单个窗口的截图线程，按订阅者中最短的间隔发布带时间戳的帧。"""
+
+    def __init__(self, window_title: str):
+        self.window_title = window_title
+        self._cond = threading.Condition()
+        self._latest: Optional[Frame] = None
+        self._seq = 0
+        self._intervals: List[float] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def interval(self) -> float:
+        with self._cond:
+            return min(self._intervals) if self._intervals else 1.0
+
+    def add_subscriber(self, interval: float):
+        with self._cond:
+            self._intervals.append(interval)
+            self._cond.notify_all()
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._loop,
+                daemon=True,
+                name=f"FrameSource[{self.window_title}]",
+            )
+            self._thread.start()
+
+    def remove_subscriber(self, interval: float) -> bool:
+        """移除一个订阅者；返回 True 表示已没有订阅者，截图线程随之停止。"""
+        with self._cond:
+            if interval in self._intervals:
+                self._intervals.remove(interval)
+            empty = not self._intervals
+            if empty:
+                self._stop.set()
+                self._cond.notify_all()
+        return empty
+
+    def latest(self) -> Optional[Frame]:
+        with self._cond:
+            return self._latest
+
+    def wait_newer(self, seq: int, timeout: float) -> Optional[Frame]:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._latest is None or self._latest.seq <= seq:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stop.is_set():
+                    return None
+                self._cond.wait(remaining)
+            return self._latest
+
+    def _publish(self, region, image):
+        with self._cond:
+            self._seq += 1
+            frame = self._latest = Frame(self._seq, time.monotonic(), region, image)
+            self._cond.notify_all()
+        if RECORDER.active:
+            RECORDER.record_frame(self.window_title, frame.seq, region, image, timestamp=frame.timestamp)
+
+    def _loop(self):
+        capture = ScreenCapture()
+        try:
+            while not self._stop.is_set():
+                started = time.monotonic()
+                region = get_window_region(self.window_title)
+                image = None
+                if region is not None:
+                    try:
+                        # 每帧转换到新分配的数组：订阅者可能长时间持有旧帧，复用的缓冲区会被之后的截图覆盖
+                        image = cv2.cvtColor(capture.grab_bgra(region), cv2.COLOR_BGRA2BGR)
+                        image.flags.writeable = False
+                    except Exception:
+                        image = None
+                self._publish(region if image is not None else None, image)
+                elapsed = time.monotonic() - started
+                self._stop.wait(max(0.0, self.interval - elapsed))
+        finally:
+            capture.close()
+
+
+class FrameSubscription:
+    """订阅者句柄：记录已处理过的帧序号，用于跳过重复帧。"""
+
+    def __init__(self, bus: "FrameBus", source: WindowFrameSource, interval: float):
+        self._bus = bus
+        self._source = source
+        self.interval = interval
+        self.window_title = source.window_title
+        self.last_seq = 0
+        self._closed = False
+
+    def latest(self) -> Optional[Frame]:
+        """返回最新帧 (不复制，可能是已处理过的帧)。"""
+        frame = self._source.latest()
+        if frame is not None:
+            self.last_seq = max(self.last_seq, frame.seq)
+        return frame
+
+    def next_frame(self, timeout: float) -> Optional[Frame]:
+        """等待一帧尚未处理过的新帧；超时返回 None。"""
+        frame = self._source.wait_newer(self.last_seq, timeout)
+        if frame is not None:
+            self.last_seq = frame.seq
+        return frame
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._bus._unsubscribe(self)
+
+
+class FrameBus:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sources: Dict[str, WindowFrameSource] = {}
+
+    def subscribe(self, window_title: str, interval: float = 0.5) -> FrameSubscription:
+        with self._lock:
+            source = self._sources.get(window_title)
+            if source is None:
+                source = WindowFrameSource(window_title)
+                self._sources[window_title] = source
+            source.add_subscriber(interval)
+        return FrameSubscription(self, source, interval)
+
+    def _unsubscribe(self, sub: FrameSubscription):
+        with self._lock:
+            source = self._sources.get(sub.window_title)
+            if source is sub._source and source.remove_subscriber(sub.interval):
+                del self._sources[sub.window_title]
+
+
+FRAME_BUS = FrameBus()
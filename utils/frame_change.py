@@ -0,0 +1,71 @@
+# utils/frame_change.py
+# =======================================================================
+#
+#        全功能控制器 - 画面变化检测模块 (静止画面跳过模板匹配)
+#
+# =======================================================================
+from typing import Any, Dict, Hashable, Optional
+
+import numpy as np
+
+from .lazy_import import lazy_import
+
+cv2 = lazy_import("cv2")
+
+# 计算签名时把帧缩小到的宽度 (像素)
+SIGNATURE_WIDTH = 64
+# 默认阈值：缩小后的灰度图中任一像素变化超过该值即视为画面已变化
+DEFAULT_CHANGE_THRESHOLD = 8.0
+
+
+def frame_signature(image: np.ndarray) -> np.ndarray:
+    """把帧缩小为低分辨率灰度图，作为廉价的画面签名。"""
+    h, w = image.shape[:2]
+    sig_w = min(SIGNATURE_WIDTH, w)
+    sig_h = max(1, round(h * sig_w / w))
+    small = cv2.resize(image, (sig_w, sig_h), interpolation=cv2.INTER_AREA)
+    code = cv2.COLOR_BGRA2GRAY if small.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+    return cv2.cvtColor(small, code)
+
+
+class FrameChangeGate:
+    """
+    放在模板匹配之前的变化检测。
+    与上一次 "实际执行了匹配" 的帧比较 (而不是上一帧)，避免缓慢渐变被一直忽略。
+    使用取最大差值而非平均差值，这样小图标的出现/消失也能被发现。
+    threshold <= 0 时关闭，每一帧都执行匹配。
+    """
+
+    def __init__(self, threshold: float = DEFAULT_CHANGE_THRESHOLD):
+        self.threshold = threshold
+        self._signature: Optional[np.ndarray] = None
+        self._key: Optional[Hashable] = None
+        self.skipped = 0
+        self.evaluated = 0
+
+    def should_evaluate(self, image: np.ndarray, key: Hashable = None) -> bool:
+        """
+        返回 True 表示画面 (或查询条件 key) 已变化，需要重新匹配；
+        返回 False 表示可以直接复用上一次的匹配结果。
+        """
+        if self.threshold > 0 and self._signature is not None and key == self._key:
+            signature = frame_signature(image)
+            if signature.shape == self._signature.shape:
+                diff = cv2.absdiff(signature, self._signature)
+                if float(diff.max()) <= self.threshold:
+                    self.skipped += 1
+                    return False
+        else:
+            signature = frame_signature(image) if self.threshold > 0 else None
+
+        self._signature = signature
+        self._key = key
+        self.evaluated += 1
+        return True
+
+    def reset(self):
+        self._signature = None
+        self._key = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"skipped": self.skipped, "evaluated": self.evaluated}
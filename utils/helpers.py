@@ -7,69 +7,48 @@
 import os
 import shutil
 import subprocess
-from typing import List, Tuple, Optional
-from collections import namedtuple
+import time
+from typing import TYPE_CHECKING, List, Tuple, Optional
 
-import cv2
-import numpy as np
-from mss import mss
-import win32gui
+from config import POSSIBLE_ADB_PATHS, USE_NATIVE_ADB_CLIENT, si
+from .adb_client import run_adb_native
+from .metrics import METRICS
+from .recorder import RECORDER
+from .window_tracker import WINDOW_TRACKER
 
-from config import POSSIBLE_ADB_PATHS, si
+if TYPE_CHECKING:
+    import numpy as np
 
-Box = namedtuple("Box", ["left", "top", "width", "height"])
+    from .vision import Box
+
+
+def capture_region(
+    region: Optional[Tuple[int, int, int, int]] = None,
+) -> Optional["np.ndarray"]:
+    """
+    截取屏幕区域 (region 为空时截取整个虚拟屏幕)，返回 BGR 图像。
+    使用当前线程的常驻截图会话，返回的数组在本线程下一次截图时会被复用。
+    """
+    # 截图/匹配模块在用到时才导入，只需要 adb 助手函数的入口不必加载它们
+    from .screen_capture import get_capture_session
+
+    try:
+        return get_capture_session().grab(region)
+    except Exception:
+        return None
 
 
 def find_image_with_opencv(
     template_path: str,
     confidence: float,
     region: Optional[Tuple[int, int, int, int]] = None,
-) -> Optional[Box]:
-    try:
-        template = cv2.imread(template_path, cv2.IMREAD_UNCHANGED)
-        if template is None:
-            return None
-        template_h, template_w = template.shape[:2]
-
-        mask = None
-        if template.shape[2] == 4:
-            alpha_channel = template[:, :, 3]
-            _, mask = cv2.threshold(alpha_channel, 0, 255, cv2.THRESH_BINARY)
-            template = cv2.cvtColor(template, cv2.COLOR_BGRA2BGR)
-
-        with mss() as sct:
-            monitor = (
-                {
-                    "top": region[1],
-                    "left": region[0],
-                    "width": region[2],
-                    "height": region[3],
-                }
-                if region
-                else sct.monitors[0]
-            )
-            screenshot_img = sct.grab(monitor)
-            screenshot = np.array(screenshot_img)
-            screenshot_bgr = cv2.cvtColor(screenshot, cv2.COLOR_BGRA2BGR)
-
-        method = cv2.TM_CCOEFF_NORMED
-        result = (
-            cv2.matchTemplate(screenshot_bgr, template, method, mask=mask)
-            if mask is not None
-            else cv2.matchTemplate(screenshot_bgr, template, method)
-        )
-        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
-
-        if max_val >= confidence:
-            top_left = max_loc
-            final_left = top_left[0] + region[0] if region else top_left[0]
-            final_top = top_left[1] + region[1] if region else top_left[1]
-            return Box(
-                left=final_left, top=final_top, width=template_w, height=template_h
-            )
-    except Exception:
+) -> Optional["Box"]:
+    from .vision import match_template
+
+    frame = capture_region(region)
+    if frame is None:
         return None
-    return None
+    return match_template(frame, template_path, confidence=confidence, region=region)
 
 
 def find_adb() -> Optional[str]:
@@ -85,17 +64,35 @@ def find_adb() -> Optional[str]:
 def run_adb(
     adb_path: str, args: List[str], timeout: Optional[float] = None
 ) -> subprocess.CompletedProcess:
+    started = time.perf_counter()
+    device = args[1] if len(args) >= 2 and args[0] == "-s" else ""
+    command = args[2] if device and len(args) > 2 else (args[0] if args else "")
+    if USE_NATIVE_ADB_CLIENT:
+        # 常用命令直接走 adb server 协议，省去启动 adb 进程
+        result = run_adb_native(adb_path, args, timeout)
+        if result is not None:
+            METRICS.observe(
+                "adb_command_ms", (time.perf_counter() - started) * 1000.0,
+                command=command, device=device, transport="native",
+            )
+            return result
     cmd = [adb_path] + args
-    return subprocess.run(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        timeout=timeout,
-        startupinfo=si,
-        encoding="utf-8",
-        errors="ignore",
-    )
+    try:
+        return subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            timeout=timeout,
+            startupinfo=si,
+            encoding="utf-8",
+            errors="ignore",
+        )
+    finally:
+        METRICS.observe(
+            "adb_command_ms", (time.perf_counter() - started) * 1000.0,
+            command=command, device=device, transport="process",
+        )
 
 
 def get_connected_devices(adb_path: str) -> List[str]:
@@ -112,12 +109,16 @@ def get_connected_devices(adb_path: str) -> List[str]:
 
 
 def get_window_region(window_title: str) -> Optional[Tuple[int, int, int, int]]:
+    """窗口客户区 (不含标题栏和边框) 的屏幕区域，句柄和位置由 WINDOW_TRACKER 缓存。"""
+    with METRICS.timed("window_region_ms"):
+        region = _get_window_region(window_title)
+    if RECORDER.active:
+        RECORDER.record_region(window_title, region)
+    return region
+
+
+def _get_window_region(window_title: str) -> Optional[Tuple[int, int, int, int]]:
     try:
-        hwnd = win32gui.FindWindow(None, window_title)
-        if not hwnd or win32gui.IsIconic(hwnd):
-            return None
-        left, top, right, bottom = win32gui.GetWindowRect(hwnd)
-        width, height = right - left, bottom - top
-        return (left, top, width, height) if width > 0 and height > 0 else None
+        return WINDOW_TRACKER.region(window_title)
     except Exception:
         return None
@@ -0,0 +1,91 @@
+# utils/lazy_import.py
+# =======================================================================
+#
+#        全功能控制器 - 延迟导入模块
+#        OpenCV/mss 等较重的依赖在第一次真正使用时才加载，程序启动和窗口首次显示不用等待；
+#        启动后可在后台线程调用 preload() 提前加载
+#
+# =======================================================================
+import importlib
+import threading
+import time
+from types import ModuleType
+from typing import Any, Dict, Optional
+
+from .metrics import METRICS
+
+
+class LazyModule:
+    """
+    模块占位对象，第一次访问属性时导入真正的模块：
+        cv2 = lazy_import("cv2")
+        cv2.resize(...)  # 此时才会 import cv2
+    注意：模块级常量 (如默认参数) 中引用其属性会让模块在导入时就被加载。
+    """
+
+    def __init__(self, name: str):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+        self.__dict__["_lock"] = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        module = self.__dict__["_module"]
+        if module is None:
+            with self.__dict__["_lock"]:
+                module = self.__dict__["_module"]
+                if module is None:
+                    started = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    METRICS.observe(
+                        "lazy_import_ms", (time.perf_counter() - started) * 1000.0, module=self._name
+                    )
+                    self.__dict__["_module"] = module
+        return module
+
+    @property
+    def loaded(self) -> bool:
+        return self.__dict__["_module"] is not None
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr: str, value: Any):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self) -> str:
+        state = "已加载" if self.loaded else "未加载"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+_LAZY_MODULES: Dict[str, LazyModule] = {}
+_registry_lock = threading.Lock()
+
+
+def lazy_import(name: str) -> Any:
+    """返回模块的延迟加载占位对象；同名模块共享同一个占位对象。"""
+    with _registry_lock:
+        module = _LAZY_MODULES.get(name)
+        if module is None:
+            module = _LAZY_MODULES[name] = LazyModule(name)
+        return module
+
+
+def preload(*names: str) -> Dict[str, Optional[float]]:
+    """
+    立即加载指定的模块 (不指定时加载所有已登记的延迟模块)，返回每个模块的加载耗时 (ms)；
+    已加载的记为 0，导入失败的记为 None。供启动后的后台预热使用。
+    """
+    timings: Dict[str, Optional[float]] = {}
+    for name in names or tuple(_LAZY_MODULES):
+        module = lazy_import(name)
+        if module.loaded:
+            timings[name] = 0.0
+            continue
+        started = time.perf_counter()
+        try:
+            module._load()
+        except ImportError:
+            timings[name] = None
+            continue
+        timings[name] = (time.perf_counter() - started) * 1000.0
+    return timings
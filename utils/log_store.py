@@ -0,0 +1,154 @@
+# utils/log_store.py
+# =======================================================================
+#
+#        全功能控制器 - 日志子系统
+#        内存环形缓冲 + 待刷新队列 (界面定时批量取走) + 后台滚动写入 JSONL 文件
+#
+# =======================================================================
+import json
+import queue
+import re
+import threading
+import time
+from collections import deque, namedtuple
+from pathlib import Path
+from typing import Deque, List, Optional
+
+from config import LOG_BACKUP_COUNT, LOG_FOLDER, LOG_MAX_BYTES, LOG_RING_SIZE
+
+LogRecord = namedtuple("LogRecord", ["timestamp", "source", "message"])
+
+# 从 "[滑动器] xxx" 形式的消息中取出来源
+_SOURCE_RE = re.compile(r"^\s*\[([^\]]+)\]")
+
+
+def format_record(record: LogRecord) -> str:
+    return f"{time.strftime('%H:%M:%S', time.localtime(record.timestamp))} — {record.message}"
+
+
+class RotatingJsonlSink:
+    """
+    后台线程写入的 JSONL 日志文件，超过 max_bytes 时滚动为 name.1.jsonl ... name.N.jsonl。
+    写入方只把记录放进队列，不会被磁盘 I/O 阻塞。
+    """
+
+    def __init__(
+        self,
+        folder: Path = LOG_FOLDER,
+        name: str = "controller",
+        max_bytes: int = LOG_MAX_BYTES,
+        backup_count: int = LOG_BACKUP_COUNT,
+    ):
+        self.folder = folder
+        self.name = name
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.path = folder / f"{name}.jsonl"
+        self._queue: "queue.Queue[Optional[LogRecord]]" = queue.Queue()
+        self._file = None
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._loop, daemon=True, name="LogSink")
+        self._thread.start()
+
+    def write(self, record: LogRecord):
+        self._queue.put(record)
+
+    def close(self, timeout: float = 2.0):
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _open(self):
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            src = self.folder / f"{self.name}.{i}.jsonl"
+            if src.exists():
+                src.replace(self.folder / f"{self.name}.{i + 1}.jsonl")
+        if self.backup_count > 0:
+            self.path.replace(self.folder / f"{self.name}.1.jsonl")
+        else:
+            self.path.unlink()
+        self._open()
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            # 一次取走队列里已有的全部记录，合并成一次写入
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            lines = [
+                json.dumps(record._asdict(), ensure_ascii=False) + "\n"
+                for record in batch
+                if record is not None
+            ]
+            try:
+                if lines:
+                    if self._file is None:
+                        self._open()
+                    self._file.write("".join(lines))
+                    self._file.flush()
+                    if self._file.tell() >= self.max_bytes:
+                        self._rotate()
+            except Exception:
+                self.dropped += len(lines)
+            if stop:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                return
+
+
+class LogStore:
+    """
+    线程安全的日志存储。append() 可在任意线程调用：
+    - 记录进入固定长度的环形缓冲 (最近 ring_size 条)；
+    - 同时进入待刷新队列，由界面定时器用 drain() 批量取走显示；
+    - 设置了 sink 时写入磁盘。
+    """
+
+    def __init__(self, ring_size: int = LOG_RING_SIZE, sink: Optional[RotatingJsonlSink] = None):
+        self._lock = threading.Lock()
+        self._ring: Deque[LogRecord] = deque(maxlen=ring_size)
+        self._pending: Deque[LogRecord] = deque(maxlen=ring_size)
+        self.sink = sink
+        self.total = 0
+
+    def append(self, message: str, source: Optional[str] = None) -> LogRecord:
+        if source is None:
+            m = _SOURCE_RE.match(message)
+            source = m.group(1) if m else "主程序"
+        record = LogRecord(time.time(), source, message)
+        with self._lock:
+            self._ring.append(record)
+            self._pending.append(record)
+            self.total += 1
+        if self.sink is not None:
+            self.sink.write(record)
+        return record
+
+    def drain(self) -> List[LogRecord]:
+        """取走自上次调用以来的新记录 (积压超过环形缓冲长度时只保留最新的部分)。"""
+        with self._lock:
+            records = list(self._pending)
+            self._pending.clear()
+        return records
+
+    def recent(self, limit: Optional[int] = None) -> List[LogRecord]:
+        with self._lock:
+            records = list(self._ring)
+        return records[-limit:] if limit else records
+
+    def close(self):
+        if self.sink is not None:
+            self.sink.close()
+            self.sink = None
+
+
+LOG_STORE = LogStore()
@@ -0,0 +1,126 @@
+# utils/match_modes.py
+# =======================================================================
+#
+#        全功能控制器 - 模板匹配模式模块
+#        每个模板可以选择彩色 (默认)、灰度或 Canny 边缘图匹配；颜色不携带信息的模板
+#        改用单通道匹配，计算量约为彩色的三分之一
+#
+# =======================================================================
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from config import EDGE_CANNY_HIGH, EDGE_CANNY_LOW, EDGE_DILATE, MATCH_MODE_SIDECAR
+from .lazy_import import lazy_import
+
+cv2 = lazy_import("cv2")
+
+COLOR, GRAY, EDGE = "color", "gray", "edge"
+MATCH_MODES = (COLOR, GRAY, EDGE)
+
+# 同一文件夹的配置文件在该时间内只检查一次是否被修改
+SIDECAR_RECHECK_S = 1.0
+# 转换后标准差低于该值的模板视为没有纹理 (如边缘图全为 0)：归一化相关在任何位置都得到相同得分
+FLAT_TEMPLATE_STD = 1.0
+
+
+def mode_from_name(path: str) -> Optional[str]:
+    """文件名后缀形式的模式 ("图标@edge.png" -> "edge")；没有或无法识别时返回 None。"""
+    stem = Path(path).stem
+    if "@" not in stem:
+        return None
+    mode = stem.rsplit("@", 1)[1].lower()
+    return mode if mode in MATCH_MODES else None
+
+
+class _SidecarCache:
+    """各文件夹 MATCH_MODE_SIDECAR 的解析结果，文件修改后自动重新读取。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 文件夹 -> (上次检查时间, 文件 mtime, {文件名: 模式})
+        self._entries: Dict[str, Tuple[float, Optional[int], Dict[str, str]]] = {}
+
+    def modes(self, folder: str) -> Dict[str, str]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(folder)
+            if entry is not None and now - entry[0] < SIDECAR_RECHECK_S:
+                return entry[2]
+        sidecar = os.path.join(folder, MATCH_MODE_SIDECAR)
+        try:
+            mtime: Optional[int] = os.stat(sidecar).st_mtime_ns
+        except OSError:
+            mtime = None
+        if entry is not None and entry[1] == mtime:
+            modes = entry[2]
+        else:
+            modes = _read_sidecar(sidecar) if mtime is not None else {}
+        with self._lock:
+            self._entries[folder] = (now, mtime, modes)
+        return modes
+
+
+def _read_sidecar(sidecar: str) -> Dict[str, str]:
+    try:
+        with open(sidecar, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    return {str(k): str(v).lower() for k, v in data.items() if str(v).lower() in MATCH_MODES}
+
+
+_SIDECARS = _SidecarCache()
+
+
+def template_mode(path: str) -> str:
+    """模板的匹配模式：文件名后缀 > 配置文件中的文件名 > 配置文件中的 "*" > 彩色。"""
+    mode = mode_from_name(path)
+    if mode is not None:
+        return mode
+    folder, name = os.path.split(path)
+    modes = _SIDECARS.modes(folder)
+    return modes.get(name) or modes.get("*") or COLOR
+
+
+def write_sidecar(folder: Path, modes: Dict[str, str]):
+    with open(folder / MATCH_MODE_SIDECAR, "w", encoding="utf-8") as f:
+        json.dump(modes, f, ensure_ascii=False, indent=2)
+
+
+def to_gray(image: np.ndarray) -> np.ndarray:
+    """BGR/BGRA/单通道 -> 单通道灰度图。"""
+    if image.ndim == 2:
+        return image
+    code = cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+    return cv2.cvtColor(image, code)
+
+
+def to_edges(gray: np.ndarray) -> np.ndarray:
+    """灰度图 -> Canny 边缘图 (按 EDGE_DILATE 膨胀，帧和模板使用同一处理，自身匹配得分仍为 1)。"""
+    edges = cv2.Canny(gray, EDGE_CANNY_LOW, EDGE_CANNY_HIGH)
+    if EDGE_DILATE > 1:
+        edges = cv2.dilate(edges, np.ones((EDGE_DILATE, EDGE_DILATE), np.uint8))
+    return edges
+
+
+def is_flat(image: np.ndarray) -> bool:
+    """图像是否几乎没有变化 (全黑/全白/纯色)，这样的模板无法定位。"""
+    _, std = cv2.meanStdDev(image)
+    return float(std.max()) < FLAT_TEMPLATE_STD
+
+
+def convert(image: np.ndarray, mode: str) -> np.ndarray:
+    """把 BGR(A) 图像转换为指定模式下参与匹配的图像；彩色模式原样返回。"""
+    if mode == GRAY:
+        return to_gray(image)
+    if mode == EDGE:
+        return to_edges(to_gray(image))
+    return image
@@ -0,0 +1,200 @@
+# utils/matcher.py
+# =======================================================================
+#
+#        全功能控制器 - 有状态模板匹配器 (记住上次命中位置的局部搜索)
+#
+# =======================================================================
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .metrics import METRICS
+from .template_cache import get_template
+from .vision import Box, FrameLike, prepare_frame, locate_template, to_screen_box
+
+# 局部搜索时在上次命中框四周额外扩展的像素
+LOCALITY_MARGIN = 24
+
+# 匹配线程池大小：cv2.matchTemplate 会释放 GIL，多个模板可以真正并行
+MATCH_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_match_pool() -> ThreadPoolExecutor:
+    """进程共享的有界匹配线程池 (首次使用时创建)。"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=MATCH_WORKERS, thread_name_prefix="TemplateMatch"
+            )
+        return _pool
+
+
+class TemplateMatcher:
+    """
+    记录每个模板上一次命中的位置 (帧内坐标)。
+    下次扫描时先只搜索该位置附近的小区域，未命中再回退到整窗口搜索。
+    每个使用者 (狩猎器、P1检测器、启动门) 各持有一个实例。
+    """
+
+    def __init__(self, locality: bool = True, margin: int = LOCALITY_MARGIN):
+        self.locality = locality
+        self.margin = margin
+        self._lock = threading.Lock()
+        # path -> (帧尺寸, 上次命中的左上角)
+        self._last_hits: Dict[str, Tuple[Tuple[int, int], Tuple[int, int]]] = {}
+        self.locality_hits = 0
+        self.fallbacks = 0
+        self.full_searches = 0
+
+    def _local_roi(
+        self, path: str, frame_shape: Tuple[int, int], width: int, height: int
+    ) -> Optional[Tuple[int, int, int, int]]:
+        with self._lock:
+            last = self._last_hits.get(path)
+        if last is None or last[0] != frame_shape:
+            return None
+        (x, y), (frame_h, frame_w) = last[1], frame_shape
+        x0, y0 = max(0, x - self.margin), max(0, y - self.margin)
+        x1 = min(frame_w, x + width + self.margin)
+        y1 = min(frame_h, y + height + self.margin)
+        return x0, y0, x1 - x0, y1 - y0
+
+    def _remember(self, path: str, frame_shape: Tuple[int, int], loc: Tuple[int, int]):
+        with self._lock:
+            self._last_hits[path] = (frame_shape, loc)
+
+    def match(
+        self,
+        frame: FrameLike,
+        template_path: str,
+        confidence: float,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        pyramid: bool = False,
+    ) -> Optional[Box]:
+        """与 vision.match_template 语义相同，但优先在上次命中位置附近搜索。"""
+        started = time.perf_counter()
+        box = self._match(frame, template_path, confidence, region, pyramid)
+        if METRICS.enabled:
+            template = os.path.basename(template_path)
+            METRICS.observe("template_match_ms", (time.perf_counter() - started) * 1000.0, template=template)
+            if box is not None:
+                METRICS.inc("template_hits", template=template)
+        return box
+
+    def _match(
+        self,
+        frame: FrameLike,
+        template_path: str,
+        confidence: float,
+        region: Optional[Tuple[int, int, int, int]],
+        pyramid: bool,
+    ) -> Optional[Box]:
+        try:
+            prepared = prepare_frame(frame)
+            template = get_template(template_path)
+            if template is None:
+                return None
+            frame_shape = prepared.image.shape[:2]
+
+            roi = (
+                self._local_roi(
+                    template_path, frame_shape, template.width, template.height
+                )
+                if self.locality
+                else None
+            )
+            if roi is not None:
+                found = locate_template(prepared, template, confidence, roi=roi)
+                if found is not None and found[0] >= confidence:
+                    with self._lock:
+                        self.locality_hits += 1
+                    self._remember(template_path, frame_shape, found[1])
+                    return to_screen_box(found[1], template, region)
+                with self._lock:
+                    self.fallbacks += 1
+            else:
+                with self._lock:
+                    self.full_searches += 1
+
+            found = locate_template(prepared, template, confidence, pyramid=pyramid)
+            if found is not None and found[0] >= confidence:
+                self._remember(template_path, frame_shape, found[1])
+                return to_screen_box(found[1], template, region)
+        except Exception:
+            return None
+        return None
+
+    def match_all(
+        self,
+        frame: FrameLike,
+        template_paths: Sequence[str],
+        confidence: float,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        pyramid: bool = False,
+    ) -> List[Optional[Box]]:
+        prepared = prepare_frame(frame)
+        return [
+            self.match(prepared, path, confidence, region=region, pyramid=pyramid)
+            for path in template_paths
+        ]
+
+    def find_first(
+        self,
+        frame: FrameLike,
+        ordered_paths: Sequence[str],
+        confidence: float,
+        region: Optional[Tuple[int, int, int, int]] = None,
+        pyramid: bool = False,
+    ) -> Optional[Tuple[int, Box]]:
+        """
+        按优先级顺序 (ordered_paths 的顺序) 在线程池中并行匹配，
+        返回优先级最高的命中 (序号, Box)。
+        某个模板命中且比它优先的模板都已确认未命中时，立即取消其余任务。
+        """
+        prepared = prepare_frame(frame)
+        if len(ordered_paths) <= 1 or MATCH_WORKERS <= 1:
+            for index, path in enumerate(ordered_paths):
+                box = self.match(prepared, path, confidence, region, pyramid)
+                if box:
+                    return index, box
+            return None
+
+        cancelled = threading.Event()
+
+        def task(path: str) -> Optional[Box]:
+            # 已排队但尚未开始的任务在取消后直接跳过
+            if cancelled.is_set():
+                return None
+            return self.match(prepared, path, confidence, region, pyramid)
+
+        pool = get_match_pool()
+        futures = [pool.submit(task, path) for path in ordered_paths]
+        try:
+            for index, future in enumerate(futures):
+                box = future.result()
+                if box:
+                    return index, box
+            return None
+        finally:
+            cancelled.set()
+            for future in futures:
+                future.cancel()
+
+    def reset(self):
+        with self._lock:
+            self._last_hits.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "locality_hits": self.locality_hits,
+                "fallbacks": self.fallbacks,
+                "full_searches": self.full_searches,
+                "remembered": len(self._last_hits),
+            }
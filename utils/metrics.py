@@ -0,0 +1,226 @@
+# utils/metrics.py
+# =======================================================================
+#
+#        全功能控制器 - 运行指标 (计数器 + 延迟直方图)
+#        固定分桶、每个指标一把锁，开销足够低，可以在正式运行时常开
+#
+# =======================================================================
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+from config import METRICS_ENABLED
+
+# 直方图分桶上界 (毫秒)，最后一个桶为 +Inf
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Counter:
+    __slots__ = ("name", "labels", "value", "_lock")
+
+    def __init__(self, name: str, labels: LabelKey):
+        self.name = name
+        self.labels = labels
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    __slots__ = ("name", "labels", "bounds", "buckets", "count", "total", "max", "_lock")
+
+    def __init__(self, name: str, labels: LabelKey, bounds=LATENCY_BUCKETS_MS):
+        self.name = name
+        self.labels = labels
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.buckets[index] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q: float) -> float:
+        """按分桶估算分位数 (桶内线性插值)。"""
+        with self._lock:
+            buckets, count, peak = list(self.buckets), self.count, self.max
+        if count == 0:
+            return 0.0
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(buckets):
+            if n and seen + n >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else peak
+                return min(peak, lower + (upper - lower) * (rank - seen) / n)
+            seen += n
+        return peak
+
+    def summary(self) -> Dict[str, float]:
+        with self._lock:
+            count, total, peak = self.count, self.total, self.max
+        return {
+            "count": count,
+            "avg": total / count if count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "max": peak,
+        }
+
+
+class MetricsRegistry:
+    """
+    指标注册表。同名指标按标签 (设备、模板等) 分开统计：
+        METRICS.observe("capture_ms", 3.2)
+        with METRICS.timed("template_match_ms", template="a1.png"):
+            ...
+    enabled=False 时所有记录操作直接返回。
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, LabelKey], Counter] = {}
+        self._histograms: Dict[Tuple[str, LabelKey], Histogram] = {}
+        self.started_at = time.time()
+
+    def counter(self, name: str, **labels: Any) -> Counter:
+        key = (name, _label_key(labels))
+        metric = self._counters.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._counters.setdefault(key, Counter(name, key[1]))
+        return metric
+
+    def histogram(self, name: str, **labels: Any) -> Histogram:
+        key = (name, _label_key(labels))
+        metric = self._histograms.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._histograms.setdefault(key, Histogram(name, key[1]))
+        return metric
+
+    def inc(self, name: str, amount: int = 1, **labels: Any):
+        if self.enabled:
+            self.counter(name, **labels).inc(amount)
+
+    def observe(self, name: str, value_ms: float, **labels: Any):
+        if self.enabled:
+            self.histogram(name, **labels).observe(value_ms)
+
+    @contextmanager
+    def timed(self, name: str, **labels: Any) -> Iterator[None]:
+        """记录代码块耗时 (毫秒)，块内抛出的异常另计入 <name>_errors 计数器。"""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.counter(f"{name}_errors", **labels).inc()
+            raise
+        finally:
+            self.histogram(name, **labels).observe((time.perf_counter() - started) * 1000.0)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+        self.started_at = time.time()
+
+    # ---------- 导出 ----------
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        with self._lock:
+            counters = list(self._counters.values())
+            histograms = list(self._histograms.values())
+        return {
+            "counters": [
+                {"name": c.name, "labels": dict(c.labels), "value": c.value}
+                for c in sorted(counters, key=lambda c: (c.name, c.labels))
+            ],
+            "histograms": [
+                {"name": h.name, "labels": dict(h.labels), **h.summary()}
+                for h in sorted(histograms, key=lambda h: (h.name, h.labels))
+            ],
+        }
+
+    def to_json(self) -> str:
+        data = {"started_at": self.started_at, "exported_at": time.time(), **self.snapshot()}
+        return json.dumps(data, ensure_ascii=False, indent=2)
+
+    def to_prometheus(self, prefix: str = "controller_") -> str:
+        def fmt_labels(labels: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            items = list(labels) + list(extra)
+            if not items:
+                return ""
+            escaped = (v.replace("\\", "\\\\").replace('"', '\\"') for _, v in items)
+            return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+        with self._lock:
+            counters = sorted(self._counters.values(), key=lambda c: (c.name, c.labels))
+            histograms = sorted(self._histograms.values(), key=lambda h: (h.name, h.labels))
+        lines: List[str] = []
+        declared = set()
+        for c in counters:
+            name = prefix + c.name
+            if name not in declared:
+                lines.append(f"# TYPE {name} counter")
+                declared.add(name)
+            lines.append(f"{name}{fmt_labels(c.labels)} {c.value}")
+        for h in histograms:
+            name = prefix + h.name
+            if name not in declared:
+                lines.append(f"# TYPE {name} histogram")
+                declared.add(name)
+            with h._lock:
+                buckets, count, total = list(h.buckets), h.count, h.total
+            cumulative = 0
+            for bound, n in zip(list(h.bounds) + ["+Inf"], buckets):
+                cumulative += n
+                lines.append(f"{name}_bucket{fmt_labels(h.labels, (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{name}_sum{fmt_labels(h.labels)} {total}")
+            lines.append(f"{name}_count{fmt_labels(h.labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def format_snapshot(snapshot: Dict[str, List[Dict[str, Any]]]) -> str:
+    """把 snapshot() 的结果排成适合等宽显示的文字 (统计面板使用)。"""
+    def title(name: str, labels: Dict[str, str]) -> str:
+        return " ".join([name] + [f"{k}={v}" for k, v in labels.items() if v])
+
+    lines: List[str] = []
+    for h in snapshot["histograms"]:
+        lines.append(
+            f"{title(h['name'], h['labels'])}\n"
+            f"    n={h['count']}  avg={h['avg']:.1f}  p50={h['p50']:.1f}  "
+            f"p95={h['p95']:.1f}  max={h['max']:.1f} ms"
+        )
+    if snapshot["counters"]:
+        lines.append("")
+    for c in snapshot["counters"]:
+        lines.append(f"{title(c['name'], c['labels'])} = {c['value']}")
+    return "\n".join(lines) if lines else "暂无数据"
+
+
+METRICS = MetricsRegistry()
@@ -0,0 +1,309 @@
+# utils/recorder.py
+# =======================================================================
+#
+#        全功能控制器 - 会话录制 (截图帧 + 窗口位置 + 匹配结果 + 动作)
+#        录下的会话可以在任意机器上用 bench/replay_session.py 离线回放
+#
+# =======================================================================
+#
+# 会话目录结构:
+#     session_YYYYmmdd_HHMMSS/events.jsonl     按时间顺序的事件，t 为 time.monotonic()
+#     session_YYYYmmdd_HHMMSS/frames/<id>.png  截图帧 (PNG 无损压缩，内容相同的帧只保存一次)
+#     session_YYYYmmdd_HHMMSS/templates/...    录制时使用的模板副本，回放不依赖原机器上的文件
+# 整个目录打包成 zip 后同样可以回放。
+#
+import hashlib
+import json
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config import SESSION_FOLDER
+from .lazy_import import lazy_import
+
+# 只在录制/回放时用到，不让 helpers 等轻量模块在导入时加载 (match_modes 同理，在用到的函数内导入)
+cv2 = lazy_import("cv2")
+np = lazy_import("numpy")
+
+SESSION_FORMAT_VERSION = 1
+PNG_COMPRESSION = 3  # 0~9，越大越小也越慢；3 对截图已经足够
+# 写入线程积压的帧超过该数量时丢弃新帧 (事件仍会记录，frame 为 null)，避免录制拖慢截图线程
+MAX_PENDING_FRAMES = 64
+
+
+def _json_default(value: Any) -> Any:
+    # 事件里可能混入 NumPy 标量/数组或元组以外的序列
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def describe_match(hit: Optional[Tuple[Any, str, str]]) -> Optional[Dict[str, Any]]:
+    """把 (Box, 模板路径, 动作) 形式的命中结果转成可序列化的字典。"""
+    if hit is None:
+        return None
+    box, path, action = hit
+    return {"template": Path(path).name, "action": action, "box": [int(v) for v in box]}
+
+
+class SessionRecorder:
+    """
+    会话录制器 (线程安全)。未启动时所有记录方法立即返回，调用方只需判断 active。
+    PNG 编码和磁盘写入在后台线程完成。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self.path: Optional[Path] = None
+        self._active = False
+        self._frames_seen: set = set()
+        self._regions: Dict[str, Any] = {}
+        self._template_sets: Dict[str, Tuple[str, tuple]] = {}
+        self._template_set_count = 0
+        self._pending_frames = 0
+        self.events = 0
+        self.frames_written = 0
+        self.frames_deduped = 0
+        self.frames_dropped = 0
+
+    @property
+    def active(self) -> bool:
+        return self._active
+
+    def start(self, folder: Path = SESSION_FOLDER) -> Path:
+        with self._lock:
+            if self._active:
+                return self.path
+            path = folder / time.strftime("session_%Y%m%d_%H%M%S")
+            (path / "frames").mkdir(parents=True, exist_ok=True)
+            self.path = path
+            self._frames_seen = set()
+            self._regions = {}
+            self._template_sets = {}
+            self._template_set_count = 0
+            self._pending_frames = 0
+            self.events = self.frames_written = self.frames_deduped = self.frames_dropped = 0
+            self._thread = threading.Thread(target=self._loop, args=(path,), daemon=True, name="SessionRecorder")
+            self._thread.start()
+            self._active = True
+        self.record("session", version=SESSION_FORMAT_VERSION, wall=time.time())
+        return path
+
+    def stop(self, timeout: float = 10.0) -> Optional[Path]:
+        with self._lock:
+            if not self._active:
+                return None
+            self._active = False
+            thread, path = self._thread, self.path
+        self._queue.put(None)
+        thread.join(timeout)
+        return path
+
+    # ---------- 记录 ----------
+    def record(self, kind: str, timestamp: Optional[float] = None, **fields: Any):
+        """记录一个事件；timestamp 默认为当前的 time.monotonic()。"""
+        if not self._active:
+            return
+        event = {"t": time.monotonic() if timestamp is None else timestamp, "kind": kind, **fields}
+        with self._lock:
+            self.events += 1
+        self._queue.put(("event", event))
+
+    def record_region(self, window: str, region: Optional[Tuple[int, int, int, int]]):
+        """记录 get_window_region 的结果，只在位置变化时写入。"""
+        if not self._active:
+            return
+        region = list(region) if region else None
+        with self._lock:
+            if window in self._regions and self._regions[window] == region:
+                return
+            self._regions[window] = region
+        self.record("window_region", window=window, region=region)
+
+    def record_frame(
+        self,
+        window: str,
+        seq: int,
+        region: Optional[Tuple[int, int, int, int]],
+        image: Optional["np.ndarray"],
+        timestamp: Optional[float] = None,
+    ):
+        if not self._active:
+            return
+        frame_id = None
+        if image is not None:
+            digest = hashlib.blake2b(str(image.shape).encode(), digest_size=16)
+            digest.update(np.ascontiguousarray(image).data)
+            frame_id = digest.hexdigest()
+            with self._lock:
+                is_new = frame_id not in self._frames_seen
+                if not is_new:
+                    self.frames_deduped += 1
+                elif self._pending_frames >= MAX_PENDING_FRAMES:
+                    self.frames_dropped += 1
+                    frame_id, is_new = None, False
+                else:
+                    self._frames_seen.add(frame_id)
+                    self._pending_frames += 1
+            if is_new:
+                # 截图缓冲区会被后续截图复用，入队前必须复制
+                self._queue.put(("frame", frame_id, image.copy()))
+        self.record(
+            "frame", timestamp, window=window, seq=seq, region=list(region) if region else None, frame=frame_id
+        )
+
+    def record_templates(self, group: str, entries: Sequence[Tuple[str, str]]) -> Optional[str]:
+        """
+        记录一组模板 [(路径, 标签), ...] 并复制到会话目录，返回模板集编号。
+        同一组内容不变时直接返回上次的编号，可以在每次匹配前调用。
+        """
+        if not self._active:
+            return None
+        from .match_modes import template_mode
+
+        # 匹配模式也算作内容：文件夹配置改变后会记录新的模板集
+        entries = tuple((str(path), tag, template_mode(str(path))) for path, tag in entries)
+        with self._lock:
+            known = self._template_sets.get(group)
+            if known is not None and known[1] == entries:
+                return known[0]
+            self._template_set_count += 1
+            set_id = f"{group}-{self._template_set_count}"
+            self._template_sets[group] = (set_id, entries)
+        files = [
+            {"name": Path(path).name, "tag": tag, "mode": mode, "file": f"templates/{set_id}/{index}/{Path(path).name}"}
+            for index, (path, tag, mode) in enumerate(entries)
+        ]
+        self._queue.put(("templates", [(path, f["file"], f["mode"]) for (path, _, _), f in zip(entries, files)]))
+        self.record("templates", group=group, id=set_id, files=files)
+        return set_id
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "active": self._active,
+                "path": str(self.path) if self.path else None,
+                "events": self.events,
+                "frames_written": self.frames_written,
+                "frames_deduped": self.frames_deduped,
+                "frames_dropped": self.frames_dropped,
+            }
+
+    # ---------- 后台写入 ----------
+    def _loop(self, path: Path):
+        with open(path / "events.jsonl", "a", encoding="utf-8") as events:
+            while True:
+                batch = [self._queue.get()]
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                lines = []
+                # 先落盘帧和模板，再写引用它们的事件
+                for item in batch:
+                    if item is None:
+                        continue
+                    if item[0] == "frame":
+                        self._write_frame(path, item[1], item[2])
+                    elif item[0] == "templates":
+                        self._write_templates(path, item[1])
+                    else:
+                        lines.append(json.dumps(item[1], ensure_ascii=False, default=_json_default) + "\n")
+                if lines:
+                    events.write("".join(lines))
+                    events.flush()
+                if any(item is None for item in batch):
+                    return
+
+    @staticmethod
+    def _write_templates(path: Path, items: Sequence[Tuple[str, str, str]]):
+        from .match_modes import COLOR, mode_from_name, write_sidecar
+
+        for src, rel, mode in items:
+            try:
+                (path / rel).parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(src, path / rel)
+                # 来自文件夹配置的匹配模式随模板一起保存，回放时使用相同模式
+                if mode != COLOR and mode_from_name(rel) != mode:
+                    write_sidecar((path / rel).parent, {Path(rel).name: mode})
+            except OSError:
+                pass
+
+    def _write_frame(self, path: Path, frame_id: str, image: "np.ndarray"):
+        try:
+            ok, data = cv2.imencode(".png", image, [cv2.IMWRITE_PNG_COMPRESSION, PNG_COMPRESSION])
+            if ok:
+                data.tofile(str(path / "frames" / f"{frame_id}.png"))
+                with self._lock:
+                    self.frames_written += 1
+        finally:
+            with self._lock:
+                self._pending_frames -= 1
+
+
+class SessionReader:
+    """读取录制的会话 (目录或 zip)。zip 会先解压到临时目录。"""
+
+    def __init__(self, path: Path, frame_cache: int = 16):
+        path = Path(path)
+        self._tmp: Optional[tempfile.TemporaryDirectory] = None
+        if path.is_file() and zipfile.is_zipfile(path):
+            self._tmp = tempfile.TemporaryDirectory(prefix="session_")
+            with zipfile.ZipFile(path) as archive:
+                archive.extractall(self._tmp.name)
+            # 压缩包内可能还包了一层会话目录
+            root = Path(self._tmp.name)
+            found = list(root.rglob("events.jsonl"))
+            if not found:
+                raise ValueError(f"{path} 中没有 events.jsonl")
+            path = found[0].parent
+        self.path = path
+        self.events: List[Dict[str, Any]] = []
+        with open(path / "events.jsonl", "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    self.events.append(json.loads(line))
+        # 多个线程记录的事件入队顺序可能与时间戳略有出入
+        self.events.sort(key=lambda e: e["t"])
+        self._frame_cache: Dict[str, "np.ndarray"] = {}
+        self._frame_cache_size = frame_cache
+
+    def frame(self, frame_id: Optional[str]) -> Optional["np.ndarray"]:
+        if frame_id is None:
+            return None
+        image = self._frame_cache.get(frame_id)
+        if image is None:
+            image = cv2.imread(str(self.path / "frames" / f"{frame_id}.png"), cv2.IMREAD_COLOR)
+            if image is None:
+                return None
+            if len(self._frame_cache) >= self._frame_cache_size:
+                self._frame_cache.pop(next(iter(self._frame_cache)))
+            self._frame_cache[frame_id] = image
+        return image
+
+    def template_entries(self, event: Dict[str, Any]) -> List[Tuple[str, str]]:
+        """templates 事件 -> [(会话内模板路径, 标签), ...]，可直接作为优先级顺序使用。"""
+        return [(str(self.path / f["file"]), f["tag"]) for f in event["files"]]
+
+    @property
+    def duration(self) -> float:
+        return self.events[-1]["t"] - self.events[0]["t"] if self.events else 0.0
+
+    def close(self):
+        if self._tmp is not None:
+            self._tmp.cleanup()
+            self._tmp = None
+
+
+RECORDER = SessionRecorder()
@@ -0,0 +1,116 @@
+# utils/screen_capture.py
+# =======================================================================
+#
+#        全功能控制器 - 常驻截图会话模块
+#
+# =======================================================================
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .lazy_import import lazy_import
+from .metrics import METRICS
+
+cv2 = lazy_import("cv2")
+mss = lazy_import("mss")
+
+
+class ScreenCapture:
+    """
+    常驻的截图会话。
+    - mss 抓取器只创建一次并保持打开 (mss 实例不能跨线程使用，请每个线程各用一个)；
+    - BGR 输出写入预分配的缓冲区，区域尺寸不变时不再重新分配内存；
+    - buffer_count > 1 时轮流使用多块缓冲区，方便把帧交给其他线程读取。
+
+    注意：grab() 返回的数组会在之后第 buffer_count 次抓取时被覆盖。
+    """
+
+    def __init__(self, buffer_count: int = 1):
+        self.buffer_count = max(1, buffer_count)
+        self._sct = None
+        self._buffers: List[np.ndarray] = []
+        self._shape: Optional[Tuple[int, int]] = None
+        self._next = 0
+        self.grab_count = 0
+        self.realloc_count = 0
+
+    def _monitor(self, region: Optional[Tuple[int, int, int, int]]) -> dict:
+        if self._sct is None:
+            self._sct = mss.mss()
+        if region:
+            return {
+                "top": region[1],
+                "left": region[0],
+                "width": region[2],
+                "height": region[3],
+            }
+        return self._sct.monitors[0]
+
+    def grab_bgra(
+        self, region: Optional[Tuple[int, int, int, int]] = None
+    ) -> np.ndarray:
+        """抓取 BGRA 像素，直接返回原始数据上的只读视图 (不复制)。"""
+        started = time.perf_counter()
+        shot = self._sct_grab(region)
+        METRICS.observe("capture_ms", (time.perf_counter() - started) * 1000.0)
+        view = np.frombuffer(shot.raw, dtype=np.uint8).reshape(
+            shot.height, shot.width, 4
+        )
+        self.grab_count += 1
+        return view
+
+    def grab(self, region: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+        """抓取并转换为 BGR，结果写入复用的缓冲区。"""
+        bgra = self.grab_bgra(region)
+        h, w = bgra.shape[:2]
+        if self._shape != (h, w):
+            self._buffers = [
+                np.empty((h, w, 3), dtype=np.uint8) for _ in range(self.buffer_count)
+            ]
+            self._shape = (h, w)
+            self._next = 0
+            self.realloc_count += 1
+
+        buf = self._buffers[self._next]
+        self._next = (self._next + 1) % self.buffer_count
+        cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=buf)
+        return buf
+
+    def _sct_grab(self, region):
+        monitor = self._monitor(region)
+        try:
+            return self._sct.grab(monitor)
+        except Exception:
+            # 抓取器失效 (如显示设置改变) 时重建一次再试
+            self.close()
+            monitor = self._monitor(region)
+            return self._sct.grab(monitor)
+
+    def close(self):
+        if self._sct is not None:
+            try:
+                self._sct.close()
+            except Exception:
+                pass
+            self._sct = None
+
+
+_local = threading.local()
+
+
+def get_capture_session() -> ScreenCapture:
+    """返回当前线程专用的常驻截图会话。"""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = ScreenCapture()
+        _local.session = session
+    return session
+
+
+def close_capture_session():
+    session = getattr(_local, "session", None)
+    if session is not None:
+        session.close()
+        _local.session = None
@@ -0,0 +1,99 @@
+# utils/task_pool.py
+# =======================================================================
+#
+#        全功能控制器 - 后台任务池 (阻塞的设备/图像操作不再占用界面线程)
+#
+# =======================================================================
+import itertools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+# adb 操作多为等待 I/O，几个线程足够；匹配本身另有 matcher 的线程池
+TASK_WORKERS = 4
+
+
+class TaskContext:
+    """传给任务函数的上下文：report() 汇报进度，cancelled 用于协作式取消。"""
+
+    def __init__(self, task_id: int, name: str, on_progress: Optional[Callable[[int, str, str], None]]):
+        self.task_id = task_id
+        self.name = name
+        self.cancelled = threading.Event()
+        self._on_progress = on_progress
+        self.last_progress = ""
+
+    def report(self, text: str):
+        self.last_progress = text
+        if self._on_progress is not None:
+            try:
+                self._on_progress(self.task_id, self.name, text)
+            except Exception:
+                pass
+
+    def sleep(self, seconds: float) -> bool:
+        """可被取消打断的等待，返回 True 表示任务已被取消。"""
+        return self.cancelled.wait(seconds)
+
+
+class TaskPool:
+    """
+    有界的后台任务线程池。
+    submit() 返回 concurrent.futures.Future；需要进度的任务把第一个参数声明为 TaskContext
+    (with_context=True)。同名任务可用 running(name) 判断是否已在执行，避免重复提交。
+    """
+
+    def __init__(self, max_workers: int = TASK_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="Task")
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._active: Dict[int, TaskContext] = {}
+        self.progress_listeners: List[Callable[[int, str, str], None]] = []
+
+    def _notify(self, task_id: int, name: str, text: str):
+        for listener in list(self.progress_listeners):
+            listener(task_id, name, text)
+
+    def submit(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        with_context: bool = False,
+        **kwargs: Any,
+    ) -> Future:
+        ctx = TaskContext(next(self._ids), name, self._notify)
+        with self._lock:
+            self._active[ctx.task_id] = ctx
+
+        def run():
+            try:
+                if with_context:
+                    return fn(ctx, *args, **kwargs)
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._active.pop(ctx.task_id, None)
+
+        future = self._executor.submit(run)
+        future.task_context = ctx
+        return future
+
+    def running(self, name: str) -> bool:
+        with self._lock:
+            return any(ctx.name == name for ctx in self._active.values())
+
+    def active(self) -> List[TaskContext]:
+        with self._lock:
+            return list(self._active.values())
+
+    def cancel_all(self):
+        for ctx in self.active():
+            ctx.cancelled.set()
+
+    def shutdown(self):
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+TASK_POOL = TaskPool()
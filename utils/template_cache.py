@@ -0,0 +1,212 @@
+# utils/template_cache.py
+# =======================================================================
+#
+#        全功能控制器 - 模板图片解码缓存模块
+#
+# =======================================================================
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple, Any
+
+import numpy as np
+
+from .lazy_import import lazy_import
+from .match_modes import COLOR, EDGE, GRAY, convert, is_flat, template_mode
+
+cv2 = lazy_import("cv2")
+
+# 默认缓存上限：64 MB 的解码像素数据
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class CachedTemplate:
+    """
+    一张已解码的模板图片：BGR 像素、可选的 alpha 掩码及尺寸。
+    mode 为灰度/边缘时，converted 保存转换后的单通道图像，匹配时与帧的同模式视图比较。
+    nbytes 包含之后按需生成的 BGRA/缩放副本；生成时通过 on_grow 通知所属缓存更新总量。
+    """
+
+    __slots__ = (
+        "path", "image", "mask", "mode", "converted", "width", "height", "nbytes",
+        "on_grow", "_lock", "_bgra", "_scaled",
+    )
+
+    def __init__(self, path: str, image: np.ndarray, mask: Optional[np.ndarray], mode: str = COLOR):
+        self.path = path
+        self.image = image
+        self.mask = mask
+        self.mode = mode
+        self.converted = convert(image, mode)
+        self.height, self.width = image.shape[:2]
+        self.nbytes = image.nbytes + (mask.nbytes if mask is not None else 0)
+        if self.converted is not image:
+            self.nbytes += self.converted.nbytes
+        self.on_grow: Optional[Callable[["CachedTemplate", int], None]] = None
+        self._lock = threading.Lock()
+        self._bgra: Optional[np.ndarray] = None
+        self._scaled: Dict[float, Tuple[np.ndarray, Optional[np.ndarray]]] = {}
+
+    def _grow(self, added: int):
+        """派生副本生成后 (持有 _lock 时调用) 计入内存占用。"""
+        self.nbytes += added
+        if self.on_grow is not None:
+            self.on_grow(self, added)
+
+    def image_for(self, channels: int) -> np.ndarray:
+        """
+        返回与帧通道数一致的模板。
+        4 通道时 alpha 恒为 255：TM_CCOEFF_NORMED 会减去均值，常量通道不影响得分，
+        因此可直接在 BGRA 帧上匹配而无需先转换整帧。
+        灰度/边缘模式下总是返回单通道的转换结果。
+        """
+        if self.mode != COLOR:
+            return self.converted
+        if channels != 4:
+            return self.image
+        if self._bgra is None:
+            with self._lock:
+                if self._bgra is None:
+                    self._bgra = cv2.cvtColor(self.image, cv2.COLOR_BGR2BGRA)
+                    self._grow(self._bgra.nbytes)
+        return self._bgra
+
+    def scaled(self, scale: float) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """返回缩放后的 (模板, 掩码)，供金字塔匹配的粗匹配阶段使用；模板已按 mode 转换。"""
+        cached = self._scaled.get(scale)
+        if cached is not None:
+            return cached
+        with self._lock:
+            cached = self._scaled.get(scale)
+            if cached is not None:
+                return cached
+            # 先缩放再转换，与 PreparedFrame.scaled() 对帧的处理顺序一致
+            image = convert(cv2.resize(
+                self.image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+            ), self.mode)
+            mask = (
+                cv2.resize(
+                    self.mask,
+                    (image.shape[1], image.shape[0]),
+                    interpolation=cv2.INTER_NEAREST,
+                )
+                if self.mask is not None
+                else None
+            )
+            cached = (image, mask)
+            self._scaled[scale] = cached
+            self._grow(image.nbytes + (mask.nbytes if mask is not None else 0))
+        return cached
+
+
+def _decode_template(path: str, mode: str = COLOR) -> Optional[CachedTemplate]:
+    template = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    if template is None:
+        return None
+    if template.ndim == 2:
+        template = cv2.cvtColor(template, cv2.COLOR_GRAY2BGR)
+
+    mask = None
+    if template.shape[2] == 4:
+        alpha_channel = template[:, :, 3]
+        _, mask = cv2.threshold(alpha_channel, 0, 255, cv2.THRESH_BINARY)
+        template = cv2.cvtColor(template, cv2.COLOR_BGRA2BGR)
+    cached = CachedTemplate(path, template, mask, mode)
+    if mode == EDGE and is_flat(cached.converted):
+        # 纹理太少的模板提取不到边缘，全 0 的边缘图会在 (0, 0) 以满分误匹配
+        cached = CachedTemplate(path, template, mask, GRAY)
+    return cached
+
+
+class TemplateCache:
+    """
+    进程级模板缓存 (线程安全)。
+    以 (路径, mtime, 文件大小, 匹配模式) 作为有效性校验，文件或模式被修改后自动重新解码；
+    按 LRU 顺序淘汰，总内存不超过 max_bytes。
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int, str], CachedTemplate]]" = (
+            OrderedDict()
+        )
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: str) -> Optional[CachedTemplate]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.invalidate(path)
+            return None
+        stamp = (st.st_mtime_ns, st.st_size, template_mode(path))
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # 解码放在锁外进行，避免阻塞其他线程的缓存命中
+        decoded = _decode_template(path, stamp[2])
+        if decoded is None:
+            self.invalidate(path)
+            return None
+
+        decoded.on_grow = self._on_template_grew
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._total_bytes -= old[1].nbytes
+            self._entries[path] = (stamp, decoded)
+            self._total_bytes += decoded.nbytes
+            self._evict_locked()
+        return decoded
+
+    def _on_template_grew(self, template: CachedTemplate, added: int):
+        # 模板已被淘汰/替换时，移除时扣除的就是增长后的 nbytes，这里不再重复计入
+        with self._lock:
+            entry = self._entries.get(template.path)
+            if entry is not None and entry[1] is template:
+                self._total_bytes += added
+                self._evict_locked()
+
+    def _evict_locked(self):
+        # 至少保留最近使用的一项，即使它本身超过了上限
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._total_bytes -= evicted.nbytes
+            self.evictions += 1
+
+    def invalidate(self, path: Optional[str] = None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._total_bytes = 0
+                return
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._total_bytes -= old[1].nbytes
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+TEMPLATE_CACHE = TemplateCache()
+
+
+def get_template(path: str) -> Optional[CachedTemplate]:
+    return TEMPLATE_CACHE.get(path)
@@ -0,0 +1,230 @@
+# utils/vision.py
+# =======================================================================
+#
+#        全功能控制器 - 图像匹配模块 (对已截取的帧进行模板匹配)
+#
+# =======================================================================
+import threading
+from collections import namedtuple
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .lazy_import import lazy_import
+from .match_modes import COLOR, convert
+from .template_cache import CachedTemplate, get_template
+
+cv2 = lazy_import("cv2")
+
+Box = namedtuple("Box", ["left", "top", "width", "height"])
+
+MATCH_METHOD = 5  # cv2.TM_CCOEFF_NORMED，写成数值以免导入本模块时就加载 OpenCV
+
+# --- 金字塔 (先粗后精) 匹配参数 ---
+PYRAMID_SCALE = 0.5  # 粗匹配时帧和模板的缩放比例
+PYRAMID_MIN_TEMPLATE_SIDE = 12  # 缩放后模板短边小于该值时直接走全分辨率匹配
+PYRAMID_CANDIDATES = 3  # 粗匹配保留的候选位置数量
+PYRAMID_COARSE_MARGIN = 0.2  # 粗匹配得分低于 confidence - margin 的候选直接丢弃
+
+
+class PreparedFrame:
+    """
+    一次截图的各种派生视图 (缩小后的帧、灰度图、边缘图)，按需计算并在同一轮的所有模板间共享。
+    并行匹配时多个线程会同时请求同一视图，由锁保证每种视图只计算一次。
+    """
+
+    def __init__(self, image: np.ndarray):
+        self.image = image
+        self._lock = threading.Lock()
+        self._views: Dict[str, np.ndarray] = {COLOR: image}
+        self._scaled: Dict[Tuple[float, str], np.ndarray] = {}
+
+    def view(self, mode: str = COLOR) -> np.ndarray:
+        """整帧在指定匹配模式下的图像 (彩色模式即原图)。"""
+        image = self._views.get(mode)
+        if image is None:
+            with self._lock:
+                image = self._views.get(mode)
+                if image is None:
+                    image = self._views[mode] = convert(self.image, mode)
+        return image
+
+    def scaled(self, scale: float, mode: str = COLOR) -> np.ndarray:
+        small = self._scaled.get((scale, mode))
+        if small is None:
+            with self._lock:
+                small = self._scaled.get((scale, mode))
+                if small is None:
+                    base = self._scaled.get((scale, COLOR))
+                    if base is None:
+                        base = self._scaled[(scale, COLOR)] = cv2.resize(
+                            self.image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+                        )
+                    small = self._scaled[(scale, mode)] = convert(base, mode)
+        return small
+
+
+FrameLike = Union[np.ndarray, PreparedFrame]
+
+
+def prepare_frame(frame: FrameLike) -> PreparedFrame:
+    """把普通数组包装为 PreparedFrame (已经是则原样返回)。"""
+    return frame if isinstance(frame, PreparedFrame) else PreparedFrame(frame)
+
+
+def _match_full(
+    image: np.ndarray, template: CachedTemplate
+) -> Tuple[float, Tuple[int, int]]:
+    tpl = template.image_for(image.shape[2] if image.ndim == 3 else 1)
+    result = (
+        cv2.matchTemplate(image, tpl, MATCH_METHOD, mask=template.mask)
+        if template.mask is not None
+        else cv2.matchTemplate(image, tpl, MATCH_METHOD)
+    )
+    _, max_val, _, max_loc = cv2.minMaxLoc(result)
+    return max_val, max_loc
+
+
+def _match_pyramid(
+    frame: PreparedFrame, template: CachedTemplate, confidence: float
+) -> Tuple[float, Tuple[int, int]]:
+    """
+    先在缩小的帧上找出若干候选位置，再只在候选附近做全分辨率匹配。
+    最终得分来自全分辨率匹配，因此与普通模式的 confidence 含义一致。
+    """
+    image = frame.view(template.mode)
+    if min(template.width, template.height) * PYRAMID_SCALE < PYRAMID_MIN_TEMPLATE_SIDE:
+        return _match_full(image, template)
+
+    small_frame = frame.scaled(PYRAMID_SCALE, template.mode)
+    small_tpl, small_mask = template.scaled(PYRAMID_SCALE)
+    if (
+        small_tpl.shape[0] > small_frame.shape[0]
+        or small_tpl.shape[1] > small_frame.shape[1]
+    ):
+        return _match_full(image, template)
+
+    small_tpl = (
+        cv2.cvtColor(small_tpl, cv2.COLOR_BGR2BGRA)
+        if small_frame.ndim == 3 and small_frame.shape[2] == 4
+        else small_tpl
+    )
+    coarse = (
+        cv2.matchTemplate(small_frame, small_tpl, MATCH_METHOD, mask=small_mask)
+        if small_mask is not None
+        else cv2.matchTemplate(small_frame, small_tpl, MATCH_METHOD)
+    )
+    # 带掩码匹配可能出现 NaN/Inf，统一压到最低分
+    np.nan_to_num(coarse, copy=False, nan=-1.0, posinf=-1.0, neginf=-1.0)
+
+    frame_h, frame_w = image.shape[:2]
+    pad = int(np.ceil(1.0 / PYRAMID_SCALE)) + 2
+    suppress_w = max(1, small_tpl.shape[1] // 2)
+    suppress_h = max(1, small_tpl.shape[0] // 2)
+
+    best_val, best_loc = -1.0, (0, 0)
+    for _ in range(PYRAMID_CANDIDATES):
+        _, coarse_val, _, (cx, cy) = cv2.minMaxLoc(coarse)
+        if coarse_val < confidence - PYRAMID_COARSE_MARGIN:
+            break
+        # 抑制该候选附近的区域，下一次取到的是另一个位置
+        coarse[
+            max(0, cy - suppress_h) : cy + suppress_h + 1,
+            max(0, cx - suppress_w) : cx + suppress_w + 1,
+        ] = -1.0
+
+        fx, fy = int(cx / PYRAMID_SCALE), int(cy / PYRAMID_SCALE)
+        x0, y0 = max(0, fx - pad), max(0, fy - pad)
+        x1 = min(frame_w, fx + template.width + pad)
+        y1 = min(frame_h, fy + template.height + pad)
+        if x1 - x0 < template.width or y1 - y0 < template.height:
+            continue
+        val, (lx, ly) = _match_full(image[y0:y1, x0:x1], template)
+        if val > best_val:
+            best_val, best_loc = val, (x0 + lx, y0 + ly)
+    return best_val, best_loc
+
+
+def locate_template(
+    frame: PreparedFrame,
+    template: CachedTemplate,
+    confidence: float,
+    pyramid: bool = False,
+    roi: Optional[Tuple[int, int, int, int]] = None,
+) -> Optional[Tuple[float, Tuple[int, int]]]:
+    """
+    返回模板在帧内的 (最高得分, 左上角坐标)，坐标相对于整帧。
+    roi=(x, y, w, h) 时只在该子区域内搜索；模板放不下时返回 None。
+    帧按模板的匹配模式取对应视图 (灰度/边缘图每帧只转换一次)。
+    """
+    image = frame.view(template.mode)
+    if roi is not None:
+        x, y, w, h = roi
+        image = image[y : y + h, x : x + w]
+    if template.height > image.shape[0] or template.width > image.shape[1]:
+        return None
+
+    if roi is not None:
+        # 局部搜索区域很小，直接全分辨率匹配
+        val, (lx, ly) = _match_full(image, template)
+        return val, (roi[0] + lx, roi[1] + ly)
+    if pyramid:
+        return _match_pyramid(frame, template, confidence)
+    return _match_full(image, template)
+
+
+def to_screen_box(
+    loc: Tuple[int, int],
+    template: CachedTemplate,
+    region: Optional[Tuple[int, int, int, int]] = None,
+) -> Box:
+    """把帧内坐标转换为屏幕坐标的 Box。"""
+    return Box(
+        left=loc[0] + region[0] if region else loc[0],
+        top=loc[1] + region[1] if region else loc[1],
+        width=template.width,
+        height=template.height,
+    )
+
+
+def match_template(
+    frame: FrameLike,
+    template_path: str,
+    confidence: float,
+    region: Optional[Tuple[int, int, int, int]] = None,
+    pyramid: bool = False,
+) -> Optional[Box]:
+    """
+    在已截取的 BGR (或 BGRA) 帧中查找模板。
+    frame 对应屏幕上的 region 区域，返回的 Box 为屏幕坐标。
+    pyramid=True 时使用先粗后精的金字塔匹配。
+    """
+    try:
+        template = get_template(template_path)
+        if template is None:
+            return None
+        found = locate_template(
+            prepare_frame(frame), template, confidence, pyramid=pyramid
+        )
+        if found is not None and found[0] >= confidence:
+            return to_screen_box(found[1], template, region)
+    except Exception:
+        return None
+    return None
+
+
+def find_images_in_frame(
+    frame: FrameLike,
+    template_paths: Sequence[str],
+    confidence: float,
+    region: Optional[Tuple[int, int, int, int]] = None,
+    pyramid: bool = False,
+) -> List[Optional[Box]]:
+    """批量接口：所有模板都与同一帧匹配，结果顺序与 template_paths 一致。"""
+    prepared = prepare_frame(frame)
+    return [
+        match_template(
+            prepared, path, confidence=confidence, region=region, pyramid=pyramid
+        )
+        for path in template_paths
+    ]
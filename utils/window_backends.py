@@ -0,0 +1,287 @@
+# utils/window_backends.py
+# =======================================================================
+#
+#        全功能控制器 - 窗口后端模块
+#        按标题查找投屏窗口、读取其客户区 (不含标题栏和边框) 的屏幕位置；
+#        平台相关的依赖 (win32gui / python-xlib) 只在选用对应后端时才导入
+#
+# =======================================================================
+import os
+import sys
+import threading
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+Region = Tuple[int, int, int, int]  # (left, top, width, height)
+
+
+class WindowBackend:
+    """
+    窗口后端基类。handle 由后端自行定义 (Win32 为 HWND，X11 为窗口 id)。
+    window_stamp() 应当足够廉价，每次截图前都会调用；返回值变化时才重新读取客户区位置。
+    """
+
+    name = "base"
+
+    def find_window(self, window_title: str) -> Optional[Any]:
+        """按标题查找窗口，返回句柄；找不到时返回 None。"""
+        raise NotImplementedError
+
+    def is_window(self, handle: Any) -> bool:
+        """句柄对应的窗口是否仍然存在。"""
+        raise NotImplementedError
+
+    def window_stamp(self, handle: Any) -> Hashable:
+        """窗口位置/尺寸/最小化状态的廉价指纹。"""
+        raise NotImplementedError
+
+    def client_region(self, handle: Any) -> Optional[Region]:
+        """客户区的屏幕区域；窗口已最小化或尺寸为 0 时返回 None。"""
+        raise NotImplementedError
+
+    def find_window_region(self, window_title: str) -> Optional[Region]:
+        """不使用缓存，直接按标题查找并读取客户区。"""
+        handle = self.find_window(window_title)
+        return self.client_region(handle) if handle is not None else None
+
+
+class Win32WindowBackend(WindowBackend):
+    """Windows：通过 win32gui 按标题查找顶层窗口。"""
+
+    name = "win32"
+
+    def __init__(self):
+        import win32gui
+
+        self._win32gui = win32gui
+
+    def find_window(self, window_title: str) -> Optional[Any]:
+        return self._win32gui.FindWindow(None, window_title) or None
+
+    def is_window(self, handle: Any) -> bool:
+        return bool(self._win32gui.IsWindow(handle))
+
+    def window_stamp(self, handle: Any) -> Hashable:
+        # 外框位置和最小化状态足以反映移动/缩放/最小化，两次调用都很便宜
+        return self._win32gui.GetWindowRect(handle), bool(self._win32gui.IsIconic(handle))
+
+    def client_region(self, handle: Any) -> Optional[Region]:
+        if self._win32gui.IsIconic(handle):
+            return None
+        _, _, width, height = self._win32gui.GetClientRect(handle)
+        left, top = self._win32gui.ClientToScreen(handle, (0, 0))
+        return (left, top, width, height) if width > 0 and height > 0 else None
+
+
+class X11WindowBackend(WindowBackend):
+    """
+    Linux (X11)：通过 python-xlib 在 _NET_CLIENT_LIST 中按 _NET_WM_NAME/WM_NAME 查找窗口。
+    找到后订阅该窗口的结构/属性变化事件，window_stamp() 只需检查是否收到过事件。
+    """
+
+    name = "x11"
+
+    def __init__(self):
+        from Xlib import X, display, error
+
+        self._X = X
+        self._errors = (error.BadWindow, error.BadDrawable)
+        self._lock = threading.Lock()  # Display 连接不能多线程同时使用
+        self._display = display.Display()
+        self._root = self._display.screen().root
+        atom = self._display.intern_atom
+        self._client_list = atom("_NET_CLIENT_LIST")
+        self._net_wm_name = atom("_NET_WM_NAME")
+        self._utf8 = atom("UTF8_STRING")
+        self._wm_state = atom("_NET_WM_STATE")
+        self._hidden = atom("_NET_WM_STATE_HIDDEN")
+        # 窗口 id -> 收到的变化事件数 (即 window_stamp)
+        self._versions: Dict[int, int] = {}
+
+    def _window(self, handle: int):
+        return self._display.create_resource_object("window", handle)
+
+    def _title(self, window) -> Optional[str]:
+        prop = window.get_full_property(self._net_wm_name, self._utf8)
+        if prop is not None and prop.value:
+            value = prop.value
+            return value.decode("utf-8", "ignore") if isinstance(value, bytes) else str(value)
+        return window.get_wm_name()
+
+    def find_window(self, window_title: str) -> Optional[Any]:
+        with self._lock:
+            prop = self._root.get_full_property(self._client_list, self._X.AnyPropertyType)
+            for window_id in (prop.value if prop is not None else []):
+                window = self._window(window_id)
+                try:
+                    if self._title(window) != window_title:
+                        continue
+                    window.change_attributes(
+                        event_mask=self._X.StructureNotifyMask | self._X.PropertyChangeMask
+                    )
+                except self._errors:
+                    continue
+                self._versions.setdefault(int(window_id), 0)
+                return int(window_id)
+        return None
+
+    def is_window(self, handle: Any) -> bool:
+        with self._lock:
+            try:
+                self._window(handle).get_attributes()
+                return True
+            except self._errors:
+                self._versions.pop(handle, None)
+                return False
+
+    def window_stamp(self, handle: Any) -> Hashable:
+        with self._lock:
+            # 移动/缩放 (ConfigureNotify)、最小化 (Unmap/Map、_NET_WM_STATE 变化) 都会让版本号加一
+            while self._display.pending_events():
+                event = self._display.next_event()
+                window = getattr(event, "window", None)
+                window_id = getattr(window, "id", None)
+                if window_id in self._versions:
+                    self._versions[window_id] += 1
+            return self._versions.get(handle, 0)
+
+    def client_region(self, handle: Any) -> Optional[Region]:
+        with self._lock:
+            window = self._window(handle)
+            try:
+                if window.get_attributes().map_state != self._X.IsViewable:
+                    return None
+                state = window.get_full_property(self._wm_state, self._X.AnyPropertyType)
+                if state is not None and self._hidden in state.value:
+                    return None
+                geometry = window.get_geometry()
+                # X11 中窗口管理器的装饰属于外层框架，客户窗口本身即客户区
+                origin = self._root.translate_coords(window, 0, 0)
+            except self._errors:
+                return None
+        width, height = geometry.width, geometry.height
+        return (origin.x, origin.y, width, height) if width > 0 and height > 0 else None
+
+
+class FakeWindowBackend(WindowBackend):
+    """
+    内存中的假窗口，用于离线测试/回放，不依赖任何图形环境：
+        backend = FakeWindowBackend()
+        handle = backend.add_window("嵬嵬手机", (100, 50, 540, 1200))
+        backend.move(handle, (200, 50, 540, 1200))
+    调用次数记录在 calls 中，便于确认缓存是否生效。
+    """
+
+    name = "fake"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._windows: Dict[int, Dict[str, Any]] = {}
+        self._next_handle = 1
+        self.calls: Dict[str, int] = {"find_window": 0, "window_stamp": 0, "client_region": 0}
+
+    def add_window(self, window_title: str, region: Region) -> int:
+        with self._lock:
+            handle = self._next_handle
+            self._next_handle += 1
+            self._windows[handle] = {"title": window_title, "region": tuple(region), "minimized": False, "version": 0}
+            return handle
+
+    def _update(self, handle: int, **fields: Any):
+        with self._lock:
+            window = self._windows[handle]
+            window.update(fields)
+            window["version"] += 1
+
+    def move(self, handle: int, region: Region):
+        self._update(handle, region=tuple(region))
+
+    def minimize(self, handle: int, minimized: bool = True):
+        self._update(handle, minimized=minimized)
+
+    def close(self, handle: int):
+        with self._lock:
+            self._windows.pop(handle, None)
+
+    def find_window(self, window_title: str) -> Optional[Any]:
+        with self._lock:
+            self.calls["find_window"] += 1
+            for handle, window in self._windows.items():
+                if window["title"] == window_title:
+                    return handle
+        return None
+
+    def is_window(self, handle: Any) -> bool:
+        with self._lock:
+            return handle in self._windows
+
+    def window_stamp(self, handle: Any) -> Hashable:
+        with self._lock:
+            self.calls["window_stamp"] += 1
+            window = self._windows.get(handle)
+            return window["version"] if window is not None else None
+
+    def client_region(self, handle: Any) -> Optional[Region]:
+        with self._lock:
+            self.calls["client_region"] += 1
+            window = self._windows.get(handle)
+            if window is None or window["minimized"]:
+                return None
+            return window["region"]
+
+
+class NullWindowBackend(WindowBackend):
+    """当前平台没有可用的窗口后端：总是找不到窗口，截图相关功能随之空转。"""
+
+    name = "none"
+
+    def __init__(self, reason: str = ""):
+        self.reason = reason
+
+    def find_window(self, window_title: str) -> Optional[Any]:
+        return None
+
+    def is_window(self, handle: Any) -> bool:
+        return False
+
+    def window_stamp(self, handle: Any) -> Hashable:
+        return None
+
+    def client_region(self, handle: Any) -> Optional[Region]:
+        return None
+
+
+_backend: Optional[WindowBackend] = None
+_backend_lock = threading.Lock()
+
+
+def _create_default_backend() -> WindowBackend:
+    if os.name == "nt":
+        try:
+            return Win32WindowBackend()
+        except ImportError as e:
+            return NullWindowBackend(f"无法导入 win32gui: {e}")
+    if sys.platform.startswith("linux") and os.environ.get("DISPLAY"):
+        try:
+            return X11WindowBackend()
+        except ImportError as e:
+            return NullWindowBackend(f"无法导入 python-xlib: {e}")
+        except Exception as e:
+            return NullWindowBackend(f"无法连接 X11 显示 {os.environ.get('DISPLAY')}: {e}")
+    return NullWindowBackend(f"平台 {sys.platform} 暂无窗口后端")
+
+
+def get_window_backend() -> WindowBackend:
+    """返回当前窗口后端，第一次调用时按平台创建。"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = _create_default_backend()
+    return _backend
+
+
+def set_window_backend(backend: Optional[WindowBackend]):
+    """替换窗口后端 (传入 None 时下次使用重新按平台创建)。"""
+    global _backend
+    with _backend_lock:
+        _backend = backend
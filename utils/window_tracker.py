@@ -0,0 +1,110 @@
+# utils/window_tracker.py
+# =======================================================================
+#
+#        全功能控制器 - 窗口位置跟踪模块
+#        每个标题只查找一次窗口句柄，缓存客户区位置；每次截图前只做一次廉价的变化检查，
+#        窗口移动/缩放/最小化后才重新读取位置，窗口关闭后才重新按标题查找
+#
+# =======================================================================
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional
+
+from config import WINDOW_GEOMETRY_RECHECK_S, WINDOW_MISSING_RECHECK_S
+from .metrics import METRICS
+from .window_backends import Region, WindowBackend, get_window_backend
+
+
+class TrackedWindow:
+    __slots__ = ("handle", "stamp", "region", "checked_at")
+
+    def __init__(self, handle: Any):
+        self.handle = handle
+        self.stamp: Hashable = None
+        self.region: Optional[Region] = None
+        self.checked_at = float("-inf")  # 上次读取客户区的时间
+
+
+class WindowTracker:
+    def __init__(
+        self,
+        backend: Optional[WindowBackend] = None,
+        missing_recheck: float = WINDOW_MISSING_RECHECK_S,
+        geometry_recheck: float = WINDOW_GEOMETRY_RECHECK_S,
+    ):
+        self._backend = backend
+        self.missing_recheck = missing_recheck
+        self.geometry_recheck = geometry_recheck
+        self._lock = threading.Lock()
+        self._windows: Dict[str, TrackedWindow] = {}
+        # 标题 -> 上次找不到窗口的时间
+        self._missing: Dict[str, float] = {}
+        self._cached_backend: Optional[WindowBackend] = None
+        self.lookups = 0
+        self.refreshes = 0
+        self.cache_hits = 0
+
+    @property
+    def backend(self) -> WindowBackend:
+        return self._backend if self._backend is not None else get_window_backend()
+
+    def region(self, window_title: str) -> Optional[Region]:
+        """窗口客户区的屏幕区域；窗口不存在或已最小化时返回 None。"""
+        backend = self.backend
+        now = time.monotonic()
+        with self._lock:
+            if backend is not self._cached_backend:
+                # 后端被替换 (如切换为假窗口)，旧句柄全部作废
+                self._windows.clear()
+                self._missing.clear()
+                self._cached_backend = backend
+
+            entry = self._windows.get(window_title)
+            if entry is not None and not backend.is_window(entry.handle):
+                del self._windows[window_title]
+                entry = None
+            if entry is None:
+                if now - self._missing.get(window_title, float("-inf")) < self.missing_recheck:
+                    return None
+                self.lookups += 1
+                METRICS.inc("window_lookups")
+                handle = backend.find_window(window_title)
+                if handle is None:
+                    self._missing[window_title] = now
+                    return None
+                self._missing.pop(window_title, None)
+                entry = self._windows[window_title] = TrackedWindow(handle)
+
+            stamp = backend.window_stamp(entry.handle)
+            if stamp != entry.stamp or now - entry.checked_at >= self.geometry_recheck:
+                self.refreshes += 1
+                METRICS.inc("window_geometry_refreshes")
+                entry.stamp = stamp
+                entry.region = backend.client_region(entry.handle)
+                entry.checked_at = now
+            else:
+                self.cache_hits += 1
+            return entry.region
+
+    def invalidate(self, window_title: Optional[str] = None):
+        """丢弃缓存 (如刚启动了投屏窗口，希望立即重新查找)；不指定标题时全部丢弃。"""
+        with self._lock:
+            if window_title is None:
+                self._windows.clear()
+                self._missing.clear()
+            else:
+                self._windows.pop(window_title, None)
+                self._missing.pop(window_title, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": self._cached_backend.name if self._cached_backend else None,
+                "windows": len(self._windows),
+                "lookups": self.lookups,
+                "refreshes": self.refreshes,
+                "cache_hits": self.cache_hits,
+            }
+
+
+WINDOW_TRACKER = WindowTracker()